@@ -1,5 +1,15 @@
 import mt_data_api.data_api
+import mt_data_api.errors
+import mt_data_api.futures
+import mt_data_api.rate_limiter
+import mt_data_api.transport
 import mt_data_api.version
 
 DataAPI = mt_data_api.data_api.DataAPI
+DataAPIError = mt_data_api.errors.DataAPIError
+FutureDataAPI = mt_data_api.futures.FutureDataAPI
+RateLimiter = mt_data_api.rate_limiter.RateLimiter
+RequestsTransport = mt_data_api.transport.RequestsTransport
+HTTP2Transport = mt_data_api.transport.HTTP2Transport
+Urllib3Transport = mt_data_api.transport.Urllib3Transport
 VERSION = mt_data_api.version.VERSION
@@ -0,0 +1,237 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Six Apart, Ltd.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import json
+from mt_data_api import pager
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+_ENTRY = [
+    ('id', ('id',), 'int64'),
+    ('blog_id', ('blog', 'id'), 'int64'),
+    ('class', ('class',), 'string'),
+    ('status', ('status',), 'string'),
+    ('title', ('title',), 'string'),
+    ('basename', ('basename',), 'string'),
+    ('permalink', ('permalink',), 'string'),
+    ('author_id', ('author', 'id'), 'int64'),
+    ('author_name', ('author', 'displayName'), 'string'),
+    ('date', ('date',), 'string'),
+    ('created_date', ('createdDate',), 'string'),
+    ('modified_date', ('modifiedDate',), 'string'),
+    ('format', ('format',), 'string'),
+    ('excerpt', ('excerpt',), 'string'),
+    ('body', ('body',), 'string'),
+    ('more', ('more',), 'string'),
+    ('tags', ('tags',), 'list<string>'),
+    ('category_ids', ('categories', '*', 'id'), 'list<int64>'),
+    ('asset_ids', ('assets', '*', 'id'), 'list<int64>'),
+    ('comment_count', ('commentCount',), 'int64'),
+    ('trackback_count', ('trackbackCount',), 'int64'),
+]
+
+FIELDS = {
+    'entries': _ENTRY,
+    'pages': _ENTRY,
+    'comments': [
+        ('id', ('id',), 'int64'),
+        ('blog_id', ('blog', 'id'), 'int64'),
+        ('entry_id', ('entry', 'id'), 'int64'),
+        ('parent_id', ('parent',), 'int64'),
+        ('status', ('status',), 'string'),
+        ('author_name', ('author', 'displayName'), 'string'),
+        ('link', ('link',), 'string'),
+        ('body', ('body',), 'string'),
+        ('date', ('date',), 'string'),
+        ('created_date', ('createdDate',), 'string'),
+        ('modified_date', ('modifiedDate',), 'string'),
+    ],
+    'assets': [
+        ('id', ('id',), 'int64'),
+        ('blog_id', ('blog', 'id'), 'int64'),
+        ('class', ('class',), 'string'),
+        ('label', ('label',), 'string'),
+        ('filename', ('filename',), 'string'),
+        ('url', ('url',), 'string'),
+        ('mime_type', ('mimeType',), 'string'),
+        ('file_size', ('meta', 'fileSize'), 'int64'),
+        ('width', ('meta', 'width'), 'int64'),
+        ('height', ('meta', 'height'), 'int64'),
+        ('tags', ('tags',), 'list<string>'),
+        ('created_date', ('createdDate',), 'string'),
+        ('modified_date', ('modifiedDate',), 'string'),
+    ],
+    'logs': [
+        ('id', ('id',), 'int64'),
+        ('blog_id', ('blog', 'id'), 'int64'),
+        ('level', ('level',), 'string'),
+        ('class', ('class',), 'string'),
+        ('category', ('category',), 'string'),
+        ('message', ('message',), 'string'),
+        ('by', ('by', 'displayName'), 'string'),
+        ('ip', ('ip',), 'string'),
+        ('created_date', ('createdDate',), 'string'),
+    ],
+    'stats': [
+        ('date', ('date',), 'string'),
+        ('path', ('path',), 'string'),
+        ('title', ('title',), 'string'),
+        ('entry_id', ('entry', 'id'), 'int64'),
+        ('pageviews', ('pageviews',), 'int64'),
+        ('visits', ('visits',), 'int64'),
+    ],
+}
+
+# Resource types without a dedicated schema keep the id and the raw item.
+_DEFAULT = [
+    ('id', ('id',), 'int64'),
+    ('json', (), 'json'),
+]
+
+
+def _arrow_type(name):
+    return {
+        'int64': pyarrow.int64(),
+        'string': pyarrow.string(),
+        'json': pyarrow.string(),
+        'list<string>': pyarrow.list_(pyarrow.string()),
+        'list<int64>': pyarrow.list_(pyarrow.int64()),
+    }[name]
+
+
+def fields_for(resource):
+    return FIELDS.get(resource, _DEFAULT)
+
+
+def schema_for(resource):
+    return pyarrow.schema([(name, _arrow_type(type_)) for name, _, type_ in fields_for(resource)])
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_string(value):
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def _extract(item, path):
+    value = item
+    for i, key in enumerate(path):
+        if key == '*':
+            if not isinstance(value, list):
+                return None
+            return [_extract(v, path[i + 1:]) for v in value]
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _convert(value, type_):
+    if type_ == 'int64':
+        return _to_int(value)
+    if type_ == 'string':
+        return _to_string(value)
+    if type_ == 'json':
+        return json.dumps(value, ensure_ascii=False)
+    if not isinstance(value, list):
+        return None
+    if type_ == 'list<int64>':
+        return [_to_int(v) for v in value]
+    return [_to_string(v) for v in value]
+
+
+class ArrowSink(object):
+    def __init__(self, path, resource, format='parquet', batch_size=10000, compression='zstd'):
+        if pyarrow is None:
+            raise ImportError('ArrowSink requires pyarrow: pip install pyarrow')
+        self.path = path
+        self.resource = resource
+        self.format = format
+        self.batch_size = batch_size
+        self.fields = fields_for(resource)
+        self.schema = schema_for(resource)
+        self.rows = 0
+        self.__columns = [[] for _ in self.fields]
+        self.__pending = 0
+        if format == 'parquet':
+            self.__writer = pyarrow.parquet.ParquetWriter(path, self.schema, compression=compression)
+        elif format == 'arrow':
+            self.__writer = pyarrow.ipc.new_file(path, self.schema)
+        else:
+            raise ValueError('Unknown format: %s' % format)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def write_items(self, items):
+        for item in items:
+            for column, (_, path, type_) in zip(self.__columns, self.fields):
+                column.append(_convert(_extract(item, path), type_))
+            self.__pending += 1
+            if self.__pending >= self.batch_size:
+                self.flush()
+
+    def write_pages(self, pages):
+        for page in pages:
+            # Accept both iter_pages() tuples and plain item lists.
+            items = page[1] if isinstance(page, tuple) else page
+            self.write_items(items)
+
+    def flush(self):
+        if not self.__pending:
+            return
+        arrays = [pyarrow.array(column, type=field.type) for column, field in zip(self.__columns, self.schema)]
+        self.__writer.write_batch(pyarrow.RecordBatch.from_arrays(arrays, schema=self.schema))
+        self.rows += self.__pending
+        self.__columns = [[] for _ in self.fields]
+        self.__pending = 0
+
+    def close(self):
+        self.flush()
+        self.__writer.close()
+
+
+def export_list(list_method, *args, **kwargs):
+    path = kwargs.pop('path')
+    resource = kwargs.pop('resource')
+    format = kwargs.pop('format', 'parquet')
+    batch_size = kwargs.pop('batch_size', 10000)
+    with ArrowSink(path, resource, format, batch_size) as sink:
+        sink.write_pages(pager.iter_pages(list_method, *args, **kwargs))
+    return sink.rows
@@ -0,0 +1,146 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Six Apart, Ltd.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import base64
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+from mt_data_api.errors import DataAPIError
+from mt_data_api import pager
+import os
+import posixpath
+import requests
+import time
+import urllib.parse
+import urllib3
+
+
+class BackupFile(object):
+    def __init__(self, path, size, sha256):
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+
+
+class BackupResult(object):
+    def __init__(self, site_id):
+        self.site_id = site_id
+        self.files = []
+        self.duration = 0.0
+        self.error = None
+
+    @property
+    def bytes(self):
+        return sum(f.size for f in self.files)
+
+
+def _backup_urls(backup):
+    urls = []
+    for entry in backup.get('backupFiles') or []:
+        url = entry.get('url') if isinstance(entry, dict) else entry
+        if url:
+            urls.append(url)
+    return urls
+
+
+class BackupManager(object):
+    def __init__(self, client, output_dir, workers=4, chunk_size=1024 * 1024):
+        self.client = client
+        self.output_dir = output_dir
+        self.workers = workers
+        self.chunk_size = chunk_size
+
+    def __save(self, response, path):
+        sha256 = hashlib.sha256()
+        md5 = hashlib.md5()
+        size = 0
+        tmp_path = path + '.part'
+        try:
+            with open(tmp_path, 'wb') as f:
+                for chunk in response.iter_content(self.chunk_size):
+                    f.write(chunk)
+                    sha256.update(chunk)
+                    md5.update(chunk)
+                    size += len(chunk)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        finally:
+            response.close()
+        if response.headers.get('Content-Encoding', 'identity').lower() != 'identity':
+            # Content-Length and Content-MD5 describe the encoded bytes, but iter_content yields them decoded.
+            os.replace(tmp_path, path)
+            return BackupFile(path, size, sha256.hexdigest())
+        expected_size = response.headers.get('Content-Length')
+        if expected_size is not None and int(expected_size) != size:
+            os.remove(tmp_path)
+            raise DataAPIError({'code': '-1', 'message': '%s: expected %s bytes, received %d' % (
+                path, expected_size, size)})
+        expected_md5 = response.headers.get('Content-MD5')
+        if expected_md5 and base64.b64decode(expected_md5) != md5.digest():
+            os.remove(tmp_path)
+            raise DataAPIError({'code': '-1', 'message': '%s: Content-MD5 mismatch' % path})
+        os.replace(tmp_path, path)
+        return BackupFile(path, size, sha256.hexdigest())
+
+    def backup(self, site_id, options=None):
+        result = BackupResult(site_id)
+        started = time.monotonic()
+        site_dir = os.path.join(self.output_dir, 'site-%s' % site_id)
+        try:
+            if not os.path.isdir(site_dir):
+                os.makedirs(site_dir)
+            response = pager.call(self.client.backup_site_stream, site_id, options=options)
+            result.files.append(self.__save(response, os.path.join(site_dir, 'backup.json')))
+            with open(result.files[0].path, 'r', encoding='utf-8') as f:
+                backup = json.load(f)
+            if backup.get('error'):
+                raise DataAPIError(backup.get('error'))
+            for url in _backup_urls(backup):
+                url = urllib.parse.urljoin(self.client.api_base_url, url)
+                name = posixpath.basename(urllib.parse.urlsplit(url).path) or 'backup.dat'
+                response = pager.call(self.client.download, url)
+                result.files.append(self.__save(response, os.path.join(site_dir, name)))
+            with open(os.path.join(site_dir, 'SHA256SUMS'), 'w', encoding='utf-8') as f:
+                for backup_file in result.files:
+                    f.write('%s  %s\n' % (backup_file.sha256, os.path.basename(backup_file.path)))
+        except (DataAPIError, OSError, ValueError, requests.exceptions.RequestException,
+                urllib3.exceptions.HTTPError) as e:
+            result.error = e
+        result.duration = time.monotonic() - started
+        return result
+
+    def run(self, site_ids, options=None):
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(lambda site_id: self.backup(site_id, options), site_ids))
+
+
+def report(results):
+    lines = ['%-10s %10s %14s  %s' % ('site', 'seconds', 'bytes', 'status')]
+    for result in sorted(results, key=lambda r: r.duration, reverse=True):
+        lines.append('%-10s %10.2f %14d  %s' % (result.site_id, result.duration, result.bytes,
+                                               'error: %s' % result.error if result.error else 'ok'))
+    total_bytes = sum(r.bytes for r in results)
+    failed = sum(1 for r in results if r.error)
+    lines.append('%d sites, %d failed, %d bytes' % (len(results), failed, total_bytes))
+    return '\n'.join(lines)
@@ -0,0 +1,229 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Six Apart, Ltd.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import argparse
+from collections import deque
+from mt_data_api.arrow_sink import ArrowSink
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import gzip
+import json
+from mt_data_api.data_api import DataAPI
+from mt_data_api.errors import DataAPIError
+from mt_data_api import pager
+import os
+import sys
+import time
+
+DEFAULT_RESOURCES = 'entries,pages,assets,comments'
+
+
+def build_client(args):
+    client = DataAPI()
+    client.api_base_url = args.url
+    client.endpoint_version = args.endpoint_version
+    if args.basic_username:
+        client.basic_auth.username = args.basic_username
+        client.basic_auth.password = args.basic_password or ''
+    password = args.password or os.environ.get('MT_DATA_API_PASSWORD')
+    if args.username:
+        pager.call(client.authentication, args.username,
+                   password, remember=False)
+    return client
+
+
+class ExportUnit(object):
+    def __init__(self, site_id, resource, path, use_gzip, format='ndjson'):
+        self.site_id = site_id
+        self.resource = resource
+        self.path = path
+        self.use_gzip = use_gzip
+        self.format = format
+        self.total = None
+        self.remaining = 0
+        self.items = 0
+        self.__file = None
+
+    def write(self, items):
+        if self.format != 'ndjson':
+            if self.__file is None:
+                self.__file = ArrowSink(self.path, self.resource, self.format)
+            self.__file.write_items(items)
+            self.items += len(items)
+            return
+        if self.__file is None:
+            if self.use_gzip:
+                self.__file = gzip.open(self.path, 'wt', encoding='utf-8')
+            else:
+                self.__file = open(self.path, 'w', encoding='utf-8')
+        for item in items:
+            self.__file.write(json.dumps(item, ensure_ascii=False))
+            self.__file.write('\n')
+        self.items += len(items)
+
+    def close(self):
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+
+class Exporter(object):
+    def __init__(self, client, output_dir, resources, site_ids=None, workers=8, limit=100, use_gzip=False,
+                 format='ndjson', log=sys.stderr):
+        self.client = client
+        self.output_dir = output_dir
+        self.resources = resources
+        self.site_ids = site_ids
+        self.workers = workers
+        self.limit = limit
+        self.use_gzip = use_gzip
+        self.format = format
+        self.log = log
+        self.pages = 0
+        self.errors = 0
+
+    def __units(self):
+        site_ids = self.site_ids
+        if not site_ids:
+            site_ids = [site['id'] for site in pager.iter_items(self.client.list_sites, limit=self.limit,
+                                                                options={'fields': 'id'})]
+        if self.format != 'ndjson':
+            suffix = '.' + self.format
+        elif self.use_gzip:
+            suffix = '.ndjson.gz'
+        else:
+            suffix = '.ndjson'
+        for site_id in site_ids:
+            for resource in self.resources:
+                path = os.path.join(self.output_dir, 'site-%s-%s%s' % (site_id, resource, suffix))
+                yield ExportUnit(site_id, resource, path, self.use_gzip, self.format)
+
+    def __fetch(self, unit, offset):
+        list_method = pager.list_method_for(self.client, unit.resource)
+        options = {'limit': self.limit, 'offset': offset}
+        return pager.fetch_page(list_method, unit.site_id, options=options)
+
+    def run(self):
+        if not os.path.isdir(self.output_dir):
+            os.makedirs(self.output_dir)
+        started = time.monotonic()
+        units = []
+        tasks = deque((unit, 0) for unit in self.__units())
+        pending = {}
+        # At most two pages per worker are held in memory at any time.
+        window = self.workers * 2
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while tasks or pending:
+                while tasks and len(pending) < window:
+                    unit, offset = tasks.popleft()
+                    pending[executor.submit(self.__fetch, unit, offset)] = (unit, offset)
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    unit, offset = pending.pop(future)
+                    self.__handle(future, unit, offset, tasks, units)
+        elapsed = time.monotonic() - started
+        self.__summary(units, elapsed)
+        return self.errors == 0
+
+    def __handle(self, future, unit, offset, tasks, units):
+        try:
+            items, total = future.result()
+        except DataAPIError as e:
+            self.errors += 1
+            self.log.write('site %s %s offset %d: %s\n' % (unit.site_id, unit.resource, offset, e))
+            items, total = [], unit.total or 0
+        self.pages += 1
+        unit.write(items)
+        if unit.total is None:
+            unit.total = total
+            units.append(unit)
+            offsets = list(range(offset + self.limit, total, self.limit))
+            unit.remaining = len(offsets)
+            tasks.extend((unit, o) for o in offsets)
+        else:
+            unit.remaining -= 1
+        if unit.remaining == 0:
+            unit.close()
+
+    def __summary(self, units, elapsed):
+        items = sum(unit.items for unit in units)
+        size = sum(os.path.getsize(unit.path) for unit in units if os.path.exists(unit.path))
+        by_resource = {}
+        for unit in units:
+            by_resource[unit.resource] = by_resource.get(unit.resource, 0) + unit.items
+        for resource in self.resources:
+            self.log.write('%-12s %10d\n' % (resource, by_resource.get(resource, 0)))
+        self.log.write('%d items, %d pages, %d bytes in %.2fs (%.1f items/s, %.1f pages/s), %d errors\n' % (
+            items, self.pages, size, elapsed, items / elapsed if elapsed else 0.0,
+            self.pages / elapsed if elapsed else 0.0, self.errors))
+
+
+def export(args):
+    client = build_client(args)
+    site_ids = [s for s in args.sites.split(',') if s] if args.sites else None
+    resources = [r for r in args.resources.split(',') if r]
+    for resource in resources:
+        if resource not in pager.RESOURCES:
+            raise SystemExit('Unknown resource type: %s' % resource)
+    exporter = Exporter(client, args.output, resources, site_ids, args.workers, args.limit, args.gzip,
+                        args.format)
+    return 0 if exporter.run() else 1
+
+
+def add_connection_arguments(parser):
+    parser.add_argument('--url', required=True, help='Data API base URL, e.g. http://host/mt-data-api.cgi')
+    parser.add_argument('--endpoint-version', default='v3')
+    parser.add_argument('--username')
+    parser.add_argument('--password', help='defaults to $MT_DATA_API_PASSWORD')
+    parser.add_argument('--basic-username')
+    parser.add_argument('--basic-password')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='mt-data-api')
+    subparsers = parser.add_subparsers(dest='command')
+
+    export_parser = subparsers.add_parser('export', help='export sites to NDJSON files')
+    add_connection_arguments(export_parser)
+    export_parser.add_argument('--output', '-o', default='.', help='output directory')
+    export_parser.add_argument('--sites', help='comma separated site ids (default: all sites)')
+    export_parser.add_argument('--resources', default=DEFAULT_RESOURCES,
+                               help='comma separated resource types (default: %s)' % DEFAULT_RESOURCES)
+    export_parser.add_argument('--workers', type=int, default=8)
+    export_parser.add_argument('--limit', type=int, default=100, help='items per page')
+    export_parser.add_argument('--gzip', action='store_true')
+    export_parser.add_argument('--format', choices=['ndjson', 'parquet', 'arrow'], default='ndjson',
+                               help='parquet and arrow require pyarrow')
+    export_parser.set_defaults(func=export)
+
+    args = parser.parse_args(argv)
+    if not getattr(args, 'func', None):
+        parser.print_help()
+        return 2
+    try:
+        return args.func(args)
+    except DataAPIError as e:
+        sys.stderr.write('error: %s\n' % e)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -20,12 +20,22 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 
+import contextlib
 import json
 from mt_data_api.basic_auth import BasicAuth
+from mt_data_api.deadline import Deadline, run_cancellable
+from mt_data_api.errors import ConnectionFailed, DataAPIError
+from mt_data_api.futures import FutureDataAPI
 from mt_data_api.http_method import HTTPMethod
+from mt_data_api.json_stream import ItemStream
+from mt_data_api.node_pool import NodePool
+from mt_data_api import profiler
+from mt_data_api import rate_limiter
+from mt_data_api.transport import RequestsTransport
 import re
 import requests
-from requests.auth import HTTPBasicAuth
+import threading
+import time
 import urllib.parse
 
 
@@ -38,12 +48,58 @@ class DataAPI(object):
         self.__token = ""
         self.__session_id = ""
         self.endpoint_version = "v3"
+        self.node_pool = None
+        # /version only exists from v3 on, whatever endpoint_version the client uses.
+        self.node_check_path = '/v3/version'
         self.api_base_url = "http://localhost/cgi-bin/MT-6.1/mt-data-api.cgi"
         self.__api_version = ""
         self.client_id = "mt-data-api-sdk-python"
         self.basic_auth = BasicAuth()
+        self.transport = RequestsTransport()
+        self.timeout = None
+        self.profiler = profiler.default_profiler()
+        self.write_listeners = []
+        self.__local = threading.local()
+        self.executor = None
+        self.callback_executor = None
+        self.__futures = None
+
+    @property
+    def api_base_url(self):
+        return self.__api_base_url
+
+    @api_base_url.setter
+    def api_base_url(self, url):
+        # A list of equivalent base URLs routes each request through a NodePool.
+        if self.node_pool is not None:
+            self.node_pool.close()
+            self.node_pool = None
+        if isinstance(url, (list, tuple)):
+            self.node_pool = NodePool(url, check=self.__check_node)
+            url = url[0]
+        self.__api_base_url = url
+
+    def __check_node(self, base_url, timeout):
+        auth = None
+        if self.basic_auth.is_set():
+            auth = (self.basic_auth.username, self.basic_auth.password)
+        # Caching transports must not answer a health check for a node that is down.
+        response = self.transport.request(HTTPMethod.GET, base_url + self.node_check_path,
+                                          auth=auth, headers={'Cache-Control': 'no-cache'}, timeout=timeout)
+        if response.status_code != requests.codes.ok:
+            raise DataAPIError({'code': str(response.status_code), 'message': 'Health check failed.'})
+
+    def node_stats(self):
+        if self.node_pool is None:
+            return {}
+        return self.node_pool.stats()
 
     def __api_url(self):
+        if self.profiler:
+            started = time.perf_counter()
+            url = self.api_base_url + '/' + self.endpoint_version
+            self.profiler.add_pending(time.perf_counter() - started)
+            return url
         return self.api_base_url + '/' + self.endpoint_version
 
     def __api_url_v2(self):
@@ -61,11 +117,77 @@ class DataAPI(object):
     def __error_json(cls):
         return {'code': '-1', 'message': "The operation couldn't be completed."}
 
+    def futures(self):
+        futures = self.__futures
+        # Rebuilt when executor or callback_executor has been replaced since the last call.
+        if not futures or (self.executor and futures.executor is not self.executor) or \
+                (self.callback_executor and futures.callback_executor is not self.callback_executor):
+            self.__futures = FutureDataAPI(
+                self, self.executor, self.callback_executor)
+        return self.__futures
+
+    def add_write_listener(self, listener):
+        self.write_listeners.append(listener)
+
+    def remove_write_listener(self, listener):
+        if listener in self.write_listeners:
+            self.write_listeners.remove(listener)
+
+    def __notify_write(self, method, url, params, json_response):
+        for listener in list(self.write_listeners):
+            listener(method, url, params or {}, json_response)
+
+    def current_call_options(self):
+        return dict(getattr(self.__local, 'options', {}))
+
+    @contextlib.contextmanager
+    def call_options(self, **options):
+        previous = getattr(self.__local, 'options', {})
+        merged = dict(previous)
+        deadline = options.pop('deadline', None)
+        if deadline is not None:
+            if not isinstance(deadline, Deadline):
+                deadline = Deadline(deadline)
+            if 'deadline' not in previous or deadline.expires < previous['deadline'].expires:
+                merged['deadline'] = deadline
+        merged.update(options)
+        self.__local.options = merged
+        try:
+            yield
+        finally:
+            self.__local.options = previous
+
+    def session_state(self):
+        return {
+            'api_base_url': list(self.node_pool.urls) if self.node_pool else self.api_base_url,
+            'endpoint_version': self.endpoint_version,
+            'client_id': self.client_id,
+            'token': self.__token,
+            'session_id': self.__session_id,
+            'basic_auth': (self.basic_auth.username, self.basic_auth.password),
+            'timeout': self.timeout,
+        }
+
+    def restore_session(self, state):
+        self.api_base_url = state['api_base_url']
+        self.endpoint_version = state['endpoint_version']
+        self.client_id = state['client_id']
+        self.__token = state['token']
+        self.__session_id = state['session_id']
+        self.basic_auth.username, self.basic_auth.password = state['basic_auth']
+        self.timeout = state['timeout']
+
     def reset_auth(self):
         self.__token = ''
         self.__session_id = ''
 
-    def __send_request(self, method, url, params=None, use_session=False, success=stub_callback, failure=stub_callback):
+    def __throttle(self, send, base_url=None, method=None, url=None):
+        limiter = (base_url and rate_limiter.get(base_url)) or rate_limiter.get(self.api_base_url)
+        if limiter:
+            return limiter.call(send, self.__endpoint(method, url) if method else None)
+        return send()
+
+    def __request(self, method, url, params=None, files=None, use_session=False, stream=False):
         headers = {}
         if self.__token:
             headers['X-MT-Authorization'] = 'MTAuth accessToken=' + self.__token
@@ -75,25 +197,72 @@ class DataAPI(object):
 
         auth = None
         if self.basic_auth.is_set():
-            auth = HTTPBasicAuth(self.basic_auth.username,
-                                 self.basic_auth.password)
-
-        response = None
-        if method == HTTPMethod.GET:
-            response = requests.get(url, params, auth=auth, headers=headers)
-        elif method == HTTPMethod.POST:
-            response = requests.post(url, params, auth=auth, headers=headers)
-        elif method == HTTPMethod.PUT:
-            response = requests.put(url, params, auth=auth, headers=headers)
-        elif method == HTTPMethod.DELETE:
-            response = requests.delete(url, auth=auth, headers=headers)
-
-        if response and response.status_code == requests.codes.ok:
+            auth = (self.basic_auth.username, self.basic_auth.password)
+
+        options = getattr(self.__local, 'options', {})
+        timeout = options.get('timeout', self.timeout)
+        deadline = options.get('deadline')
+        if deadline:
+            deadline.check()
+            timeout = deadline.cap(timeout)
+
+        def send_to(target, base_url=None):
+            return self.__throttle(lambda: self.transport.request(
+                method, target, params, files=files, auth=auth, headers=headers, stream=stream, timeout=timeout),
+                base_url, method, url)
+
+        def send():
+            if self.node_pool is None or not url.startswith(self.api_base_url):
+                return send_to(url)
+            return self.__send_to_nodes(method, url, files, send_to)
+        cancel = options.get('cancel')
+        if self.profiler:
+            with self.profiler.phase(self.__endpoint(method, url), 'network'):
+                return run_cancellable(send, cancel) if cancel else send()
+        if cancel:
+            return run_cancellable(send, cancel)
+        return send()
+
+    def __send_to_nodes(self, method, url, files, send_to):
+        # Only idempotent requests are retried on another node after a connection failure.
+        path = url[len(self.api_base_url):]
+        idempotent = method != HTTPMethod.POST and not files
+        nodes = self.node_pool.route()
+        for index, node in enumerate(nodes):
+            started = time.perf_counter()
+            try:
+                response = send_to(node + path, node)
+            except ConnectionFailed as e:
+                self.node_pool.record_failure(node, e)
+                if not idempotent or index == len(nodes) - 1:
+                    raise
+                continue
+            self.node_pool.record(node, time.perf_counter() - started, response.status_code < 500)
+            return response
+
+    def __endpoint(self, method, url):
+        return profiler.endpoint_name(method, url, self.api_base_url)
+
+    def __send_request(self, method, url, params=None, use_session=False, stream=False, success=stub_callback,
+                       failure=stub_callback):
+        response = self.__request(method, url, params, use_session=use_session, stream=stream)
+        if response is not None and response.status_code == requests.codes.ok:
+            if self.profiler:
+                endpoint = self.__endpoint(method, url)
+                with self.profiler.phase(endpoint, 'callback'):
+                    success(profiler.ProfiledResponse(response, self.profiler, endpoint))
+                return
             success(response)
         else:
+            if response is not None and stream:
+                response.close()
             failure(self.__class__.__error_json())
 
     def __fetch_list(self, url, params, success, failure):
+        if getattr(self.__local, 'options', {}).get('stream_items'):
+            self.__stream_list(url, params, success, failure)
+            return
+
         def override_success(response):
             json_response = response.json()
             if json_response.get('error'):
@@ -104,12 +273,26 @@ class DataAPI(object):
         self.__send_request(HTTPMethod.GET, url, params,
                             success=override_success, failure=failure)
 
+    def __stream_list(self, url, params, success, failure):
+        def override_success(response):
+            items = ItemStream(response.iter_content(65536), release=response.close)
+            if not items.start():
+                items.close()
+                error = items.document.get('error')
+                failure(error if error else self.__class__.__error_json())
+                return
+            success(items, items.total_results)
+        self.__send_request(HTTPMethod.GET, url, params, stream=True,
+                            success=override_success, failure=failure)
+
     def __action_common(self, action, url, params=None, success=stub_callback, failure=stub_callback):
         def override_success(response):
             json_response = response.json()
             if json_response.get('error'):
                 failure(json_response.get('error'))
                 return
+            if action != HTTPMethod.GET and self.write_listeners:
+                self.__notify_write(action, url, params, json_response)
             success(json_response)
         self.__send_request(action, url, params,
                             success=override_success, failure=failure)
@@ -117,7 +300,10 @@ class DataAPI(object):
     def __action(self, name, action, url, object_=None, options=None, success=stub_callback, failure=stub_callback):
         if not options:
             options = {}
-        if object_:
+        if object_ and self.profiler:
+            with self.profiler.phase(self.__endpoint(action, url), 'serialize'):
+                options[name] = json.dumps(object_)
+        elif object_:
             options[name] = json.dumps(object_)
         self.__action_common(action, url, options, success, failure)
 
@@ -133,41 +319,38 @@ class DataAPI(object):
     def __delete(self, url, params=None, success=stub_callback, failure=stub_callback):
         self.__action_common(HTTPMethod.DELETE, url, params, success, failure)
 
-    def __repeat_action(self, action, url, options=None, success=stub_callback, failure=stub_callback):
+    def __repeat_action(self, action, url, options=None, success=stub_callback, failure=stub_callback, phase=1):
         def override_success(response):
             json_response = response.json()
             if json_response.get('error'):
                 failure(json_response.get('error'))
                 return
-            if json_response.get('status', '') == 'Complete' or json_response.get('restIds'):
+            progress = getattr(self.__local, 'options', {}).get('progress')
+            if progress:
+                progress(phase, json_response)
+            if json_response.get('status', '') == 'Complete' or not json_response.get('restIds'):
                 success(response)
             else:
                 next_url = response.headers.get('X-MT-Next-Phase-URL')
                 if next_url:
                     next_url = self.__api_url() + '/' + next_url
                     self.__repeat_action(
-                        action, next_url, options, success, failure)
+                        action, next_url, options, success, failure, phase + 1)
                 else:
-                    failure(self.__error_json)
+                    failure(self.__class__.__error_json())
         self.__send_request(action, url, options,
                             success=override_success, failure=failure)
 
     def __upload(self, data, file_name, url, params=None, success=stub_callback, failure=stub_callback):
-        headers = {}
-        if self.__token:
-            headers['X-MT-Authorization'] = 'MTAuth accessToken=' + self.__token
         files = {'file': (file_name, data)}
-        auth = None
-        if self.basic_auth.is_set():
-            auth = HTTPBasicAuth(self.basic_auth.username,
-                                 self.basic_auth.password)
-        response = requests.post(
-            url, params, files=files, auth=auth, headers=headers)
+        response = self.__request(HTTPMethod.POST, url, params, files=files)
         if response and response.status_code == requests.codes.ok:
             json_response = response.json()
             if json_response.get('error'):
                 failure(json_response.get('error'))
                 return
+            if self.write_listeners:
+                self.__notify_write(HTTPMethod.POST, url, params, json_response)
             success(json_response)
         else:
             failure(self.__class__.__error_json())
@@ -298,6 +481,15 @@ class DataAPI(object):
         url = self.__api_url() + '/sites/%s/backup' % site_id
         self.__get(url, options, success, failure)
 
+    def backup_site_stream(self, site_id, options=None, success=stub_callback, failure=stub_callback):
+        url = self.__api_url() + '/sites/%s/backup' % site_id
+        self.__send_request(HTTPMethod.GET, url, options, stream=True,
+                            success=success, failure=failure)
+
+    def download(self, url, options=None, success=stub_callback, failure=stub_callback):
+        self.__send_request(HTTPMethod.GET, url, options, stream=True,
+                            success=success, failure=failure)
+
     # MARK: - Blog
     def list_blogs_for_user(self, user_id, options=None, success=stub_callback, failure=stub_callback):
         url = self.__api_url() + '/users/%s/sites' % user_id
@@ -388,7 +580,7 @@ class DataAPI(object):
         url = self.__api_url() + '/publish/entries'
         if not options:
             options = {}
-        options['ids'] = entry_ids.join(',')
+        options['ids'] = entry_ids if isinstance(entry_ids, str) else ','.join(str(i) for i in entry_ids)
         self.__repeat_action(HTTPMethod.GET, url, options, success, failure)
 
     def __import_entries_with_file(self, site_id, import_data, options=None, success=stub_callback,
@@ -665,7 +857,7 @@ class DataAPI(object):
                               failure=stub_callback):
         url = self.__api_url()
         if site_id:
-            url += '/sites/%s/assets/upload'
+            url += '/sites/%s/assets/upload' % site_id
         else:
             url += '/assets/upload'
         self.__upload(asset_data, file_name, url, options, success, failure)
@@ -780,12 +972,12 @@ class DataAPI(object):
     def create_reply_comment_for_entry(self, site_id, entry_id, comment_id, reply, options=None, success=stub_callback,
                                        failure=stub_callback):
         self.__create_reply_comment_for_object(
-            site_id, entry_id, comment_id, reply, options, success, failure)
+            'entries', site_id, entry_id, comment_id, reply, options, success, failure)
 
     def create_reply_comment_for_page(self, site_id, page_id, comment_id, reply, options=None, success=stub_callback,
                                       failure=stub_callback):
         self.__create_reply_comment_for_object(
-            site_id, page_id, comment_id, reply, options, success, failure)
+            'pages', site_id, page_id, comment_id, reply, options, success, failure)
 
     # MARK: - Trackback
     def list_trackbacks(self, site_id, options=None, success=stub_callback, failure=stub_callback):
@@ -1094,10 +1286,10 @@ class DataAPI(object):
         params = {'site_id': site_id, 'role_id': role_id}
         self.__post(url, params, success, failure)
 
-    def revoke_permission_from_site(self, site_id, user_id, role_id, success=stub_callback, failiure=stub_callback):
+    def revoke_permission_from_site(self, site_id, user_id, role_id, success=stub_callback, failure=stub_callback):
         url = self.__api_url() + '/sites/%s/permissions/revoke' % site_id
         params = {'user_id': user_id, 'role_id': role_id}
-        self.__post(url, params, success, failiure)
+        self.__post(url, params, success, failure)
 
     def revoke_permission_from_user(self, user_id, site_id, role_id, success=stub_callback, failure=stub_callback):
         url = self.__api_url() + '/users/%s/permissions/revoke' % user_id
@@ -0,0 +1,109 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Six Apart, Ltd.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from mt_data_api.errors import Cancelled, DeadlineExceeded
+import threading
+import time
+
+
+class Deadline(object):
+    def __init__(self, seconds):
+        self.expires = time.monotonic() + seconds
+
+    def remaining(self):
+        return self.expires - time.monotonic()
+
+    def check(self):
+        if self.remaining() <= 0:
+            raise DeadlineExceeded()
+
+    def cap(self, timeout):
+        remaining = max(self.remaining(), 0.001)
+        if timeout is None:
+            return remaining
+        if isinstance(timeout, tuple):
+            return tuple(remaining if t is None else min(t, remaining) for t in timeout)
+        return min(timeout, remaining)
+
+
+class CancelToken(object):
+    def __init__(self):
+        self.__event = threading.Event()
+        self.__callbacks = []
+        self.__lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self.__event.is_set()
+
+    def cancel(self):
+        with self.__lock:
+            self.__event.set()
+            callbacks, self.__callbacks = self.__callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def check(self):
+        if self.cancelled:
+            raise Cancelled()
+
+    def add_callback(self, callback):
+        with self.__lock:
+            if not self.__event.is_set():
+                self.__callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback):
+        with self.__lock:
+            if callback in self.__callbacks:
+                self.__callbacks.remove(callback)
+
+
+def run_cancellable(send, cancel):
+    # The request runs on its own thread so that cancel() releases the caller
+    # immediately; the abandoned request still ends within its timeout.
+    cancel.check()
+    done = threading.Event()
+    outcome = {}
+
+    def target():
+        try:
+            outcome['response'] = send()
+        except BaseException as e:
+            outcome['error'] = e
+        finally:
+            done.set()
+        if cancel.cancelled and outcome.get('response') is not None:
+            outcome['response'].close()
+
+    cancel.add_callback(done.set)
+    threading.Thread(target=target, daemon=True).start()
+    done.wait()
+    cancel.remove_callback(done.set)
+    if cancel.cancelled:
+        if outcome.get('response') is not None:
+            outcome['response'].close()
+        raise Cancelled()
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['response']
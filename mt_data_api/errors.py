@@ -0,0 +1,48 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Six Apart, Ltd.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+
+class DataAPIError(Exception):
+    def __init__(self, error):
+        self.error = error
+        message = error.get('message') if isinstance(error, dict) else error
+        super(DataAPIError, self).__init__(message)
+
+
+class RequestTimeout(DataAPIError):
+    def __init__(self, message='The request timed out.'):
+        super(RequestTimeout, self).__init__({'code': '-1', 'message': message})
+
+
+class DeadlineExceeded(DataAPIError):
+    def __init__(self, message='The deadline for the operation was exceeded.'):
+        super(DeadlineExceeded, self).__init__({'code': '-1', 'message': message})
+
+
+class Cancelled(DataAPIError):
+    def __init__(self, message='The operation was cancelled.'):
+        super(Cancelled, self).__init__({'code': '-1', 'message': message})
+
+
+class ConnectionFailed(DataAPIError):
+    def __init__(self, message='The connection to the server failed.'):
+        super(ConnectionFailed, self).__init__({'code': '-1', 'message': message})
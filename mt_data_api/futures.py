@@ -0,0 +1,126 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Six Apart, Ltd.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from concurrent.futures import Future, ThreadPoolExecutor
+import concurrent.futures
+from mt_data_api.errors import DataAPIError
+import inspect
+
+
+def _result_of(values):
+    if not values:
+        return None
+    if len(values) == 1:
+        return values[0]
+    return values
+
+
+class FutureDataAPI(object):
+    def __init__(self, client, executor=None, callback_executor=None, max_workers=8):
+        self.client = client
+        self.executor = executor or ThreadPoolExecutor(max_workers)
+        self.callback_executor = callback_executor or ThreadPoolExecutor(1)
+        self.__takes_callbacks = {}
+
+    def __getattr__(self, name):
+        # Only API calls, which report through success/failure, are wrapped; helpers such as reset_auth or
+        # call_options are returned as they are.
+        method = getattr(self.client, name)
+        if name.startswith('_') or not callable(method):
+            return method
+        takes_callbacks = self.__takes_callbacks.get(name)
+        if takes_callbacks is None:
+            try:
+                parameters = inspect.signature(method).parameters
+            except (TypeError, ValueError):
+                parameters = {}
+            takes_callbacks = self.__takes_callbacks[name] = 'success' in parameters and 'failure' in parameters
+        if not takes_callbacks:
+            return method
+
+        def submit(*args, **kwargs):
+            return self.submit(method, *args, **kwargs)
+        return submit
+
+    def submit(self, method, *args, **kwargs):
+        success = kwargs.pop('success', None)
+        failure = kwargs.pop('failure', None)
+        future = Future()
+        # Per-call options are thread local; carry the submitter's over to the worker.
+        call_options = self.client.current_call_options()
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            with self.client.call_options(**call_options):
+                self.__run(future, method, args, kwargs, success, failure)
+        self.executor.submit(run)
+        return future
+
+    def __run(self, future, method, args, kwargs, success, failure):
+        outcome = []
+
+        def on_success(*values):
+            outcome.append((True, values))
+
+        def on_failure(error):
+            outcome.append((False, error))
+        try:
+            method(*args, success=on_success, failure=on_failure, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            return
+        if not outcome:
+            future.set_result(None)
+        elif outcome[0][0]:
+            values = outcome[0][1]
+            future.set_result(_result_of(values))
+            if success:
+                self.callback_executor.submit(success, *values)
+        else:
+            error = outcome[0][1]
+            future.set_exception(DataAPIError(error))
+            if failure:
+                self.callback_executor.submit(failure, error)
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait)
+        self.callback_executor.shutdown(wait)
+
+
+def as_completed(futures, timeout=None):
+    return concurrent.futures.as_completed(futures, timeout)
+
+
+def gather(futures, timeout=None, return_exceptions=False):
+    futures = list(futures)
+    concurrent.futures.wait(futures, timeout)
+    results = []
+    for future in futures:
+        if return_exceptions:
+            try:
+                results.append(future.result(0))
+            except Exception as e:
+                results.append(e)
+        else:
+            results.append(future.result(0))
+    return results
@@ -0,0 +1,130 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Six Apart, Ltd.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from mt_data_api.checkpoint import Checkpoint
+from mt_data_api.errors import DataAPIError
+from mt_data_api import pager
+import os
+
+ENTRY_SEPARATOR = b'--------'
+
+
+def iter_chunks(path, max_bytes):
+    chunk = []
+    chunk_size = 0
+    entry = []
+    entry_size = 0
+    index = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            entry.append(line)
+            entry_size += len(line)
+            if line.rstrip(b'\r\n') != ENTRY_SEPARATOR:
+                continue
+            if chunk and chunk_size + entry_size > max_bytes:
+                yield index, b''.join(chunk)
+                index += 1
+                chunk, chunk_size = [], 0
+            chunk.extend(entry)
+            chunk_size += entry_size
+            entry, entry_size = [], 0
+    if entry and b''.join(entry).strip():
+        if chunk and chunk_size + entry_size > max_bytes:
+            yield index, b''.join(chunk)
+            index += 1
+            chunk = []
+        chunk.extend(entry)
+    if chunk:
+        yield index, b''.join(chunk)
+
+
+class ChunkedImporter(object):
+    def __init__(self, client, site_id, path, checkpoint_path=None, chunk_size=8 * 1024 * 1024, workers=2,
+                 options=None):
+        self.client = client
+        self.site_id = site_id
+        self.path = path
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.options = options
+        self.checkpoint = Checkpoint(checkpoint_path or path + '.checkpoint')
+        self.uploaded = 0
+        self.skipped = 0
+        self.failed = {}
+
+    def __source(self):
+        stat = os.stat(self.path)
+        return {'size': stat.st_size, 'mtime': stat.st_mtime, 'chunk_size': self.chunk_size}
+
+    def __upload(self, index, data):
+        pager.call(self.client.import_entries, self.site_id,
+                   import_data=data, options=dict(self.options or {}))
+        return index
+
+    def __prepare_checkpoint(self):
+        state = self.checkpoint.state
+        if state and state.get('source') != self.__source():
+            raise ValueError('%s has changed since the checkpoint %s was written' %
+                             (self.path, self.checkpoint.path))
+        if not state:
+            state.update({'source': self.__source(), 'done': [], 'complete': False})
+            self.checkpoint.save()
+        return set(state['done'])
+
+    def __mark_done(self, index):
+        with self.checkpoint.lock:
+            self.checkpoint.state['done'].append(index)
+            self.checkpoint.save()
+
+    def run(self):
+        done = self.__prepare_checkpoint()
+        pending = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for index, data in iter_chunks(self.path, self.chunk_size):
+                if index in done:
+                    self.skipped += 1
+                    continue
+                # Keep reading the file only as fast as chunks are uploaded.
+                while len(pending) >= self.workers:
+                    self.__collect(pending)
+                pending[executor.submit(self.__upload, index, data)] = index
+            while pending:
+                self.__collect(pending)
+        if self.failed:
+            raise DataAPIError({'code': '-1', 'message': 'Failed to import chunks %s of %s' % (
+                ', '.join(str(i) for i in sorted(self.failed)), self.path), 'chunks': self.failed})
+        self.checkpoint.state['complete'] = True
+        self.checkpoint.save()
+        return self.uploaded
+
+    def __collect(self, pending):
+        completed, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in completed:
+            index = pending.pop(future)
+            try:
+                future.result()
+            except DataAPIError as e:
+                self.failed[index] = e.error
+                continue
+            self.uploaded += 1
+            self.__mark_done(index)
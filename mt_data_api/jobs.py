@@ -0,0 +1,108 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Six Apart, Ltd.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from mt_data_api.checkpoint import Checkpoint
+from mt_data_api import pager
+import time
+
+
+class CrawlJob(object):
+    def __init__(self, client, checkpoint_path, resources=('entries',), site_ids=None, limit=100, interval=0.0,
+                 options=None):
+        self.client = client
+        self.checkpoint = Checkpoint(checkpoint_path)
+        self.resources = list(resources)
+        self.site_ids = site_ids
+        self.limit = limit
+        self.interval = interval
+        self.options = options
+        self.items = 0
+        self.pages = 0
+        self.__saved = 0.0
+
+    def __sites(self):
+        state = self.checkpoint.state
+        if 'sites' not in state:
+            # The site list is fixed on the first run so that a restart walks the same units.
+            site_ids = self.site_ids
+            if not site_ids:
+                site_ids = [site['id'] for site in pager.iter_items(self.client.list_sites, limit=self.limit,
+                                                                    options={'fields': 'id'})]
+            state['sites'] = list(site_ids)
+            state['completed'] = []
+            state['current'] = None
+            self.__save()
+        return state['sites']
+
+    def __save(self):
+        self.checkpoint.save()
+        self.__saved = time.monotonic()
+
+    def __maybe_save(self):
+        if time.monotonic() - self.__saved >= self.interval:
+            self.__save()
+
+    def run(self, handler):
+        state = self.checkpoint.state
+        try:
+            for site_id in self.__sites():
+                for resource in self.resources:
+                    key = '%s/%s' % (site_id, resource)
+                    if key in state['completed']:
+                        continue
+                    self.__crawl(site_id, resource, handler)
+                    state['completed'].append(key)
+                    state['current'] = None
+                    self.__save()
+        finally:
+            self.__save()
+        return self.items
+
+    def __crawl(self, site_id, resource, handler):
+        state = self.checkpoint.state
+        current = state.get('current') or {}
+        offset = 0
+        last_id = None
+        if current.get('site_id') == site_id and current.get('resource') == resource:
+            offset = current.get('offset', 0)
+            last_id = current.get('last_id')
+        list_method = pager.list_method_for(self.client, resource)
+        for page_offset, items, _ in pager.iter_pages(list_method, site_id, options=self.options,
+                                                      limit=self.limit, offset=offset):
+            next_offset = page_offset + len(items)
+            if last_id is not None:
+                # Rows inserted since the checkpoint shift offsets; drop anything already handled.
+                ids = [item.get('id') for item in items]
+                if last_id in ids:
+                    items = items[ids.index(last_id) + 1:]
+                last_id = None
+            if items:
+                handler(site_id, resource, items)
+                self.items += len(items)
+            self.pages += 1
+            state['current'] = {
+                'site_id': site_id,
+                'resource': resource,
+                'offset': next_offset,
+                'last_id': items[-1].get('id') if items else current.get('last_id'),
+            }
+            self.__maybe_save()
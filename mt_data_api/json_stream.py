@@ -0,0 +1,248 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Six Apart, Ltd.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import codecs
+import json
+import re
+
+_STRUCTURE = re.compile(r'["\[\]{}]')
+_STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.S)
+_SPACE = re.compile(r'[\s,]*')
+_SCALAR_END = re.compile(r'[\s,\]]')
+_NOT_SPACE = re.compile(r'\S')
+
+
+class _NeedMore(Exception):
+    pass
+
+
+def _string_end(buffer, pos):
+    # pos is just past the opening quote, or where a previous search stopped.
+    while True:
+        end = buffer.find('"', pos)
+        if end < 0:
+            return None
+        backslashes = 0
+        while buffer[end - 1 - backslashes] == '\\':
+            backslashes += 1
+        if backslashes % 2 == 0:
+            return end + 1
+        pos = end + 1
+
+
+class ItemStream(object):
+    def __init__(self, chunks, key='items', release=None):
+        self.key = key
+        self.__chunks = iter(chunks)
+        self.__release = release
+        self.__decoder = codecs.getincrementaldecoder('utf-8')()
+        self.__buffer = ''
+        self.__eof = False
+        self.__prefix = None
+        self.__document = None
+        self.__started = False
+        self.__scan = None
+        self.__finished = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def close(self):
+        if self.__release:
+            self.__release()
+            self.__release = None
+
+    def __more(self):
+        if self.__eof:
+            return False
+        chunk = next(self.__chunks, None)
+        if chunk is None:
+            self.__buffer += self.__decoder.decode(b'', True)
+            self.__eof = True
+            return False
+        self.__buffer += self.__decoder.decode(chunk)
+        return True
+
+    @property
+    def document(self):
+        # Every top-level member except the streamed array, once it is known.
+        return self.__document
+
+    @property
+    def total_results(self):
+        if self.__document is None:
+            return None
+        return self.__document.get('totalResults')
+
+    def start(self):
+        # Reads up to the opening bracket of the array. Returns False when the
+        # response has no such array (e.g. an error document).
+        if self.__started:
+            return self.__prefix is not None
+        self.__started = True
+        pos = 0
+        depth = 0
+        while True:
+            match = _STRUCTURE.search(self.__buffer, pos)
+            if match is None:
+                pos = len(self.__buffer)
+                if not self.__more():
+                    break
+                continue
+            char = match.group()
+            if char != '"':
+                depth += 1 if char in '[{' else -1
+                pos = match.end()
+                continue
+            string = _STRING.match(self.__buffer, match.start())
+            if string is None:
+                pos = match.start()
+                if not self.__more():
+                    break
+                continue
+            pos = string.end()
+            if depth != 1 or string.group() != json.dumps(self.key):
+                continue
+            found = self.__array_start(pos)
+            if found is None:
+                break
+            if found:
+                self.__prefix = self.__buffer[:pos] + ':'
+                self.__buffer = self.__buffer[found:]
+                try:
+                    self.__document = json.loads(self.__prefix + 'null}')
+                except ValueError:
+                    self.__document = {}
+                return True
+        self.__document = json.loads(self.__buffer) if self.__buffer.strip() else {}
+        return False
+
+    def __array_start(self, pos):
+        # The string is the key only when a colon follows it; the member is streamed when its value is an array.
+        expected = ':'
+        while True:
+            match = _NOT_SPACE.search(self.__buffer, pos)
+            if match is None:
+                pos = len(self.__buffer)
+                if not self.__more():
+                    return None
+                continue
+            if expected == ':':
+                if match.group() != ':':
+                    return False
+                expected, pos = '[', match.end()
+                continue
+            return match.end() if match.group() == '[' else False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.__finished:
+            raise StopIteration
+        try:
+            if not self.start():
+                item = _END
+            else:
+                item = self.__next_item()
+                if item is _END:
+                    self.__finish()
+        except BaseException:
+            self.__finished = True
+            self.close()
+            raise
+        if item is _END:
+            self.__finished = True
+            self.close()
+            raise StopIteration
+        return item
+
+    def __next_item(self):
+        while True:
+            try:
+                return self.__parse_item()
+            except _NeedMore:
+                if not self.__more():
+                    raise ValueError('Unexpected end of JSON document')
+
+    def __parse_item(self):
+        buffer = self.__buffer
+        if self.__scan:
+            # Resume a partially received item where the previous scan stopped.
+            start, pos, depth = self.__scan
+        else:
+            start = _SPACE.match(buffer).end()
+            if start >= len(buffer):
+                raise _NeedMore()
+            char = buffer[start]
+            if char == ']':
+                self.__buffer = buffer[start + 1:]
+                return _END
+            if char == '"':
+                end = _string_end(buffer, start + 1)
+                if end is None:
+                    raise _NeedMore()
+                self.__buffer = buffer[end:]
+                return json.loads(buffer[start:end])
+            if char not in '[{':
+                end = _SCALAR_END.search(buffer, start)
+                if end is None:
+                    raise _NeedMore()
+                self.__buffer = buffer[end.start():]
+                return json.loads(buffer[start:end.start()])
+            pos, depth = start, 0
+        while True:
+            if depth < 0:
+                # Inside a string: depth is stored as -1 - (enclosing depth).
+                end = _string_end(buffer, pos)
+                if end is None:
+                    self.__scan = (start, len(buffer), depth)
+                    raise _NeedMore()
+                pos, depth = end, -1 - depth
+                continue
+            match = _STRUCTURE.search(buffer, pos)
+            if match is None:
+                self.__scan = (start, len(buffer), depth)
+                raise _NeedMore()
+            char = match.group()
+            if char == '"':
+                pos, depth = match.end(), -1 - depth
+                continue
+            depth += 1 if char in '[{' else -1
+            pos = match.end()
+            if depth == 0:
+                self.__scan = None
+                self.__buffer = buffer[pos:]
+                return json.loads(buffer[start:pos])
+
+    def __finish(self):
+        while self.__more():
+            pass
+        document = json.loads(self.__prefix + 'null' + self.__buffer)
+        document[self.key] = None
+        self.__document = document
+
+
+_END = object()
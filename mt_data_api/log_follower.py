@@ -0,0 +1,136 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Six Apart, Ltd.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import heapq
+from mt_data_api.checkpoint import Checkpoint
+from mt_data_api.errors import DataAPIError
+from mt_data_api import pager
+import threading
+import time
+
+
+def _log_id(log):
+    return int(log.get('id') or 0)
+
+
+class LogFollower(object):
+    def __init__(self, client, site_ids, checkpoint_path=None, min_interval=1.0, max_interval=60.0,
+                 backoff=2.0, limit=10, max_limit=100, options=None, from_start=False):
+        self.client = client
+        self.site_ids = list(site_ids)
+        self.checkpoint = Checkpoint(checkpoint_path) if checkpoint_path else None
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.limit = limit
+        self.max_limit = max_limit
+        self.options = dict(options or {})
+        self.from_start = from_start
+        self.cursors = dict((str(k), v) for k, v in ((self.checkpoint.state if self.checkpoint else {})
+                                                     .get('cursors') or {}).items())
+        self.intervals = dict((str(site_id), min_interval) for site_id in self.site_ids)
+        self.errors = {}
+
+    def save(self):
+        if self.checkpoint:
+            with self.checkpoint.lock:
+                self.checkpoint.state['cursors'] = dict(self.cursors)
+                self.checkpoint.save()
+
+    def poll(self, site_id):
+        # Newest first, page by page, until the page reaches the cursor; returned oldest first.
+        # The cursor does not move until the logs are passed to commit().
+        key = str(site_id)
+        last_id = self.cursors.get(key)
+        if last_id is None and not self.from_start:
+            options = dict(self.options, sortBy='id', sortOrder='descend', limit=1, offset=0)
+            items, _ = pager.fetch_page(self.client.list_logs, site_id, options=options)
+            self.cursors[key] = _log_id(items[0]) if items else 0
+            self.save()
+            return []
+        last_id = last_id or 0
+        logs = []
+        seen = set()
+        offset = 0
+        limit = self.limit
+        while True:
+            options = dict(self.options, sortBy='id', sortOrder='descend', limit=limit, offset=offset)
+            items, total = pager.fetch_page(self.client.list_logs, site_id, options=options)
+            reached = False
+            for log in items:
+                log_id = _log_id(log)
+                if log_id <= last_id:
+                    reached = True
+                    break
+                if log_id not in seen:
+                    seen.add(log_id)
+                    logs.append(log)
+            offset += len(items)
+            if reached or not items or offset >= total:
+                break
+            limit = min(limit * 2, self.max_limit)
+        logs.sort(key=_log_id)
+        return logs
+
+    def commit(self, site_id, log):
+        key = str(site_id)
+        self.cursors[key] = max(self.cursors.get(key) or 0, _log_id(log))
+
+    def __adjust(self, key, count):
+        interval = self.intervals.get(key, self.min_interval)
+        if count:
+            interval = max(self.min_interval, interval / self.backoff)
+        else:
+            interval = min(self.max_interval, interval * self.backoff)
+        self.intervals[key] = interval
+        return interval
+
+    def follow(self, stop=None):
+        stop = stop or threading.Event()
+        now = time.monotonic()
+        schedule = [(now, index, site_id) for index, site_id in enumerate(self.site_ids)]
+        heapq.heapify(schedule)
+        while schedule and not stop.is_set():
+            due, index, site_id = heapq.heappop(schedule)
+            delay = due - time.monotonic()
+            if delay > 0 and stop.wait(delay):
+                return
+            key = str(site_id)
+            try:
+                logs = self.poll(site_id)
+                self.errors.pop(key, None)
+            except DataAPIError as e:
+                self.errors[key] = e.error
+                logs = []
+            try:
+                for log in logs:
+                    yield site_id, log
+                    # Reached only once the consumer asks for the next log, so delivery is at least once.
+                    self.commit(site_id, log)
+            finally:
+                if logs:
+                    self.save()
+            heapq.heappush(schedule, (time.monotonic() + self.__adjust(key, len(logs)), index, site_id))
+
+
+def follow_logs(client, site_ids, stop=None, **kwargs):
+    return LogFollower(client, site_ids, **kwargs).follow(stop)
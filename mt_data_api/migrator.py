@@ -0,0 +1,303 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Six Apart, Ltd.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from mt_data_api.checkpoint import Checkpoint
+from mt_data_api.errors import DataAPIError
+from mt_data_api import pager
+import posixpath
+import queue
+import threading
+import time
+import urllib.parse
+
+RESOURCES = ('categories', 'assets', 'entries', 'comments')
+DROP_FIELDS = frozenset(['id', 'blog', 'permalink', 'createdBy', 'createdDate', 'modifiedDate', 'updatable',
+                         'comments', 'trackbacks', 'commentCount', 'trackbackCount', 'url', 'archiveLink',
+                         'parent', 'entry', 'author', 'categories', 'assets'])
+_DONE = object()
+
+
+class StageStats(object):
+    def __init__(self, resource):
+        self.resource = resource
+        self.read = 0
+        self.written = 0
+        self.skipped = 0
+        self.errors = {}
+        self.duration = 0.0
+
+    @property
+    def rate(self):
+        return self.written / self.duration if self.duration else 0.0
+
+
+def _copy(item):
+    return dict((k, v) for k, v in item.items() if k not in DROP_FIELDS)
+
+
+def _topological(categories):
+    # Parents are written before their children.
+    by_id = dict((str(c['id']), c) for c in categories)
+    ordered = []
+    visited = set()
+
+    def visit(category):
+        key = str(category['id'])
+        if key in visited:
+            return
+        visited.add(key)
+        parent = by_id.get(str(category.get('parent') or ''))
+        if parent is not None:
+            visit(parent)
+        ordered.append(category)
+    for category in categories:
+        visit(category)
+    return ordered
+
+
+class Migrator(object):
+    def __init__(self, source, target, source_site_id, target_site_id, checkpoint_path, resources=RESOURCES,
+                 workers=4, queue_size=100, limit=100, author_map=None, checkpoint_interval=0.0):
+        self.source = source
+        self.target = target
+        self.source_site_id = source_site_id
+        self.target_site_id = target_site_id
+        self.checkpoint = Checkpoint(checkpoint_path)
+        self.resources = [r for r in RESOURCES if r in resources]
+        self.workers = workers
+        self.queue_size = queue_size
+        self.limit = limit
+        self.author_map = dict((str(k), v) for k, v in (author_map or {}).items())
+        self.checkpoint_interval = checkpoint_interval
+        self.stats = {}
+        self.__lock = threading.Lock()
+        self.__saved = 0.0
+
+    def id_map(self, resource):
+        with self.checkpoint.lock:
+            return self.checkpoint.state.setdefault('maps', {}).setdefault(resource, {})
+
+    def __mapped(self, resource, object_id):
+        return self.id_map(resource).get(str(object_id))
+
+    def __save(self):
+        with self.checkpoint.lock:
+            self.checkpoint.save()
+            self.__saved = time.monotonic()
+
+    def __remember(self, resource, object_id, new_id, extra=None):
+        # Saved after every write by default. With a checkpoint_interval, saves are batched and a crash can
+        # create the objects written since the last save a second time.
+        with self.checkpoint.lock:
+            self.id_map(resource)[str(object_id)] = new_id
+            if extra:
+                self.checkpoint.state.setdefault(resource + '_urls', {}).update(extra)
+            if time.monotonic() - self.__saved >= self.checkpoint_interval:
+                self.__save()
+
+    def __pipeline(self, resource, read, transform, write, workers):
+        # read -> bounded queue -> transform -> bounded queue -> writers
+        stats = self.stats.setdefault(resource, StageStats(resource))
+        read_queue = queue.Queue(self.queue_size)
+        write_queue = queue.Queue(self.queue_size)
+        failures = []
+        started = time.time()
+
+        def reader():
+            try:
+                for item in read():
+                    stats.read += 1
+                    read_queue.put(item)
+            except Exception as e:
+                failures.append(e)
+            finally:
+                read_queue.put(_DONE)
+
+        def transformer():
+            while True:
+                item = read_queue.get()
+                if item is _DONE:
+                    break
+                if self.__mapped(resource, item['id']) is not None:
+                    stats.skipped += 1
+                    continue
+                try:
+                    payload = transform(item)
+                except Exception as e:
+                    with self.__lock:
+                        stats.errors[str(item['id'])] = getattr(e, 'error', None) or str(e)
+                    continue
+                write_queue.put((item, payload))
+            for _ in range(workers):
+                write_queue.put(_DONE)
+
+        def writer():
+            while True:
+                task = write_queue.get()
+                if task is _DONE:
+                    return
+                item, payload = task
+                # Any error is recorded and the queue kept draining; a dead writer would block the transformer.
+                try:
+                    created = write(item, payload)
+                    if not isinstance(created, dict):
+                        raise DataAPIError({'code': '-1', 'message': 'Unexpected response: %r' % (created,)})
+                    extra = None
+                    if resource == 'assets' and item.get('url') and created.get('url'):
+                        extra = {item['url']: created['url']}
+                    self.__remember(resource, item['id'], created.get('id'), extra)
+                except Exception as e:
+                    with self.__lock:
+                        stats.errors[str(item['id'])] = getattr(e, 'error', None) or str(e)
+                    continue
+                with self.__lock:
+                    stats.written += 1
+
+        threads = [threading.Thread(target=reader), threading.Thread(target=transformer)]
+        threads.extend(threading.Thread(target=writer) for _ in range(workers))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.__save()
+        stats.duration += time.time() - started
+        if failures:
+            raise failures[0]
+
+    def __read(self, list_method, *args):
+        return lambda: pager.iter_items(list_method, *args, limit=self.limit)
+
+    # MARK: - Categories
+    def __migrate_categories(self):
+        categories = _topological(list(self.__read(self.source.list_categories, self.source_site_id)()))
+
+        def write(category, payload):
+            # The transformer runs ahead of the writer, so the parent's new id is only known here.
+            parent = category.get('parent')
+            if parent:
+                parent_id = self.__mapped('categories', parent)
+                if parent_id is None:
+                    raise DataAPIError({'code': '-1', 'message': 'The parent category was not migrated.'})
+                payload = dict(payload, parent=parent_id)
+            return pager.call(self.target.create_category, self.target_site_id, payload)
+        self.__pipeline('categories', lambda: iter(categories), _copy, write, 1)
+
+    # MARK: - Assets
+    def __migrate_assets(self):
+        def transform(asset):
+            response = pager.call(self.source.download, asset['url'])
+            try:
+                data = response.content
+            finally:
+                response.close()
+            file_name = asset.get('filename') or posixpath.basename(urllib.parse.urlsplit(asset['url']).path)
+            options = dict((k, v) for k, v in _copy(asset).items() if isinstance(v, str))
+            return file_name, data, options
+
+        def write(_, payload):
+            file_name, data, options = payload
+            return pager.call(self.target.upload_asset_for_site, self.target_site_id, data, file_name, options)
+        self.__pipeline('assets', self.__read(self.source.list_assets, self.source_site_id), transform, write,
+                        self.workers)
+
+    # MARK: - Entries
+    def __rewrite_urls(self, text):
+        if not text:
+            return text
+        with self.checkpoint.lock:
+            urls = dict(self.checkpoint.state.get('assets_urls') or {})
+        for old, new in urls.items():
+            text = text.replace(old, new)
+        return text
+
+    def __migrate_entries(self):
+        def transform(entry):
+            payload = _copy(entry)
+            for field in ('body', 'more'):
+                if field in payload:
+                    payload[field] = self.__rewrite_urls(payload[field])
+            for field in ('categories', 'assets'):
+                mapped = [self.__mapped(field, o.get('id')) for o in entry.get(field) or []]
+                if entry.get(field) is not None:
+                    payload[field] = [{'id': i} for i in mapped if i is not None]
+            author = self.author_map.get(str((entry.get('author') or {}).get('id')))
+            if author is not None:
+                payload['author'] = {'id': author}
+            return payload
+
+        def write(_, payload):
+            return pager.call(self.target.create_entry, self.target_site_id, payload)
+        self.__pipeline('entries', self.__read(self.source.list_entries, self.source_site_id), transform, write,
+                        self.workers)
+
+    # MARK: - Comments
+    def __migrate_comments(self):
+        comments = list(self.__read(self.source.list_comments, self.source_site_id)())
+        comments.sort(key=lambda c: int(c['id']))
+
+        def transform(comment):
+            entry_id = self.__mapped('entries', (comment.get('entry') or {}).get('id'))
+            if entry_id is None:
+                raise DataAPIError({'code': '-1', 'message': 'The entry of the comment was not migrated.'})
+            return entry_id, _copy(comment)
+
+        def write(comment, payload):
+            entry_id, body = payload
+            parent = comment.get('parent')
+            if parent:
+                parent_id = self.__mapped('comments', parent)
+                if parent_id is not None:
+                    return pager.call(self.target.create_reply_comment_for_entry, self.target_site_id, entry_id,
+                                      parent_id, body)
+            return pager.call(self.target.create_comment_for_entry, self.target_site_id, entry_id, body)
+        # Top-level comments go in parallel, then replies in order so each finds its parent mapped.
+        roots = [c for c in comments if not c.get('parent')]
+        replies = [c for c in comments if c.get('parent')]
+        self.__pipeline('comments', lambda: iter(roots), transform, write, self.workers)
+        self.__pipeline('comments', lambda: iter(replies), transform, write, 1)
+
+    def run(self):
+        stages = {
+            'categories': self.__migrate_categories,
+            'assets': self.__migrate_assets,
+            'entries': self.__migrate_entries,
+            'comments': self.__migrate_comments,
+        }
+        done = self.checkpoint.state.setdefault('done', [])
+        for resource in self.resources:
+            if resource in done:
+                continue
+            stages[resource]()
+            with self.checkpoint.lock:
+                if not self.stats[resource].errors:
+                    done.append(resource)
+                self.checkpoint.save()
+        return [self.stats[r] for r in self.resources if r in self.stats]
+
+
+def report(stats):
+    lines = ['%-12s %8s %8s %8s %8s %10s %10s' % ('resource', 'read', 'written', 'skipped', 'failed', 'seconds',
+                                                  'items/s')]
+    for s in stats:
+        lines.append('%-12s %8d %8d %8d %8d %10.2f %10.1f' % (s.resource, s.read, s.written, s.skipped,
+                                                              len(s.errors), s.duration, s.rate))
+    return '\n'.join(lines)
@@ -0,0 +1,143 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Six Apart, Ltd.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import threading
+import time
+
+
+class NodeStats(object):
+    def __init__(self, url):
+        self.url = url
+        self.healthy = True
+        self.latency = None
+        self.requests = 0
+        self.failures = 0
+        self.request_time = 0.0
+        self.last_check = None
+        self.last_failure = None
+        self.last_error = None
+
+    def as_dict(self):
+        return {
+            'healthy': self.healthy,
+            'latency': self.latency,
+            'requests': self.requests,
+            'failures': self.failures,
+            'mean_request_time': self.request_time / self.requests if self.requests else None,
+            'last_check': self.last_check,
+            'last_error': self.last_error,
+        }
+
+
+class NodePool(object):
+    def __init__(self, urls, check=None, interval=10.0, check_timeout=5.0, alpha=0.3):
+        if not urls:
+            raise ValueError('NodePool needs at least one URL')
+        self.urls = list(urls)
+        self.check = check
+        self.interval = interval
+        self.check_timeout = check_timeout
+        self.alpha = alpha
+        self.__nodes = dict((url, NodeStats(url)) for url in self.urls)
+        self.__lock = threading.Lock()
+        self.__stopped = threading.Event()
+        self.__thread = None
+
+    def route(self):
+        # Healthy nodes by health-check latency (unmeasured first), then unhealthy ones, least recently failed first.
+        self.start()
+        with self.__lock:
+            nodes = [self.__nodes[url] for url in self.urls]
+            healthy = sorted((n for n in nodes if n.healthy), key=lambda n: n.latency or 0.0)
+            unhealthy = sorted((n for n in nodes if not n.healthy), key=lambda n: n.last_failure or 0.0)
+            return [n.url for n in healthy + unhealthy]
+
+    def record(self, url, elapsed, ok=True):
+        with self.__lock:
+            node = self.__nodes[url]
+            node.requests += 1
+            node.request_time += elapsed
+            if not ok:
+                node.failures += 1
+
+    def record_failure(self, url, error):
+        with self.__lock:
+            node = self.__nodes[url]
+            node.requests += 1
+            node.failures += 1
+            node.healthy = False
+            node.last_failure = time.time()
+            node.last_error = str(error)
+
+    def check_node(self, url):
+        started = time.perf_counter()
+        try:
+            self.check(url, self.check_timeout)
+        except Exception as e:
+            with self.__lock:
+                node = self.__nodes[url]
+                node.healthy = False
+                node.last_check = time.time()
+                node.last_failure = node.last_check
+                node.last_error = str(e)
+            return False
+        elapsed = time.perf_counter() - started
+        with self.__lock:
+            node = self.__nodes[url]
+            node.healthy = True
+            node.latency = elapsed if node.latency is None else \
+                self.alpha * elapsed + (1 - self.alpha) * node.latency
+            node.last_check = time.time()
+        return True
+
+    def check_all(self):
+        threads = [threading.Thread(target=self.check_node, args=(url,), daemon=True) for url in self.urls]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def start(self):
+        if self.check is None or self.__thread is not None:
+            return
+        with self.__lock:
+            if self.__thread is not None:
+                return
+            self.__stopped.clear()
+
+            def run():
+                while True:
+                    self.check_all()
+                    if self.__stopped.wait(self.interval):
+                        return
+            self.__thread = threading.Thread(target=run, daemon=True)
+            self.__thread.start()
+
+    def close(self):
+        self.__stopped.set()
+        thread, self.__thread = self.__thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(self.check_timeout)
+
+    def stats(self):
+        with self.__lock:
+            return dict((url, self.__nodes[url].as_dict()) for url in self.urls)
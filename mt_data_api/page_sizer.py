@@ -0,0 +1,115 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Six Apart, Ltd.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import json
+from mt_data_api.checkpoint import Checkpoint
+import threading
+import time
+
+
+def endpoint_key(list_method):
+    # Sizes learned on one host say little about another, so the client's base URL is part of the key.
+    name = getattr(list_method, '__name__', str(list_method))
+    base_url = getattr(getattr(list_method, '__self__', None), 'api_base_url', None)
+    return '%s %s' % (base_url, name) if isinstance(base_url, str) else name
+
+
+class AdaptivePageSizer(object):
+    def __init__(self, target_latency=1.0, max_bytes=2 * 1024 * 1024, initial=50, minimum=5, maximum=500,
+                 smoothing=0.5, path=None, ceiling_ttl=600.0):
+        self.target_latency = target_latency
+        self.max_bytes = max_bytes
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.smoothing = smoothing
+        self.ceiling_ttl = ceiling_ttl
+        self.checkpoint = Checkpoint(path) if path else None
+        self.__lock = threading.Lock()
+        state = self.checkpoint.state if self.checkpoint else {}
+        self.__sizes = dict(state.get('sizes') or {})
+        # endpoint -> [size, time recorded]; a ceiling expires after ceiling_ttl seconds.
+        self.__ceilings = dict((k, v) for k, v in (state.get('ceilings') or {}).items() if isinstance(v, list))
+
+    def __clamp(self, size):
+        return max(self.minimum, min(self.maximum, int(size)))
+
+    def __ceiling(self, endpoint):
+        ceiling = self.__ceilings.get(endpoint)
+        if ceiling is None:
+            return None
+        if time.time() - ceiling[1] >= self.ceiling_ttl:
+            del self.__ceilings[endpoint]
+            return None
+        return ceiling[0]
+
+    def size_for(self, endpoint):
+        with self.__lock:
+            return self.__clamp(self.__sizes.get(endpoint, self.initial))
+
+    def observe(self, endpoint, count, elapsed, nbytes):
+        if count <= 0:
+            return
+        with self.__lock:
+            current = self.__sizes.get(endpoint, self.initial)
+            per_item_time = max(elapsed / count, 1e-6)
+            per_item_bytes = max(nbytes / count, 1.0)
+            ideal = min(self.target_latency / per_item_time, self.max_bytes / per_item_bytes)
+            if elapsed > 2 * self.target_latency:
+                size = min(ideal, current / 2)
+            else:
+                # Grow at most 2x per page so one fast response does not overshoot.
+                size = min(self.smoothing * ideal + (1 - self.smoothing) * current, current * 2)
+            ceiling = self.__ceiling(endpoint)
+            if ceiling is not None:
+                size = min(size, ceiling * 0.8)
+            self.__sizes[endpoint] = self.__clamp(size)
+
+    def shrink(self, endpoint):
+        # Called after a timeout; returns False once the page size cannot get any smaller.
+        with self.__lock:
+            current = self.__clamp(self.__sizes.get(endpoint, self.initial))
+            # Pages this large timed out, so growth stays below them until the ceiling expires.
+            ceiling = self.__ceiling(endpoint)
+            self.__ceilings[endpoint] = [min(current, ceiling or current), time.time()]
+            self.__sizes[endpoint] = self.__clamp(current / 2)
+            return self.__sizes[endpoint] < current
+
+    def sizes(self):
+        with self.__lock:
+            return dict(self.__sizes)
+
+    def save(self):
+        if self.checkpoint is None:
+            return
+        with self.checkpoint.lock:
+            self.checkpoint.state['sizes'] = self.sizes()
+            with self.__lock:
+                self.checkpoint.state['ceilings'] = dict(self.__ceilings)
+            self.checkpoint.save()
+
+
+def payload_size(items):
+    # Estimated from the first item so large pages are not serialized again just to be measured.
+    if not items:
+        return 0
+    return len(json.dumps(items[0], separators=(',', ':'))) * len(items)
@@ -0,0 +1,145 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Six Apart, Ltd.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from mt_data_api.errors import DataAPIError, RequestTimeout
+from mt_data_api.page_sizer import endpoint_key, payload_size
+import time
+
+RESOURCES = {
+    'entries': 'list_entries',
+    'pages': 'list_pages',
+    'assets': 'list_assets',
+    'comments': 'list_comments',
+    'trackbacks': 'list_trackbacks',
+    'categories': 'list_categories',
+    'folders': 'list_folders',
+    'tags': 'list_tags',
+    'fields': 'list_fields',
+    'templates': 'list_templates',
+    'widgets': 'list_widgets',
+    'widgetsets': 'list_widgetsets',
+    'logs': 'list_logs',
+    'formatted_texts': 'list_formatted_texts',
+}
+
+
+def call(method, *args, **kwargs):
+    outcome = []
+
+    def success(*values):
+        outcome.append((True, values))
+
+    def failure(error):
+        outcome.append((False, error))
+    method(*args, success=success, failure=failure, **kwargs)
+    if not outcome:
+        return None
+    ok, value = outcome[0]
+    if not ok:
+        raise DataAPIError(value)
+    return value[0] if len(value) == 1 else value
+
+
+def fetch_page(list_method, *args, **kwargs):
+    options = dict(kwargs.pop('options', None) or {})
+    items, total = call(list_method, *args, options=options, **kwargs)
+    return items or [], total or 0
+
+
+def iter_pages(list_method, *args, **kwargs):
+    options = dict(kwargs.pop('options', None) or {})
+    limit = kwargs.pop('limit', 50)
+    offset = kwargs.pop('offset', 0)
+    page_sizer = kwargs.pop('page_sizer', None)
+    if page_sizer is not None:
+        for page in _iter_sized_pages(list_method, args, kwargs, options, offset, page_sizer):
+            yield page
+        return
+    while True:
+        options['limit'] = limit
+        options['offset'] = offset
+        items, total = fetch_page(list_method, *args, options=options, **kwargs)
+        yield offset, items, total
+        offset += len(items)
+        if not items or offset >= total:
+            return
+
+
+def _iter_sized_pages(list_method, args, kwargs, options, offset, page_sizer):
+    endpoint = endpoint_key(list_method)
+    try:
+        while True:
+            options['limit'] = page_sizer.size_for(endpoint)
+            options['offset'] = offset
+            started = time.perf_counter()
+            try:
+                items, total = fetch_page(list_method, *args, options=options, **kwargs)
+            except RequestTimeout:
+                if page_sizer.shrink(endpoint):
+                    continue
+                raise
+            page_sizer.observe(endpoint, len(items), time.perf_counter() - started, payload_size(items))
+            yield offset, items, total
+            offset += len(items)
+            if not items or offset >= total:
+                return
+    finally:
+        page_sizer.save()
+
+
+def iter_items(list_method, *args, **kwargs):
+    if kwargs.pop('stream', False):
+        # A streamed page is timed by its consumer, so page sizes are not adapted while streaming.
+        kwargs.pop('page_sizer', None)
+        for item in _iter_streamed_items(list_method, *args, **kwargs):
+            yield item
+        return
+    for _, items, _ in iter_pages(list_method, *args, **kwargs):
+        for item in items:
+            yield item
+
+
+def _iter_streamed_items(list_method, *args, **kwargs):
+    client = list_method.__self__
+    options = dict(kwargs.pop('options', None) or {})
+    limit = kwargs.pop('limit', 50)
+    offset = kwargs.pop('offset', 0)
+    while True:
+        options['limit'] = limit
+        options['offset'] = offset
+        with client.call_options(stream_items=True):
+            items, _ = call(list_method, *args, options=dict(options), **kwargs)
+        count = 0
+        with items:
+            for item in items:
+                count += 1
+                yield item
+        offset += count
+        if not count or offset >= (items.total_results or 0):
+            return
+
+
+def list_method_for(client, resource):
+    try:
+        return getattr(client, RESOURCES[resource])
+    except KeyError:
+        raise ValueError('Unknown resource type: %s' % resource)
@@ -0,0 +1,136 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Six Apart, Ltd.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from collections import OrderedDict
+import copy
+from mt_data_api.data_api import stub_callback
+import threading
+
+CONFLICT_ERROR_CODE = 409
+
+
+def diff(baseline, obj):
+    changes = {}
+    for key, value in obj.items():
+        if key not in baseline or baseline[key] != value:
+            changes[key] = value
+    return changes
+
+
+class ObjectCache(object):
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self.__objects = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, key):
+        with self.__lock:
+            obj = self.__objects.get(key)
+            if obj is None:
+                return None
+            self.__objects.move_to_end(key)
+            return copy.deepcopy(obj)
+
+    def put(self, key, obj):
+        with self.__lock:
+            self.__objects[key] = copy.deepcopy(obj)
+            self.__objects.move_to_end(key)
+            while len(self.__objects) > self.max_entries:
+                self.__objects.popitem(last=False)
+
+    def discard(self, key):
+        with self.__lock:
+            self.__objects.pop(key, None)
+
+
+class PartialUpdater(object):
+    def __init__(self, client, cache=None):
+        self.client = client
+        self.cache = cache or ObjectCache()
+
+    def remember(self, kind, site_id, object_id, obj):
+        self.cache.put((kind, str(site_id), str(object_id)), obj)
+
+    def __get(self, kind, get_method, site_id, object_id, options, success, failure):
+        def override_success(obj):
+            self.remember(kind, site_id, object_id, obj)
+            success(obj)
+        get_method(site_id, object_id, options=options, success=override_success, failure=failure)
+
+    def __update(self, kind, get_method, update_method, site_id, object_id, obj, baseline, check_modified,
+                 options, success, failure):
+        key = (kind, str(site_id), str(object_id))
+        if baseline is None:
+            baseline = self.cache.get(key)
+        if baseline is None:
+            changes = obj
+        else:
+            changes = diff(baseline, obj)
+            if not changes:
+                success(copy.deepcopy(baseline))
+                return
+
+        def override_success(updated):
+            self.cache.put(key, updated)
+            success(updated)
+
+        def send():
+            update_method(site_id, object_id, changes, options=options,
+                          success=override_success, failure=failure)
+
+        if not check_modified or baseline is None or not baseline.get('modifiedDate'):
+            send()
+            return
+
+        def check(current):
+            if current.get('modifiedDate') != baseline.get('modifiedDate'):
+                self.cache.discard(key)
+                failure({'code': CONFLICT_ERROR_CODE,
+                         'message': 'The %s has been modified since it was read.' % kind,
+                         'modifiedDate': current.get('modifiedDate')})
+                return
+            send()
+        get_method(site_id, object_id, options={'fields': 'id,modifiedDate'}, success=check, failure=failure)
+
+    def get_entry(self, site_id, entry_id, options=None, success=stub_callback, failure=stub_callback):
+        self.__get('entry', self.client.get_entry, site_id, entry_id, options, success, failure)
+
+    def update_entry(self, site_id, entry_id, entry, baseline=None, check_modified=False, options=None,
+                     success=stub_callback, failure=stub_callback):
+        self.__update('entry', self.client.get_entry, self.client.update_entry, site_id, entry_id, entry,
+                      baseline, check_modified, options, success, failure)
+
+    def get_page(self, site_id, page_id, options=None, success=stub_callback, failure=stub_callback):
+        self.__get('page', self.client.get_page, site_id, page_id, options, success, failure)
+
+    def update_page(self, site_id, page_id, page, baseline=None, check_modified=False, options=None,
+                    success=stub_callback, failure=stub_callback):
+        self.__update('page', self.client.get_page, self.client.update_page, site_id, page_id, page,
+                      baseline, check_modified, options, success, failure)
+
+    def get_asset(self, site_id, asset_id, options=None, success=stub_callback, failure=stub_callback):
+        self.__get('asset', self.client.get_asset, site_id, asset_id, options, success, failure)
+
+    def update_asset(self, site_id, asset_id, asset, baseline=None, check_modified=False, options=None,
+                     success=stub_callback, failure=stub_callback):
+        self.__update('asset', self.client.get_asset, self.client.update_asset, site_id, asset_id, asset,
+                      baseline, check_modified, options, success, failure)
@@ -0,0 +1,208 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Six Apart, Ltd.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from mt_data_api.http_method import HTTPMethod
+from mt_data_api import pager
+import re
+import threading
+import time
+
+SYSTEM = 0
+SUPERUSER_PERMISSION = 'administer'
+
+_GRANT_URL = re.compile(r'/(sites|users)/(\d+)/permissions/(grant|revoke)$')
+_ROLE_URL = re.compile(r'/roles/(\d+)$')
+
+
+def _object_id(obj):
+    if isinstance(obj, dict):
+        return str(obj.get('id')) if obj.get('id') is not None else None
+    return str(obj) if obj is not None else None
+
+
+class PermissionIndex(object):
+    def __init__(self, client, site_ids=None, limit=100):
+        self.client = client
+        self.site_ids = site_ids
+        self.limit = limit
+        self.roles = {}
+        self.__permissions = {}
+        self.__user_roles = {}
+        # Invalidations are numbered. A load or reload clears only the marks made before its fetch began, so
+        # writes made while it runs are not lost. __marks keeps every mark since the last full load.
+        self.__generation = 0
+        self.__dirty_users = {}
+        self.__marks = {}
+        self.__stale = True
+        self.__stale_generation = 0
+        self.__lock = threading.RLock()
+        self.__timer = None
+        self.__stopped = threading.Event()
+        client.add_write_listener(self.__on_write)
+
+    def __index(self, permissions, users=None):
+        index = {}
+        user_roles = {}
+        for permission in permissions:
+            user_id = _object_id(permission.get('user'))
+            if user_id is None or (users is not None and user_id not in users):
+                continue
+            site_id = _object_id(permission.get('blog')) or str(SYSTEM)
+            key = (user_id, site_id)
+            index[key] = index.get(key, frozenset()) | frozenset(permission.get('permissions') or ())
+            for role in permission.get('roles') or ():
+                user_roles.setdefault(_object_id(role), set()).add(user_id)
+        return index, user_roles
+
+    def __load_permissions(self):
+        if self.site_ids is None:
+            return list(pager.iter_items(self.client.list_permissions, limit=self.limit))
+        permissions = []
+        for site_id in self.site_ids:
+            permissions.extend(pager.iter_items(self.client.list_permissions_for_site, site_id, limit=self.limit))
+        return permissions
+
+    def load(self):
+        with self.__lock:
+            generation = self.__generation
+        roles = dict((_object_id(role), frozenset(role.get('permissions') or ()))
+                     for role in pager.iter_items(self.client.list_roles, limit=self.limit))
+        index, user_roles = self.__index(self.__load_permissions())
+        with self.__lock:
+            self.roles = roles
+            self.__permissions = index
+            self.__user_roles = user_roles
+            self.__marks = dict((u, g) for u, g in self.__marks.items() if g > generation)
+            self.__dirty_users = dict(self.__marks)
+            self.__stale = self.__stale_generation > generation
+
+    def __reload_users(self, user_ids):
+        for user_id in user_ids:
+            with self.__lock:
+                generation = self.__generation
+            permissions = list(pager.iter_items(self.client.list_permissions_for_user, user_id, limit=self.limit))
+            if self.site_ids is not None:
+                sites = set(str(s) for s in self.site_ids) | {str(SYSTEM)}
+                permissions = [p for p in permissions if (_object_id(p.get('blog')) or str(SYSTEM)) in sites]
+            index, user_roles = self.__index(permissions, {user_id})
+            with self.__lock:
+                for key in [k for k in self.__permissions if k[0] == user_id]:
+                    del self.__permissions[key]
+                self.__permissions.update(index)
+                for users in self.__user_roles.values():
+                    users.discard(user_id)
+                for role_id, users in user_roles.items():
+                    self.__user_roles.setdefault(role_id, set()).update(users)
+                if self.__dirty_users.get(user_id, 0) <= generation:
+                    self.__dirty_users.pop(user_id, None)
+
+    def refresh(self):
+        # Only users touched by writes since the last refresh are reloaded.
+        with self.__lock:
+            stale = self.__stale
+            dirty = set(self.__dirty_users)
+        if stale:
+            self.load()
+        elif dirty:
+            self.__reload_users(dirty)
+
+    def __mark(self, user_ids):
+        with self.__lock:
+            self.__generation += 1
+            for user_id in user_ids:
+                self.__dirty_users[user_id] = self.__marks[user_id] = self.__generation
+
+    def invalidate_user(self, user_id):
+        self.__mark([str(user_id)])
+
+    def invalidate(self):
+        with self.__lock:
+            self.__generation += 1
+            self.__stale = True
+            self.__stale_generation = self.__generation
+
+    def __on_write(self, method, url, params, response):
+        path = url.split('?', 1)[0]
+        match = _GRANT_URL.search(path)
+        if match:
+            if match.group(1) == 'sites':
+                self.invalidate_user(params.get('user_id'))
+            else:
+                self.invalidate_user(match.group(2))
+            return
+        match = _ROLE_URL.search(path)
+        if match and '/permissions' not in path:
+            role_id = match.group(1)
+            with self.__lock:
+                users = self.__user_roles.get(role_id)
+                if users is None:
+                    # Role membership is unknown without it in the permission objects.
+                    self.invalidate()
+                else:
+                    self.__mark(users)
+                # DELETE returns the deleted role, which must not be put back.
+                if method != HTTPMethod.DELETE and isinstance(response, dict) and \
+                        response.get('permissions') is not None:
+                    self.roles[role_id] = frozenset(response['permissions'])
+                else:
+                    self.roles.pop(role_id, None)
+
+    def permissions(self, user_id, site_id=SYSTEM):
+        user_id = str(user_id)
+        with self.__lock:
+            stale = self.__stale
+            dirty = user_id in self.__dirty_users
+        if stale:
+            self.load()
+        elif dirty:
+            self.__reload_users([user_id])
+        with self.__lock:
+            return self.__permissions.get((user_id, str(site_id)), frozenset())
+
+    def has_permission(self, user_id, permission, site_id=SYSTEM):
+        if SUPERUSER_PERMISSION in self.permissions(user_id, SYSTEM):
+            return True
+        return permission in self.permissions(user_id, site_id)
+
+    def start(self, interval=60.0, full_interval=None):
+        # Every tick reloads users touched by this client; full_interval also picks up outside changes.
+        self.__stopped.clear()
+
+        def tick():
+            loaded = time.time()
+            while not self.__stopped.wait(interval):
+                try:
+                    if full_interval is not None and time.time() - loaded >= full_interval:
+                        self.invalidate()
+                        loaded = time.time()
+                    self.refresh()
+                except Exception:
+                    pass
+        self.__timer = threading.Thread(target=tick, daemon=True)
+        self.__timer.start()
+
+    def close(self):
+        self.__stopped.set()
+        if self.__timer is not None:
+            self.__timer.join()
+            self.__timer = None
+        self.client.remove_write_listener(self.__on_write)
@@ -0,0 +1,149 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Six Apart, Ltd.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import atexit
+import contextlib
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+import urllib.parse
+
+_ID_SEGMENT = re.compile(r'/\d+(?=/|$)')
+_OFF = ('', '0', 'false', 'no', 'off')
+_STDERR = ('1', 'true', 'yes', 'on', 'stderr')
+
+
+def endpoint_name(method, url, api_base_url=''):
+    path = url[len(api_base_url):] if api_base_url and url.startswith(api_base_url) else \
+        urllib.parse.urlsplit(url).path
+    path = re.sub(r'^/v\d+', '', path)
+    return '%s %s' % (method.name, _ID_SEGMENT.sub('/:id', path))
+
+
+class Profiler(object):
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.__stats = {}
+        self.__lock = threading.Lock()
+        self.__local = threading.local()
+
+    def __stack(self):
+        stack = getattr(self.__local, 'stack', None)
+        if stack is None:
+            stack = self.__local.stack = []
+        return stack
+
+    def __add(self, key, seconds, allocated):
+        with self.__lock:
+            stats = self.__stats.setdefault(key, [0, 0.0, 0])
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] += allocated
+
+    @contextlib.contextmanager
+    def phase(self, endpoint, name):
+        stack = self.__stack()
+        frame = {'children': 0.0, 'child_allocated': 0}
+        stack.append((name, frame))
+        memory = tracemalloc.get_traced_memory()[0] if self.trace_memory else 0
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            allocated = tracemalloc.get_traced_memory()[0] - memory if self.trace_memory else 0
+            stack.pop()
+            path = tuple(n for n, _ in stack) + (name,)
+            # Time and memory are attributed exclusively: nested phases are subtracted.
+            self.__add((endpoint, path), elapsed - frame['children'], allocated - frame['child_allocated'])
+            if stack:
+                stack[-1][1]['children'] += elapsed
+                stack[-1][1]['child_allocated'] += allocated
+            pending = getattr(self.__local, 'pending', None)
+            if pending and not stack:
+                self.__local.pending = None
+                self.__add((endpoint, ('url',)), pending, 0)
+
+    def add_pending(self, seconds):
+        # URL building happens before the endpoint is known; it is charged to the next request.
+        self.__local.pending = (getattr(self.__local, 'pending', None) or 0.0) + seconds
+
+    def stats(self):
+        with self.__lock:
+            return dict((k, list(v)) for k, v in self.__stats.items())
+
+    def summary(self):
+        rows = sorted(self.stats().items(), key=lambda kv: kv[1][1], reverse=True)
+        lines = ['%-48s %-18s %8s %12s %14s' % ('endpoint', 'phase', 'calls', 'total ms', 'alloc bytes')]
+        for (endpoint, path), (calls, seconds, allocated) in rows:
+            lines.append('%-48s %-18s %8d %12.3f %14d' % (endpoint, '/'.join(path), calls, seconds * 1000,
+                                                          allocated))
+        return '\n'.join(lines)
+
+    def write_collapsed(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for (endpoint, phases), (_, seconds, _) in sorted(self.stats().items()):
+                f.write('%s;%s %d\n' % (endpoint, ';'.join(phases), int(seconds * 1000000)))
+
+    def dump(self, output=None):
+        if output and output.lower() not in _STDERR:
+            self.write_collapsed(output)
+        else:
+            sys.stderr.write(self.summary() + '\n')
+
+
+class ProfiledResponse(object):
+    def __init__(self, response, profiler, endpoint):
+        self.__response = response
+        self.__profiler = profiler
+        self.__endpoint = endpoint
+
+    def __getattr__(self, name):
+        return getattr(self.__response, name)
+
+    def json(self):
+        with self.__profiler.phase(self.__endpoint, 'decode'):
+            return self.__response.json()
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_profiler():
+    # MT_DATA_API_PROFILE=1 (or true, yes, on) prints a summary to stderr at exit; 0, an empty value or off
+    # disables it, and any other value is taken as a path for a collapsed-stack file.
+    # MT_DATA_API_PROFILE_MEMORY=1 adds tracemalloc.
+    global _default
+    output = os.environ.get('MT_DATA_API_PROFILE', '').strip()
+    if output.lower() in _OFF:
+        return None
+    with _default_lock:
+        if _default is None:
+            _default = Profiler(trace_memory=os.environ.get('MT_DATA_API_PROFILE_MEMORY') == '1')
+            atexit.register(_default.dump, output)
+    return _default
@@ -0,0 +1,275 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Six Apart, Ltd.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import datetime
+from mt_data_api import pager
+import warnings
+
+
+# Item fields and the columns the list endpoints sort and filter dates on.
+SORT_COLUMNS = {
+    'date': 'authored_on',
+    'createdDate': 'created_on',
+    'modifiedDate': 'modified_on',
+    'unpublishedDate': 'unpublished_on',
+    'title': 'title',
+    'basename': 'basename',
+    'id': 'id',
+}
+DATE_COLUMNS = {
+    'date': 'authored_on',
+    'createdDate': 'created_on',
+    'modifiedDate': 'modified_on',
+}
+_ITEM_FIELDS = dict((column, field) for field, column in SORT_COLUMNS.items())
+DATE_RANGE_METHODS = ('list_entries', 'list_pages')
+
+
+class ClientSideFilterWarning(UserWarning):
+    pass
+
+
+def _to_datetime(value):
+    if isinstance(value, datetime.datetime):
+        return value
+    if isinstance(value, datetime.date):
+        return datetime.datetime(value.year, value.month, value.day)
+    return datetime.datetime.fromisoformat(str(value))
+
+
+def _end_of_day(value):
+    # A date given as the end of a range includes the whole day, as dateTo does.
+    if isinstance(value, datetime.date) and not isinstance(value, datetime.datetime):
+        return datetime.datetime(value.year, value.month, value.day, 23, 59, 59, 999999)
+    return _to_datetime(value)
+
+
+def _compare_key(value, bound):
+    # Item dates carry the site's offset; naive bounds are compared against the local wall time.
+    value = _to_datetime(value)
+    if bound.tzinfo is None:
+        value = value.replace(tzinfo=None)
+    elif value.tzinfo is None:
+        value = value.replace(tzinfo=bound.tzinfo)
+    return value
+
+
+def _ids(objects):
+    return set(str(o.get('id') if isinstance(o, dict) else o) for o in objects or ())
+
+
+def _names(objects):
+    return set(o.get('label') or o.get('name') if isinstance(o, dict) else o for o in objects or ())
+
+
+class Query(object):
+    def __init__(self, list_method, *args):
+        self.list_method = list_method
+        self.args = args
+        self.__params = {}
+        self.__fields = None
+        self.__predicates = []
+        self.__needed = set()
+        self.__statuses = None
+        self.__categories = None
+        self.__range = None
+        self.__order = None
+        self.__max_items = None
+        self.__page_size = 50
+        self.__stream = False
+
+    def __client_side(self, description, predicate, fields):
+        self.__predicates.append((description, predicate))
+        self.__needed.update(fields)
+        return self
+
+    def status(self, *statuses):
+        self.__statuses = statuses
+        return self
+
+    def search(self, text, fields=None):
+        self.__params['search'] = text
+        if fields:
+            self.__params['searchFields'] = ','.join(fields)
+        return self
+
+    def fields(self, *names):
+        self.__fields = list(names)
+        return self
+
+    def order_by(self, field, descending=False):
+        # Takes an item field such as 'date' or a sort column such as 'authored_on'.
+        field = _ITEM_FIELDS.get(field, field)
+        self.__order = (field, descending)
+        self.__params['sortBy'] = SORT_COLUMNS.get(field, field)
+        self.__params['sortOrder'] = 'descend' if descending else 'ascend'
+        return self
+
+    def include_ids(self, *ids):
+        self.__params['includeIds'] = ','.join(str(i) for i in ids)
+        return self
+
+    def exclude_ids(self, *ids):
+        self.__params['excludeIds'] = ','.join(str(i) for i in ids)
+        return self
+
+    def asset_class(self, name):
+        self.__params['class'] = name
+        return self
+
+    def param(self, name, value):
+        self.__params[name] = value
+        return self
+
+    def category(self, *category_ids):
+        self.__categories = [str(c) for c in category_ids]
+        return self
+
+    def tags(self, *names):
+        wanted = set(names)
+        return self.__client_side('tags in %s' % sorted(wanted),
+                                  lambda item: bool(wanted & _names(item.get('tags'))), ['tags'])
+
+    def date_range(self, field='date', start=None, end=None):
+        self.__range = (field, _to_datetime(start) if start is not None else None,
+                        _end_of_day(end) if end is not None else None)
+        return self
+
+    def where(self, predicate, fields=(), description='custom predicate'):
+        return self.__client_side(description, predicate, fields)
+
+    def limit(self, count):
+        self.__max_items = count
+        return self
+
+    def page_size(self, size):
+        self.__page_size = size
+        return self
+
+    def stream(self, enabled=True):
+        self.__stream = enabled
+        return self
+
+    def plan(self):
+        # Returns (list_method, args, server params, client-side predicates, stop condition).
+        list_method, args = self.list_method, self.args
+        params = dict(self.__params)
+        predicates = list(self.__predicates)
+        needed = set(self.__needed)
+        if self.__statuses:
+            if len(self.__statuses) == 1:
+                params['status'] = self.__statuses[0]
+            else:
+                statuses = set(self.__statuses)
+                predicates.append(('status in %s' % sorted(statuses), lambda item: item.get('status') in statuses))
+                needed.add('status')
+        if self.__categories:
+            client = getattr(list_method, '__self__', None)
+            if len(self.__categories) == 1 and getattr(list_method, '__name__', '') == 'list_entries' and client:
+                list_method = client.list_entries_for_category
+                args = tuple(args) + (self.__categories[0],)
+            else:
+                wanted = set(self.__categories)
+                predicates.append(('category in %s' % sorted(wanted),
+                                   lambda item: bool(wanted & _ids(item.get('categories')))))
+                needed.add('categories')
+        stop = None
+        if self.__range:
+            field, start, end = self.__range
+            exact = False
+            if field in DATE_COLUMNS and getattr(list_method, '__name__', '') in DATE_RANGE_METHODS:
+                exact = self.__push_range(params, field, start, end)
+            if not exact:
+                predicates.append(('%s in [%s, %s]' % (field, start, end),
+                                   lambda item: self.__in_range(item.get(field), start, end)))
+                needed.add(field)
+            if self.__order and self.__order[0] == field:
+                # Sorted on the range field, the first row past the range ends the scan.
+                if self.__order[1] and start is not None:
+                    stop = (field, start, -1)
+                elif not self.__order[1] and end is not None:
+                    stop = (field, end, 1)
+        if self.__fields is not None:
+            params['fields'] = ','.join(sorted(set(self.__fields) | needed | {'id'}))
+        return list_method, args, params, predicates, stop
+
+    @staticmethod
+    def __push_range(params, field, start, end):
+        # dateFrom/dateTo select whole days in the site's time zone. Bounds with a time of day or an
+        # offset are widened to the days around them and checked again on each item.
+        exact = True
+        params['dateField'] = DATE_COLUMNS[field]
+        if start is not None:
+            day = start.date()
+            if start.tzinfo is not None:
+                day -= datetime.timedelta(days=1)
+            exact = exact and start.tzinfo is None and start == datetime.datetime.combine(day, datetime.time())
+            params['dateFrom'] = day.isoformat()
+        if end is not None:
+            day = end.date()
+            if end.tzinfo is not None:
+                day += datetime.timedelta(days=1)
+            exact = exact and end.tzinfo is None and end == _end_of_day(day)
+            params['dateTo'] = day.isoformat()
+        return exact
+
+    @staticmethod
+    def __past(item, stop):
+        field, bound, direction = stop
+        value = item.get(field)
+        if not value:
+            return False
+        value = _compare_key(value, bound)
+        return value < bound if direction < 0 else value > bound
+
+    @staticmethod
+    def __in_range(value, start, end):
+        if not value:
+            return False
+        if start is not None and _compare_key(value, start) < start:
+            return False
+        if end is not None and _compare_key(value, end) > end:
+            return False
+        return True
+
+    def options(self):
+        return self.plan()[2]
+
+    def __iter__(self):
+        list_method, args, params, predicates, stop = self.plan()
+        if predicates:
+            warnings.warn('Evaluated client-side: %s' % '; '.join(d for d, _ in predicates),
+                          ClientSideFilterWarning, stacklevel=2)
+        count = 0
+        if self.__max_items is not None and self.__max_items <= 0:
+            return
+        page_size = self.__page_size
+        if not predicates and self.__max_items is not None:
+            page_size = min(page_size, self.__max_items)
+        for item in pager.iter_items(list_method, *args, options=params, limit=page_size, stream=self.__stream):
+            if stop is not None and self.__past(item, stop):
+                return
+            if all(predicate(item) for _, predicate in predicates):
+                yield item
+                count += 1
+                if self.__max_items is not None and count >= self.__max_items:
+                    return
@@ -0,0 +1,154 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Six Apart, Ltd.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import threading
+import time
+
+
+class TokenBucket(object):
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst) if burst else max(self.rate, 1.0)
+        self.__tokens = self.burst
+        self.__updated = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        while True:
+            with self.__lock:
+                now = time.monotonic()
+                self.__tokens = min(self.burst, self.__tokens +
+                                    (now - self.__updated) * self.rate)
+                self.__updated = now
+                if self.__tokens >= tokens:
+                    self.__tokens -= tokens
+                    return
+                wait = (tokens - self.__tokens) / self.rate
+            time.sleep(wait)
+
+
+class AIMDLimiter(object):
+    def __init__(self, initial=4, minimum=1, maximum=64, increase=1.0, decrease=0.5, tolerance=2.0,
+                 max_latency=None, smoothing=0.1, drift=0.05):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.tolerance = tolerance
+        self.max_latency = max_latency
+        self.smoothing = smoothing
+        self.drift = drift
+        self.__limit = float(initial)
+        self.__in_flight = 0
+        # Latency baselines per endpoint, so slow list calls are not compared with cheap lookups.
+        self.__baselines = {}
+        self.__last_decrease = float('-inf')
+        self.__cond = threading.Condition()
+
+    @property
+    def limit(self):
+        return int(self.__limit)
+
+    @property
+    def in_flight(self):
+        return self.__in_flight
+
+    def acquire(self):
+        with self.__cond:
+            while self.__in_flight >= int(self.__limit):
+                self.__cond.wait()
+            self.__in_flight += 1
+
+    def baseline(self, key=None):
+        return self.__baselines.get(key)
+
+    def __is_spike(self, latency, baseline):
+        if self.max_latency is not None and latency > self.max_latency:
+            return True
+        return baseline is not None and latency > baseline * self.tolerance
+
+    def release(self, latency, ok=True, key=None):
+        with self.__cond:
+            self.__in_flight -= 1
+            now = time.monotonic()
+            baseline = self.__baselines.get(key)
+            spike = ok and self.__is_spike(latency, baseline)
+            if ok:
+                # Spikes move the baseline too, only more slowly, so a lasting shift in latency becomes
+                # the new normal instead of holding the limit at minimum.
+                alpha = self.drift if spike else self.smoothing
+                self.__baselines[key] = latency if baseline is None else baseline * (1 - alpha) + latency * alpha
+            if not ok or spike:
+                # Only back off once per observed round trip so that a burst of
+                # failures from one window does not collapse the limit to minimum.
+                if now - self.__last_decrease >= latency:
+                    self.__limit = max(float(self.minimum),
+                                       self.__limit * self.decrease)
+                    self.__last_decrease = now
+            else:
+                self.__limit = min(float(self.maximum),
+                                   self.__limit + self.increase / self.__limit)
+            self.__cond.notify_all()
+
+
+class RateLimiter(object):
+    def __init__(self, rate=None, burst=None, concurrency=None):
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        if concurrency is None or isinstance(concurrency, AIMDLimiter):
+            self.concurrency = concurrency
+        else:
+            self.concurrency = AIMDLimiter(**concurrency)
+
+    def call(self, send, key=None):
+        if self.bucket:
+            self.bucket.acquire()
+        if self.concurrency:
+            self.concurrency.acquire()
+        started = time.monotonic()
+        ok = False
+        try:
+            response = send()
+            ok = response is not None and response.status_code < 500
+            return response
+        finally:
+            if self.concurrency:
+                self.concurrency.release(time.monotonic() - started, ok, key)
+
+
+_lock = threading.Lock()
+_limiters = {}
+
+
+def configure(api_base_url, rate=None, burst=None, concurrency=None):
+    limiter = RateLimiter(rate, burst, concurrency)
+    with _lock:
+        _limiters[api_base_url] = limiter
+    return limiter
+
+
+def remove(api_base_url):
+    with _lock:
+        _limiters.pop(api_base_url, None)
+
+
+def get(api_base_url):
+    return _limiters.get(api_base_url)
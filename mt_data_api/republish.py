@@ -0,0 +1,172 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Six Apart, Ltd.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from concurrent.futures import ThreadPoolExecutor
+from mt_data_api import pager
+import threading
+import time
+
+
+def _for_site(ids, site_id):
+    # Ids are either shared by every site or given per site as a mapping.
+    if isinstance(ids, dict):
+        return ids.get(site_id, ())
+    return ids or ()
+
+
+class Step(object):
+    def __init__(self, site_id, name, method, args, depends_on=()):
+        self.site_id = site_id
+        self.name = name
+        self.method = method
+        self.args = args
+        self.depends_on = list(depends_on)
+        self.dependents = []
+        self.waiting = len(self.depends_on)
+        self.duration = 0.0
+        self.phases = 0
+        self.error = None
+        self.skipped = False
+
+
+class SiteReport(object):
+    def __init__(self, site_id):
+        self.site_id = site_id
+        self.steps = []
+        self.started = None
+        self.finished = None
+
+    @property
+    def duration(self):
+        if self.started is None or self.finished is None:
+            return 0.0
+        return self.finished - self.started
+
+    @property
+    def error(self):
+        for step in self.steps:
+            if step.error:
+                message = step.error.get('message') if isinstance(step.error, dict) else step.error
+                return '%s: %s' % (step.name, message)
+        return None
+
+
+class RepublishOrchestrator(object):
+    def __init__(self, client, workers=8, on_progress=None):
+        self.client = client
+        self.workers = workers
+        self.on_progress = on_progress
+        self.__lock = threading.Lock()
+
+    def plan(self, site_id, template_ids=(), widget_ids=(), entry_ids=(), refresh_templates=True):
+        client = self.client
+        steps = []
+        refresh = []
+        if refresh_templates:
+            refresh.append(Step(site_id, 'refresh_templates', client.refresh_templates_for_site, (site_id,)))
+        widgets = [Step(site_id, 'refresh_widget %s' % widget_id, client.refresh_widget, (site_id, widget_id),
+                        refresh) for widget_id in widget_ids]
+        # Templates embed widgets, so they are published only after every widget has been refreshed.
+        templates = [Step(site_id, 'publish_template %s' % template_id, client.publish_template,
+                          (site_id, template_id), refresh + widgets) for template_id in template_ids]
+        steps.extend(refresh + widgets + templates)
+        if entry_ids:
+            steps.append(Step(site_id, 'publish_entries', client.publish_entries, (list(entry_ids),),
+                              templates or widgets or refresh))
+        for step in steps:
+            for dependency in step.depends_on:
+                dependency.dependents.append(step)
+        return steps
+
+    def run(self, site_ids, template_ids=(), widget_ids=(), entry_ids=None, refresh_templates=True):
+        # Template, widget and entry ids take a list for every site or a mapping of site id to ids.
+        reports = {}
+        pending = []
+        for site_id in site_ids:
+            report = reports[site_id] = SiteReport(site_id)
+            report.steps = self.plan(site_id, _for_site(template_ids, site_id), _for_site(widget_ids, site_id),
+                                     _for_site(entry_ids, site_id), refresh_templates)
+            pending.extend(report.steps)
+        remaining = [len(pending)]
+        done = threading.Event()
+        if not pending:
+            done.set()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            def finish(step):
+                ready = []
+                with self.__lock:
+                    report = reports[step.site_id]
+                    report.finished = time.time()
+                    for dependent in step.dependents:
+                        dependent.waiting -= 1
+                        if step.error or step.skipped:
+                            dependent.skipped = True
+                        if dependent.waiting == 0:
+                            ready.append(dependent)
+                    remaining[0] -= 1
+                    if remaining[0] == 0:
+                        done.set()
+                for dependent in ready:
+                    if dependent.skipped:
+                        finish(dependent)
+                    else:
+                        executor.submit(execute, dependent)
+
+            def execute(step):
+                with self.__lock:
+                    report = reports[step.site_id]
+                    if report.started is None:
+                        report.started = time.time()
+                started = time.time()
+
+                def progress(phase, response):
+                    step.phases = phase
+                    if self.on_progress:
+                        self.on_progress(step.site_id, step.name, phase, response)
+                try:
+                    with self.client.call_options(progress=progress):
+                        pager.call(step.method, *step.args)
+                except Exception as e:
+                    step.error = getattr(e, 'error', None) or str(e)
+                step.duration = time.time() - started
+                finish(step)
+
+            for step in pending:
+                if step.waiting == 0:
+                    executor.submit(execute, step)
+            done.wait()
+        return [reports[site_id] for site_id in site_ids]
+
+
+def report(results, slowest=10):
+    lines = ['%-10s %10s  %-32s %s' % ('site', 'seconds', 'slowest step', 'status')]
+    for result in sorted(results, key=lambda r: r.duration, reverse=True)[:slowest]:
+        step = max(result.steps, key=lambda s: s.duration) if result.steps else None
+        lines.append('%-10s %10.2f  %-32s %s' % (
+            result.site_id, result.duration,
+            '%s (%.2fs)' % (step.name, step.duration) if step else '-',
+            'error: %s' % result.error if result.error else 'ok'))
+    failed = sum(1 for r in results if r.error)
+    skipped = sum(1 for r in results for s in r.steps if s.skipped)
+    lines.append('%d sites, %d failed, %d steps skipped' % (len(results), failed, skipped))
+    return '\n'.join(lines)
@@ -0,0 +1,131 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Six Apart, Ltd.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import multiprocessing
+from mt_data_api.data_api import DataAPI
+from mt_data_api import pager
+import queue
+import threading
+
+_client = None
+_channel = None
+
+
+def _init_worker(state, channel):
+    global _client, _channel
+    _client = DataAPI()
+    _client.restore_session(state)
+    _channel = channel
+
+
+def _crawl_site(site_id, resources, limit, options, handler):
+    try:
+        for resource in resources:
+            list_method = pager.list_method_for(_client, resource)
+            for _, items, _ in pager.iter_pages(list_method, site_id, limit=limit, options=options):
+                if handler:
+                    items = handler(site_id, resource, items)
+                if items:
+                    _channel.put(('items', site_id, resource, items))
+        _channel.put(('done', site_id, None, None))
+    except Exception as e:
+        _channel.put(('done', site_id, None, '%s: %s' % (type(e).__name__, e)))
+
+
+class ShardedCrawler(object):
+    def __init__(self, client, resources=('entries',), processes=None, limit=100, options=None, handler=None,
+                 queue_size=64, poll_interval=0.5):
+        self.client = client
+        self.resources = list(resources)
+        self.processes = processes or multiprocessing.cpu_count()
+        self.limit = limit
+        self.options = options
+        self.handler = handler
+        self.queue_size = queue_size
+        self.poll_interval = poll_interval
+        self.errors = {}
+
+    def __site_ids(self):
+        return [site['id'] for site in pager.iter_items(self.client.list_sites, limit=self.limit,
+                                                        options={'fields': 'id'})]
+
+    def __weight(self, site_id):
+        weight = 0
+        for resource in self.resources:
+            list_method = pager.list_method_for(self.client, resource)
+            _, total = pager.fetch_page(list_method, site_id, options={'limit': 1, 'fields': 'id'})
+            weight += total
+        return weight
+
+    def weights(self, site_ids):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            return dict(zip(site_ids, executor.map(self.__weight, site_ids)))
+
+    def crawl(self, site_ids=None):
+        site_ids = list(site_ids or self.__site_ids())
+        weights = self.weights(site_ids)
+        # Largest sites first so that the pool finishes with the small ones (LPT scheduling).
+        site_ids.sort(key=lambda site_id: weights[site_id], reverse=True)
+        context = multiprocessing.get_context()
+        channel = context.Queue(self.queue_size)
+        executor = ProcessPoolExecutor(max_workers=self.processes, mp_context=context, initializer=_init_worker,
+                                       initargs=(self.client.session_state(), channel))
+        futures = []
+        finished = set()
+        try:
+            for site_id in site_ids:
+                futures.append((site_id, executor.submit(_crawl_site, site_id, self.resources, self.limit,
+                                                         self.options, self.handler)))
+            while len(finished) < len(site_ids):
+                try:
+                    kind, site_id, resource, payload = channel.get(timeout=self.poll_interval)
+                except queue.Empty:
+                    # A task that failed before it ran (unpicklable handler, broken pool) never reports 'done'.
+                    for site_id, future in futures:
+                        if site_id not in finished and future.done() and future.exception() is not None:
+                            finished.add(site_id)
+                            self.errors[site_id] = '%s: %s' % (type(future.exception()).__name__,
+                                                               future.exception())
+                    continue
+                if kind == 'done':
+                    if site_id not in finished:
+                        finished.add(site_id)
+                        if payload:
+                            self.errors[site_id] = payload
+                    continue
+                for item in payload:
+                    yield site_id, resource, item
+        finally:
+            for _, future in futures:
+                future.cancel()
+            # Sites already being crawled block on a full channel unless it is drained.
+            threading.Thread(target=_drain, args=(channel, [f for _, f in futures]), daemon=True).start()
+            executor.shutdown(wait=False)
+
+
+def _drain(channel, futures):
+    while not all(future.done() for future in futures):
+        try:
+            channel.get(timeout=0.1)
+        except queue.Empty:
+            pass
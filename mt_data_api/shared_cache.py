@@ -0,0 +1,241 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Six Apart, Ltd.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import hashlib
+import json
+from mt_data_api.http_method import HTTPMethod
+from mt_data_api.transport import Response, Transport
+import os
+import posixpath
+import re
+from requests.structures import CaseInsensitiveDict
+import sqlite3
+import threading
+import time
+import urllib.parse
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_path ON responses (path);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+'''
+
+_API_ROOT = re.compile(r'^(.*?/v\d+)(/.*)$')
+
+# Action endpoints that change resources outside their own path. Each rule yields (prefix, suffix)
+# pairs relative to the API root: cached paths under prefix that end with suffix are dropped.
+INVALIDATION_RULES = [
+    (re.compile(r'^/sites/(\d+)/refresh_templates$'),
+     lambda m, params: [('/sites/%s/templates' % m.group(1), ''), ('/sites/%s/widgets' % m.group(1), ''),
+                        ('/sites/%s/widgetsets' % m.group(1), '')]),
+    (re.compile(r'^/sites/(\d+)/templates/\d+/(refresh|publish|clone)$'),
+     lambda m, params: [('/sites/%s/templates' % m.group(1), '')]),
+    (re.compile(r'^/sites/(\d+)/widgets/\d+/(refresh|clone)$'),
+     lambda m, params: [('/sites/%s/widgets' % m.group(1), ''), ('/sites/%s/widgetsets' % m.group(1), '')]),
+    (re.compile(r'^/sites/(\d+)/(entries|pages)/(\d+)/comments(/\d+/replies)?$'),
+     lambda m, params: [('/sites/%s/comments' % m.group(1), ''),
+                        ('/sites/%s/%s/%s' % (m.group(1), m.group(2), m.group(3)), '')]),
+    (re.compile(r'^/sites/(\d+)/comments/\d+$'),
+     lambda m, params: [('/sites/%s' % m.group(1), '/comments')]),
+    (re.compile(r'^/sites/(\d+)/permissions/(grant|revoke)$'),
+     lambda m, params: [('/sites/%s/permissions' % m.group(1), ''),
+                        ('/users/%s/permissions' % params.get('user_id'), ''), ('/permissions', '')]),
+    (re.compile(r'^/users/(\d+)/permissions/(grant|revoke)$'),
+     lambda m, params: [('/users/%s/permissions' % m.group(1), ''),
+                        ('/sites/%s/permissions' % params.get('site_id'), ''), ('/permissions', '')]),
+    (re.compile(r'^/roles(/\d+)?$'),
+     lambda m, params: [('/roles', ''), ('', '/permissions')]),
+]
+
+
+def related_paths(path, params=None):
+    match = _API_ROOT.match(path.rstrip('/'))
+    if not match:
+        return []
+    root, relative = match.groups()
+    related = []
+    for pattern, rule in INVALIDATION_RULES:
+        rule_match = pattern.match(relative)
+        if rule_match:
+            related.extend((root + prefix, suffix) for prefix, suffix in rule(rule_match, params or {}))
+    return related
+
+
+class SharedCache(object):
+    def __init__(self, path, max_bytes=64 * 1024 * 1024, ttl=300.0, busy_timeout=10.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.busy_timeout = busy_timeout
+        self.__local = threading.local()
+        self.__db().executescript(_SCHEMA)
+
+    def __db(self):
+        # SQLite connections must not cross threads or a fork, so there is one per thread and process.
+        db = getattr(self.__local, 'db', None)
+        if db is None or self.__local.pid != os.getpid():
+            db = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self.__local.db = db
+            self.__local.pid = os.getpid()
+        return db
+
+    def __connection(self):
+        return _Transaction(self.__db())
+
+    def get(self, key):
+        now = time.time()
+        with self.__connection() as db:
+            row = db.execute('SELECT status, headers, body, expires FROM responses WHERE key = ?',
+                             (key,)).fetchone()
+            if row is None:
+                return None
+            if row[3] < now:
+                db.execute('DELETE FROM responses WHERE key = ?', (key,))
+                return None
+            db.execute('UPDATE responses SET accessed = ? WHERE key = ?', (now, key))
+        status, headers, body, _ = row
+        return status, json.loads(headers), bytes(body)
+
+    def put(self, key, path, status, headers, body, ttl=None):
+        now = time.time()
+        expires = now + (self.ttl if ttl is None else ttl)
+        with self.__connection() as db:
+            db.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                       (key, path, status, json.dumps(dict(headers)), sqlite3.Binary(body), len(body), expires, now))
+            self.__evict(db, now)
+
+    def __evict(self, db, now):
+        db.execute('DELETE FROM responses WHERE expires < ?', (now,))
+        total = db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        for key, size in db.execute('SELECT key, size FROM responses ORDER BY accessed').fetchall():
+            if excess <= 0:
+                break
+            db.execute('DELETE FROM responses WHERE key = ?', (key,))
+            excess -= size
+
+    def invalidate(self, path):
+        # A write drops the written path, everything below it and the collection directly above it.
+        path = path.rstrip('/')
+        parent = posixpath.dirname(path)
+        with self.__connection() as db:
+            db.execute('DELETE FROM responses WHERE path = ? OR path = ? OR substr(path, 1, ?) = ?',
+                       (path, parent, len(path) + 1, path + '/'))
+
+    def invalidate_matching(self, prefix, suffix=''):
+        prefix = prefix.rstrip('/')
+        with self.__connection() as db:
+            db.execute('DELETE FROM responses WHERE (path = ? OR substr(path, 1, ?) = ?) '
+                       "AND (? = '' OR substr(path, -?) = ?)",
+                       (prefix, len(prefix) + 1, prefix + '/', suffix, len(suffix) or 1, suffix))
+
+    def clear(self):
+        with self.__connection() as db:
+            db.execute('DELETE FROM responses')
+
+    def stats(self):
+        with self.__connection() as db:
+            count, size = db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+        return {'entries': count, 'bytes': size}
+
+
+class _Transaction(object):
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute('BEGIN IMMEDIATE')
+        return self.db
+
+    def __exit__(self, exc_type, *_):
+        self.db.execute('ROLLBACK' if exc_type else 'COMMIT')
+
+
+class CachingTransport(Transport):
+    def __init__(self, transport, cache, scope=None, ttls=None):
+        self.transport = transport
+        self.cache = cache
+        self.scope = scope
+        self.ttls = ttls or {}
+        self.hits = 0
+        self.misses = 0
+
+    def __key(self, url, params, auth, headers):
+        # Responses depend on who asks; without an explicit scope the credentials are part of the key.
+        scope = self.scope
+        if scope is None:
+            scope = [list(auth) if auth else None, (headers or {}).get('X-MT-Authorization')]
+        raw = json.dumps([url, sorted((params or {}).items()), scope], default=str)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def __ttl(self, path):
+        for suffix, ttl in self.ttls.items():
+            if path.endswith(suffix):
+                return ttl
+        return None
+
+    def request(self, method, url, params=None, files=None, auth=None, headers=None, stream=False, timeout=None):
+        path = urllib.parse.urlsplit(url).path
+        if 'no-cache' in (headers or {}).get('Cache-Control', ''):
+            return self.transport.request(method, url, params, files=files, auth=auth, headers=headers,
+                                          stream=stream, timeout=timeout)
+        if method != HTTPMethod.GET:
+            response = self.transport.request(method, url, params, files=files, auth=auth, headers=headers,
+                                              stream=stream, timeout=timeout)
+            if response is not None and response.status_code < 400:
+                self.cache.invalidate(path)
+                for prefix, suffix in related_paths(path, params):
+                    self.cache.invalidate_matching(prefix, suffix)
+            return response
+        if stream:
+            return self.transport.request(method, url, params, auth=auth, headers=headers, stream=stream,
+                                          timeout=timeout)
+        key = self.__key(url, params, auth, headers)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.hits += 1
+            status, cached_headers, body = cached
+            return Response(status, CaseInsensitiveDict(cached_headers), body)
+        self.misses += 1
+        response = self.transport.request(method, url, params, auth=auth, headers=headers, timeout=timeout)
+        if response is not None and response.status_code == 200:
+            # The body is stored decoded, so transfer headers describing the wire encoding are dropped.
+            cached_headers = dict((k, v) for k, v in response.headers.items()
+                                  if k.lower() not in ('content-encoding', 'content-length', 'transfer-encoding'))
+            self.cache.put(key, path, response.status_code, cached_headers, response.content, self.__ttl(path))
+        return response
+
+    def close(self):
+        self.transport.close()
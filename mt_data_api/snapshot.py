@@ -0,0 +1,181 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Six Apart, Ltd.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+from mt_data_api import pager
+import zlib
+
+# Content fields are compared rather than modifiedDate, which differs on every copy of an object and changes
+# without any edit (e.g. on republish). Reading body text makes snapshots of entries and pages slower and
+# larger, and changes to fields not listed here go unnoticed; pass fields= to trade one for the other.
+DEFAULT_FIELDS = {
+    'entries': ('title', 'body', 'more', 'status', 'basename'),
+    'pages': ('title', 'body', 'more', 'status', 'basename'),
+    'categories': ('label', 'basename', 'description'),
+    'folders': ('label', 'basename', 'description'),
+    'assets': ('label', 'filename', 'description', 'mimeType'),
+    'comments': ('body', 'status'),
+}
+# Other resources fall back to modifiedDate, which only compares snapshots of the same instance.
+FALLBACK_FIELDS = ('modifiedDate',)
+INCLUDE_IDS_BATCH = 50
+
+
+def fingerprint(item, fields):
+    projection = dict((k, item.get(k)) for k in fields if k != 'id')
+    raw = json.dumps(projection, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def bucket_of(key, buckets):
+    return zlib.crc32(str(key).encode('utf-8')) % buckets
+
+
+def _digest(parts):
+    sha1 = hashlib.sha1()
+    for part in parts:
+        sha1.update(part.encode('utf-8'))
+        sha1.update(b'\n')
+    return sha1.hexdigest()
+
+
+class Snapshot(object):
+    def __init__(self, buckets=64, sites=None):
+        self.buckets = buckets
+        # sites[site_id][resource][bucket] = {key: fingerprint}
+        self.sites = sites or {}
+
+    def add(self, site_id, resource, key, value):
+        site = self.sites.setdefault(str(site_id), {})
+        buckets = site.setdefault(resource, {})
+        buckets.setdefault(str(bucket_of(key, self.buckets)), {})[str(key)] = value
+
+    def bucket_hash(self, site_id, resource, bucket):
+        leaves = self.sites.get(str(site_id), {}).get(resource, {}).get(str(bucket), {})
+        return _digest('%s:%s' % kv for kv in sorted(leaves.items()))
+
+    def resource_hash(self, site_id, resource):
+        return _digest(self.bucket_hash(site_id, resource, b) for b in range(self.buckets))
+
+    def site_hash(self, site_id):
+        resources = sorted(self.sites.get(str(site_id), {}))
+        return _digest('%s:%s' % (r, self.resource_hash(site_id, r)) for r in resources)
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'buckets': self.buckets, 'sites': self.sites}, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['buckets'], data['sites'])
+
+
+def take_snapshot(client, site_ids, resources=('entries', 'pages', 'categories', 'assets'), fields=None,
+                  key='id', buckets=64, workers=4, limit=100):
+    # fields maps a resource to the fields hashed into its fingerprint; key names the field matched across
+    # instances, e.g. 'basename' when ids differ after a migration.
+    snapshot = Snapshot(buckets)
+    fields = fields or {}
+
+    def collect(site_id, resource):
+        resource_fields = tuple(fields.get(resource) or DEFAULT_FIELDS.get(resource, FALLBACK_FIELDS))
+        requested = ','.join(sorted(set(resource_fields) | {'id', key}))
+        list_method = pager.list_method_for(client, resource)
+        leaves = []
+        for item in pager.iter_items(list_method, site_id, options={'fields': requested}, limit=limit):
+            leaves.append((item.get(key), fingerprint(item, resource_fields)))
+        return site_id, resource, leaves
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(collect, site_id, resource) for site_id in site_ids for resource in resources]
+        for future in futures:
+            site_id, resource, leaves = future.result()
+            snapshot.sites.setdefault(str(site_id), {}).setdefault(resource, {})
+            for item_key, value in leaves:
+                snapshot.add(site_id, resource, item_key, value)
+    return snapshot
+
+
+class BucketDiff(object):
+    def __init__(self, site_id, resource, bucket, missing, extra, changed):
+        self.site_id = site_id
+        self.resource = resource
+        self.bucket = bucket
+        self.missing = missing
+        self.extra = extra
+        self.changed = changed
+
+
+def compare(source, target, site_map=None):
+    # Walks the hash tree top down and only descends into sites, resources and buckets that differ.
+    if source.buckets != target.buckets:
+        raise ValueError('Snapshots must use the same number of buckets')
+    site_map = dict((str(k), str(v)) for k, v in (site_map or {}).items())
+    diffs = []
+    for site_id in sorted(source.sites):
+        target_site = site_map.get(site_id, site_id)
+        if source.site_hash(site_id) == target.site_hash(target_site):
+            continue
+        resources = set(source.sites[site_id]) | set(target.sites.get(target_site, {}))
+        for resource in sorted(resources):
+            if source.resource_hash(site_id, resource) == target.resource_hash(target_site, resource):
+                continue
+            for bucket in range(source.buckets):
+                if source.bucket_hash(site_id, resource, bucket) == \
+                        target.bucket_hash(target_site, resource, bucket):
+                    continue
+                a = source.sites[site_id].get(resource, {}).get(str(bucket), {})
+                b = target.sites.get(target_site, {}).get(resource, {}).get(str(bucket), {})
+                diffs.append(BucketDiff(site_id, resource, bucket,
+                                        sorted(set(a) - set(b)), sorted(set(b) - set(a)),
+                                        sorted(k for k in set(a) & set(b) if a[k] != b[k])))
+    return diffs
+
+
+def fetch_mismatched(client, diffs, side='source', key='id', limit=INCLUDE_IDS_BATCH, site_map=None):
+    # Yields (site_id, resource, item) for the keys that differ, read in full from one side.
+    site_map = dict((str(k), str(v)) for k, v in (site_map or {}).items())
+    wanted = {}
+    for diff in diffs:
+        site_id = diff.site_id if side == 'source' else site_map.get(diff.site_id, diff.site_id)
+        keys = diff.changed + (diff.missing if side == 'source' else diff.extra)
+        if keys:
+            wanted.setdefault((site_id, diff.resource), []).extend(keys)
+    for (site_id, resource), keys in sorted(wanted.items()):
+        list_method = pager.list_method_for(client, resource)
+        if key == 'id':
+            for i in range(0, len(keys), limit):
+                batch = keys[i:i + limit]
+                items, _ = pager.fetch_page(list_method, site_id,
+                                            options={'includeIds': ','.join(batch), 'limit': len(batch)})
+                for item in items:
+                    yield site_id, resource, item
+        else:
+            # Only ids can be filtered on the server, so other keys need one full pass per resource.
+            keys = set(keys)
+            for item in pager.iter_items(list_method, site_id, limit=100):
+                if str(item.get(key)) in keys:
+                    yield site_id, resource, item
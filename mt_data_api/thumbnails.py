@@ -0,0 +1,218 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Six Apart, Ltd.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from mt_data_api.errors import DataAPIError
+import hashlib
+import json
+from mt_data_api import pager
+import os
+import threading
+import time
+
+SIZE_OPTIONS = ('width', 'height', 'scale', 'square')
+INCLUDE_IDS_BATCH = 50
+
+
+def _size_key(options):
+    return tuple(sorted((k, str(v)) for k, v in (options or {}).items() if k in SIZE_OPTIONS))
+
+
+class ThumbnailCache(object):
+    def __init__(self, directory, max_bytes=16 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.__lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.__sizes = {}
+        for name in os.listdir(directory):
+            if name.endswith('.json'):
+                self.__sizes[name] = os.path.getsize(os.path.join(directory, name))
+
+    @staticmethod
+    def key(site_id, asset_id, size, modified_date):
+        raw = json.dumps([str(site_id), str(asset_id), list(size), modified_date])
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest() + '.json'
+
+    def get(self, key):
+        path = os.path.join(self.directory, key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return value
+
+    def put(self, key, value):
+        path = os.path.join(self.directory, key)
+        data = json.dumps(value).encode('utf-8')
+        tmp_path = '%s.%d.%d.tmp' % (path, os.getpid(), threading.get_ident())
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self.__lock:
+            self.__sizes[key] = len(data)
+            self.__evict()
+
+    def __evict(self):
+        total = sum(self.__sizes.values())
+        if total <= self.max_bytes:
+            return
+        by_age = []
+        for name in self.__sizes:
+            try:
+                by_age.append((os.path.getmtime(os.path.join(self.directory, name)), name))
+            except OSError:
+                by_age.append((0, name))
+        for _, name in sorted(by_age):
+            if total <= self.max_bytes:
+                break
+            total -= self.__sizes.pop(name)
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+
+class ThumbnailService(object):
+    def __init__(self, client, cache_dir, max_bytes=16 * 1024 * 1024, workers=4, modified_ttl=60.0):
+        self.client = client
+        self.cache = ThumbnailCache(cache_dir, max_bytes)
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        # Dates looked up for bare asset ids are reused for modified_ttl seconds, so an edit can take that
+        # long to show.
+        self.modified_ttl = modified_ttl
+        self.__lock = threading.Lock()
+        self.__in_flight = {}
+        self.__dates = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __shared(self, key, fn, *args):
+        # Identical requests, within one batch or across threads, share a single call.
+        with self.__lock:
+            future = self.__in_flight.get(key)
+            if future is not None:
+                return future
+            future = self.__in_flight[key] = Future()
+
+        def run():
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                with self.__lock:
+                    self.__in_flight.pop(key, None)
+        self.executor.submit(run)
+        return future
+
+    def __cached_date(self, site_id, asset_id):
+        with self.__lock:
+            entry = self.__dates.get((str(site_id), str(asset_id)))
+        if entry is not None and entry[1] > time.monotonic():
+            return entry[0]
+        return None
+
+    def __modified_dates(self, site_id, asset_ids):
+        items, _ = pager.fetch_page(self.client.list_assets, site_id, options={
+            'includeIds': ','.join(asset_ids), 'fields': 'id,modifiedDate', 'limit': len(asset_ids)})
+        dates = dict((str(item.get('id')), item.get('modifiedDate')) for item in items)
+        expires = time.monotonic() + self.modified_ttl
+        with self.__lock:
+            for asset_id, modified_date in dates.items():
+                self.__dates[(str(site_id), asset_id)] = (modified_date, expires)
+        return dates
+
+    def __lookup(self, site_id, asset_ids):
+        # One list_assets call per batch of ids instead of a get_asset call per asset.
+        futures = {}
+        for i in range(0, len(asset_ids), INCLUDE_IDS_BATCH):
+            batch = asset_ids[i:i + INCLUDE_IDS_BATCH]
+            future = self.__shared(('assets', str(site_id), tuple(batch)), self.__modified_dates, site_id, batch)
+            futures.update((asset_id, future) for asset_id in batch)
+        return futures
+
+    def __thumbnail(self, site_id, asset_id, size, modified_date):
+        if isinstance(modified_date, Future):
+            dates = modified_date.result()
+            if str(asset_id) not in dates:
+                raise DataAPIError({'code': 404, 'message': 'Asset not found: %s' % asset_id})
+            modified_date = dates[str(asset_id)]
+        key = ThumbnailCache.key(site_id, asset_id, size, modified_date)
+        thumbnail = self.cache.get(key)
+        if thumbnail is not None:
+            with self.__lock:
+                self.hits += 1
+            return thumbnail
+        with self.__lock:
+            self.misses += 1
+        thumbnail = pager.call(self.client.get_thumbnail, site_id, asset_id, dict(size))
+        self.cache.put(key, thumbnail)
+        return thumbnail
+
+    def submit(self, site_id, asset, options=None, lookups=None):
+        if isinstance(asset, dict):
+            asset_id, modified_date = asset['id'], asset.get('modifiedDate')
+        else:
+            asset_id, modified_date = asset, None
+        if modified_date is None:
+            modified_date = self.__cached_date(site_id, asset_id)
+        if modified_date is None:
+            asset_id = str(asset_id)
+            modified_date = (lookups or {}).get(asset_id) or self.__lookup(site_id, [asset_id])[asset_id]
+        size = _size_key(options)
+        return self.__shared(('thumbnail', str(site_id), str(asset_id), size), self.__thumbnail,
+                             site_id, asset_id, size, modified_date)
+
+    def thumbnails(self, site_id, requests, return_exceptions=False):
+        requests = list(requests)
+        missing = []
+        for asset, _ in requests:
+            if not isinstance(asset, dict) or asset.get('modifiedDate') is None:
+                asset_id = str(asset['id'] if isinstance(asset, dict) else asset)
+                if asset_id not in missing and self.__cached_date(site_id, asset_id) is None:
+                    missing.append(asset_id)
+        lookups = self.__lookup(site_id, missing)
+        futures = [self.submit(site_id, asset, options, lookups) for asset, options in requests]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                results.append(e)
+        return results
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,259 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Six Apart, Ltd.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from concurrent.futures import ThreadPoolExecutor
+import gzip
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+from mt_data_api.http_method import HTTPMethod
+import os
+from mt_data_api.transport import RequestsTransport, Response, Transport
+import threading
+import time
+import urllib.parse
+
+REDACTED_KEYS = frozenset(['password', 'username', 'accessToken', 'sessionId', 'sessionID', 'token'])
+MAX_PARAM_LENGTH = 256
+
+
+def _open(path, mode):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def _compact_params(params):
+    if not params:
+        return None
+    compacted = {}
+    for key, value in params.items():
+        if key in REDACTED_KEYS:
+            compacted[key] = '[REDACTED]'
+        elif isinstance(value, (str, bytes)) and len(value) > MAX_PARAM_LENGTH:
+            compacted[key] = {'$size': len(value)}
+        else:
+            compacted[key] = value
+    return compacted
+
+
+def _expand_params(params):
+    if not params:
+        return None
+    expanded = {}
+    for key, value in params.items():
+        if isinstance(value, dict) and '$size' in value:
+            expanded[key] = 'x' * value['$size']
+        else:
+            expanded[key] = value
+    return expanded
+
+
+def read_records(path):
+    with _open(path, 'r') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _upload_size(value):
+    data = value[1] if isinstance(value, tuple) else value
+    if isinstance(data, (bytes, bytearray, str)):
+        return len(data)
+    # File objects are not read here; their size comes from the file or the buffer behind it.
+    try:
+        return os.fstat(data.fileno()).st_size
+    except (AttributeError, OSError, ValueError):
+        pass
+    try:
+        return data.getbuffer().nbytes
+    except (AttributeError, ValueError):
+        return None
+
+
+def _response_size(response, stream):
+    if response is None:
+        return 0
+    if stream:
+        # Reading the body here would consume the stream the caller is about to read.
+        return int(response.headers.get('Content-Length') or 0)
+    return len(response.content)
+
+
+class RecordingTransport(Transport):
+    def __init__(self, transport, path):
+        self.transport = transport
+        self.path = path
+        self.__file = _open(path, 'w')
+        self.__lock = threading.Lock()
+        self.__started = time.monotonic()
+
+    def request(self, method, url, params=None, files=None, auth=None, headers=None, stream=False, timeout=None):
+        started = time.monotonic()
+        response = None
+        try:
+            response = self.transport.request(method, url, params, files=files, auth=auth, headers=headers,
+                                              stream=stream, timeout=timeout)
+            return response
+        finally:
+            record = {
+                't': round(started - self.__started, 6),
+                'm': method.name,
+                'u': urllib.parse.urlsplit(url).path,
+                'p': _compact_params(params),
+                'd': round(time.monotonic() - started, 6),
+                's': response.status_code if response is not None else None,
+                'n': _response_size(response, stream),
+            }
+            if files:
+                record['f'] = dict((k, _upload_size(v)) for k, v in files.items())
+            line = json.dumps(record, separators=(',', ':'))
+            with self.__lock:
+                self.__file.write(line + '\n')
+
+    def close(self):
+        with self.__lock:
+            self.__file.close()
+        self.transport.close()
+
+
+class FakeTransport(Transport):
+    def __init__(self, responses=None, latency=0.0):
+        self.responses = responses or {}
+        self.latency = latency
+
+    @classmethod
+    def from_recording(cls, path, latency=0.0):
+        responses = {}
+        for record in read_records(path):
+            responses[(record['m'], record['u'])] = (record['s'] or 500, record['n'], record['d'])
+        return cls(responses, latency)
+
+    def respond(self, method_name, path):
+        status, size, duration = self.responses.get((method_name, path), (200, 0, 0.0))
+        delay = duration * self.latency
+        if delay:
+            time.sleep(delay)
+        # A JSON document padded to the recorded response size.
+        body = b'{"items":[],"pad":"' + b'x' * max(size - 20, 0) + b'"}'
+        return status, body
+
+    def request(self, method, url, params=None, files=None, auth=None, headers=None, stream=False, timeout=None):
+        status, body = self.respond(method.name, urllib.parse.urlsplit(url).path)
+        return Response(status, {'Content-Type': 'application/json'}, body)
+
+
+class StandInServer(object):
+    def __init__(self, fake, host='127.0.0.1', port=0):
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *_):
+                pass
+
+            def handle_method(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    self.rfile.read(length)
+                status, body = fake.respond(self.command, urllib.parse.urlsplit(self.path).path)
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = do_PUT = do_DELETE = handle_method
+
+        self.__server = ThreadingHTTPServer((host, port), Handler)
+        self.__server.daemon_threads = True
+        self.url = 'http://%s:%d' % self.__server.server_address
+
+    def start(self):
+        threading.Thread(target=self.__server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.__server.shutdown()
+        self.__server.server_close()
+
+
+class ReplayStats(object):
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.bytes = 0
+        self.elapsed = 0.0
+        self.latencies = []
+
+    def throughput(self):
+        return self.requests / self.elapsed if self.elapsed else 0.0
+
+    def percentile(self, p):
+        if not self.latencies:
+            return 0.0
+        latencies = sorted(self.latencies)
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p / 100.0))]
+
+    def __str__(self):
+        return '%d requests (%d errors, %d bytes) in %.3fs: %.1f req/s, p50 %.1fms, p99 %.1fms' % (
+            self.requests, self.errors, self.bytes, self.elapsed, self.throughput(),
+            self.percentile(50) * 1000, self.percentile(99) * 1000)
+
+
+def replay(path, transport=None, base_url='', speed=1.0, concurrency=8):
+    if transport is None:
+        transport = RequestsTransport()
+    stats = ReplayStats()
+    lock = threading.Lock()
+
+    def send(record):
+        files = None
+        if record.get('f'):
+            files = dict((k, (k, b'x' * (n or 0))) for k, n in record['f'].items())
+        started = time.monotonic()
+        ok = False
+        size = 0
+        try:
+            response = transport.request(HTTPMethod[record['m']], base_url + record['u'],
+                                         _expand_params(record.get('p')), files=files)
+            ok = response.status_code == record['s']
+            size = len(response.content)
+        except Exception:
+            pass
+        with lock:
+            stats.requests += 1
+            stats.errors += 0 if ok else 1
+            stats.bytes += size
+            stats.latencies.append(time.monotonic() - started)
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = threading.BoundedSemaphore(concurrency * 2)
+        for record in read_records(path):
+            # speed multiplies the recorded pace; 0 or None replays as fast as possible.
+            if speed:
+                delay = record['t'] / speed - (time.monotonic() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            pending.acquire()
+            executor.submit(send, record).add_done_callback(lambda _: pending.release())
+    stats.elapsed = time.monotonic() - started
+    return stats
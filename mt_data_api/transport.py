@@ -0,0 +1,190 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Six Apart, Ltd.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import json
+from mt_data_api.errors import ConnectionFailed, RequestTimeout
+from mt_data_api.http_method import HTTPMethod
+import requests
+import urllib.parse
+import urllib3
+
+
+class Response(object):
+    def __init__(self, status_code, headers, content=b'', chunks=None, release=None):
+        self.status_code = status_code
+        self.headers = headers
+        self.__content = content
+        self.__chunks = chunks
+        self.__release = release
+
+    @property
+    def content(self):
+        if self.__chunks is not None:
+            self.__content = b''.join(self.iter_content())
+        return self.__content
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', 'replace')
+
+    def json(self):
+        return json.loads(self.text)
+
+    def iter_content(self, chunk_size=65536):
+        if self.__chunks is None:
+            content = self.__content
+            for i in range(0, len(content), chunk_size):
+                yield content[i:i + chunk_size]
+            return
+        chunks, self.__chunks = self.__chunks, None
+        try:
+            for chunk in chunks(chunk_size):
+                yield chunk
+        finally:
+            self.close()
+
+    def close(self):
+        if self.__release:
+            self.__release()
+            self.__release = None
+
+
+class Transport(object):
+    def request(self, method, url, params=None, files=None, auth=None, headers=None, stream=False, timeout=None):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class RequestsTransport(Transport):
+    def request(self, method, url, params=None, files=None, auth=None, headers=None, stream=False, timeout=None):
+        try:
+            return self.__request(method, url, params, files, auth, headers, stream, timeout)
+        except requests.exceptions.Timeout as e:
+            raise RequestTimeout(str(e))
+        except requests.exceptions.ConnectionError as e:
+            raise ConnectionFailed(str(e))
+
+    @classmethod
+    def __request(cls, method, url, params, files, auth, headers, stream, timeout):
+        if method == HTTPMethod.GET:
+            return requests.get(url, params, auth=auth, headers=headers, stream=stream, timeout=timeout)
+        elif method == HTTPMethod.POST:
+            return requests.post(url, params, files=files, auth=auth, headers=headers, stream=stream,
+                                 timeout=timeout)
+        elif method == HTTPMethod.PUT:
+            return requests.put(url, params, auth=auth, headers=headers, stream=stream, timeout=timeout)
+        elif method == HTTPMethod.DELETE:
+            return requests.delete(url, auth=auth, headers=headers, stream=stream, timeout=timeout)
+
+
+class HTTP2Transport(Transport):
+    def __init__(self, http2=True, **client_options):
+        try:
+            import httpx
+        except ImportError:
+            raise ImportError('HTTP2Transport requires httpx: pip install "httpx[http2]"')
+        self.__httpx = httpx
+        self.__client = httpx.Client(http2=http2, **client_options)
+
+    def __timeout(self, timeout):
+        if timeout is None:
+            return self.__client.timeout
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            return self.__httpx.Timeout(read, connect=connect)
+        return self.__httpx.Timeout(timeout)
+
+    def request(self, method, url, params=None, files=None, auth=None, headers=None, stream=False, timeout=None):
+        timeout = self.__timeout(timeout)
+        if method in (HTTPMethod.GET, HTTPMethod.DELETE):
+            query = params if method == HTTPMethod.GET else None
+            request = self.__client.build_request(method.name, url, params=query, headers=headers,
+                                                  timeout=timeout)
+        else:
+            request = self.__client.build_request(method.name, url, data=params, files=files, headers=headers,
+                                                  timeout=timeout)
+        try:
+            response = self.__client.send(request, auth=auth, stream=stream)
+        except self.__httpx.TimeoutException as e:
+            raise RequestTimeout(str(e))
+        except self.__httpx.NetworkError as e:
+            raise ConnectionFailed(str(e))
+        if stream:
+            return Response(response.status_code, response.headers, chunks=response.iter_bytes,
+                            release=response.close)
+        return Response(response.status_code, response.headers, response.content)
+
+    def close(self):
+        self.__client.close()
+
+
+class Urllib3Transport(Transport):
+    def __init__(self, **pool_options):
+        self.__pool = urllib3.PoolManager(**pool_options)
+
+    def request(self, method, url, params=None, files=None, auth=None, headers=None, stream=False, timeout=None):
+        if isinstance(timeout, tuple):
+            timeout = urllib3.Timeout(connect=timeout[0], read=timeout[1])
+        elif timeout is None:
+            timeout = urllib3.Timeout.DEFAULT_TIMEOUT
+        try:
+            return self.__request(method, url, params, files, auth, headers, stream, timeout)
+        except (urllib3.exceptions.NewConnectionError, urllib3.exceptions.ProtocolError) as e:
+            raise ConnectionFailed(str(e))
+        except urllib3.exceptions.TimeoutError as e:
+            raise RequestTimeout(str(e))
+        except urllib3.exceptions.MaxRetryError as e:
+            # NewConnectionError derives from TimeoutError in urllib3, so it is checked first.
+            if isinstance(e.reason, urllib3.exceptions.NewConnectionError):
+                raise ConnectionFailed(str(e))
+            if isinstance(e.reason, urllib3.exceptions.TimeoutError):
+                raise RequestTimeout(str(e))
+            raise ConnectionFailed(str(e))
+
+    def __request(self, method, url, params, files, auth, headers, stream, timeout):
+        headers = dict(headers or {})
+        if auth:
+            headers.update(urllib3.make_headers(
+                basic_auth='%s:%s' % auth))
+        if method in (HTTPMethod.GET, HTTPMethod.DELETE):
+            fields = params if method == HTTPMethod.GET else None
+            response = self.__pool.request(method.name, url, fields=fields, headers=headers,
+                                           preload_content=not stream, timeout=timeout)
+        elif files:
+            fields = dict((k, str(v)) for k, v in (params or {}).items())
+            fields.update(files)
+            response = self.__pool.request(method.name, url, fields=fields, headers=headers,
+                                           preload_content=not stream, timeout=timeout)
+        else:
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            body = urllib.parse.urlencode(params or {}, doseq=True)
+            response = self.__pool.request(method.name, url, body=body, headers=headers,
+                                           preload_content=not stream, timeout=timeout)
+        if stream:
+            return Response(response.status, response.headers, chunks=response.stream,
+                            release=response.release_conn)
+        return Response(response.status, response.headers, response.data)
+
+    def close(self):
+        self.__pool.clear()
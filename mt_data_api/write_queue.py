@@ -0,0 +1,275 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Six Apart, Ltd.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+import json
+from mt_data_api import pager
+import os
+import threading
+import time
+import uuid
+
+OPERATIONS = frozenset([
+    'create_comment_for_entry',
+    'create_comment_for_page',
+    'create_reply_comment_for_entry',
+    'create_reply_comment_for_page',
+    'create_log',
+])
+
+
+class Journal(object):
+    def __init__(self, path, fsync=True):
+        self.path = path
+        self.fsync = fsync
+        self.__lock = threading.Lock()
+        self.__file = None
+        self.lines = 0
+
+    def load(self):
+        pending = {}
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-write.
+                    continue
+                if record['op'] == 'add':
+                    pending[record['id']] = record
+                else:
+                    pending.pop(record['id'], None)
+        return sorted(pending.values(), key=lambda r: r['seq'])
+
+    def compact(self, pending):
+        with self.__lock:
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for record in pending:
+                    f.write(json.dumps(record) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            if self.__file:
+                self.__file.close()
+            try:
+                os.replace(tmp_path, self.path)
+                self.lines = len(pending)
+            finally:
+                self.__file = open(self.path, 'a', encoding='utf-8')
+
+    def append(self, *records):
+        with self.__lock:
+            if self.__file is None:
+                raise RuntimeError('The journal %s is not open; start the queue first' % self.path)
+            self.lines += len(records)
+            for record in records:
+                self.__file.write(json.dumps(record) + '\n')
+            self.__file.flush()
+            if self.fsync:
+                os.fsync(self.__file.fileno())
+
+    def close(self):
+        with self.__lock:
+            if self.__file:
+                self.__file.close()
+                self.__file = None
+
+
+class WriteBehindQueue(object):
+    def __init__(self, client, journal_path, batch_size=20, workers=4, flush_interval=0.5, max_attempts=5,
+                 retry_delay=1.0, fsync=True, on_dead=None, compact_after=1000):
+        self.client = client
+        self.journal = Journal(journal_path, fsync)
+        self.batch_size = batch_size
+        self.workers = workers
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.on_dead = on_dead
+        self.compact_after = compact_after
+        self.flushed = 0
+        self.dead = 0
+        self.errors = deque(maxlen=100)
+        self.__queue = deque()
+        self.__in_flight = 0
+        self.__seq = 0
+        self.__cond = threading.Condition()
+        self.__stopping = False
+        self.__thread = None
+        self.__executor = None
+
+    def start(self):
+        pending = self.journal.load()
+        self.journal.compact(pending)
+        with self.__cond:
+            for record in pending:
+                self.__seq = max(self.__seq, record['seq'])
+                self.__queue.append(dict(record, attempts=0, next_at=0.0))
+        self.__executor = ThreadPoolExecutor(max_workers=self.workers)
+        self.__thread = threading.Thread(target=self.__run, name='WriteBehindQueue', daemon=True)
+        self.__thread.start()
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *_):
+        self.close()
+
+    @property
+    def pending(self):
+        with self.__cond:
+            return len(self.__queue) + self.__in_flight
+
+    def enqueue(self, method, *args, **kwargs):
+        if method not in OPERATIONS:
+            raise ValueError('%s cannot be queued' % method)
+        with self.__cond:
+            if self.__thread is None or self.__stopping:
+                raise RuntimeError('The queue is not running; call start() before enqueueing writes')
+            self.__seq += 1
+            record = {'op': 'add', 'id': uuid.uuid4().hex, 'seq': self.__seq, 'method': method,
+                      'args': list(args), 'kwargs': kwargs}
+            # Journal before acknowledging so that an accepted write survives a crash.
+            self.journal.append(record)
+            self.__queue.append(dict(record, attempts=0, next_at=0.0))
+            self.__cond.notify_all()
+        return record['id']
+
+    def create_comment_for_entry(self, site_id, entry_id, comment, options=None):
+        return self.enqueue('create_comment_for_entry', site_id, entry_id, comment, options=options)
+
+    def create_comment_for_page(self, site_id, page_id, comment, options=None):
+        return self.enqueue('create_comment_for_page', site_id, page_id, comment, options=options)
+
+    def create_reply_comment_for_entry(self, site_id, entry_id, comment_id, reply, options=None):
+        return self.enqueue('create_reply_comment_for_entry', site_id, entry_id, comment_id, reply,
+                            options=options)
+
+    def create_reply_comment_for_page(self, site_id, page_id, comment_id, reply, options=None):
+        return self.enqueue('create_reply_comment_for_page', site_id, page_id, comment_id, reply,
+                            options=options)
+
+    def create_log(self, site_id, log, options=None):
+        return self.enqueue('create_log', site_id, log, options=options)
+
+    def __take_batch(self):
+        with self.__cond:
+            while True:
+                if self.__stopping:
+                    return []
+                now = time.monotonic()
+                ready = [r for r in self.__queue if r['next_at'] <= now][:self.batch_size]
+                if ready:
+                    break
+                timeout = self.flush_interval
+                if self.__queue:
+                    timeout = min(timeout, min(r['next_at'] for r in self.__queue) - now)
+                self.__cond.wait(timeout)
+            for record in ready:
+                self.__queue.remove(record)
+            self.__in_flight += len(ready)
+            return ready
+
+    def __send(self, record):
+        method = getattr(self.client, record['method'])
+        pager.call(method, *record['args'], **record['kwargs'])
+
+    def __run(self):
+        while True:
+            batch = self.__take_batch()
+            if not batch:
+                return
+            try:
+                self.__process(batch)
+            finally:
+                with self.__cond:
+                    self.__in_flight -= len(batch)
+                    self.__cond.notify_all()
+
+    def __process(self, batch):
+        # Errors from on_dead or the journal are kept in errors so they cannot stop the flush thread.
+        futures = dict((self.__executor.submit(self.__send, record), record) for record in batch)
+        wait(futures)
+        acknowledged = []
+        for future, record in futures.items():
+            error = future.exception()
+            if error is None:
+                acknowledged.append({'op': 'done', 'id': record['id']})
+                self.flushed += 1
+                continue
+            record['attempts'] += 1
+            if record['attempts'] >= self.max_attempts:
+                acknowledged.append({'op': 'dead', 'id': record['id'], 'error': str(error)})
+                self.dead += 1
+                if self.on_dead:
+                    try:
+                        self.on_dead(record, error)
+                    except Exception as e:
+                        self.errors.append(e)
+                continue
+            record['next_at'] = time.monotonic() + self.retry_delay * 2 ** (record['attempts'] - 1)
+            with self.__cond:
+                self.__queue.append(record)
+        if acknowledged:
+            try:
+                self.journal.append(*acknowledged)
+            except Exception as e:
+                # Unacknowledged writes are replayed on the next start, so delivery stays at least once.
+                self.errors.append(e)
+        self.__compact()
+
+    def __compact(self):
+        # Rewrites the journal once finished writes dominate it, so a long-running process does not
+        # grow it until the next start. Holding the condition keeps enqueue() from appending meanwhile.
+        with self.__cond:
+            if self.journal.lines < self.compact_after or self.journal.lines < 2 * len(self.__queue):
+                return
+            pending = [dict((k, v) for k, v in record.items() if k not in ('attempts', 'next_at'))
+                       for record in sorted(self.__queue, key=lambda r: r['seq'])]
+            try:
+                self.journal.compact(pending)
+            except Exception as e:
+                self.errors.append(e)
+
+    def flush(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.__cond:
+            self.__cond.notify_all()
+            while self.__queue or self.__in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.__cond.wait(remaining)
+        return True
+
+    def close(self, timeout=None):
+        self.flush(timeout)
+        with self.__cond:
+            self.__stopping = True
+            self.__cond.notify_all()
+        self.__thread.join(timeout)
+        self.__executor.shutdown()
+        self.journal.close()
@@ -12,6 +12,14 @@ setup(name='mt-data-api',
       author_email='masahiro.iuchi@gmail.com',
       url='https://github.com/masiuchi/mt-data-api-sdk-python',
       license='MIT License',
+      python_requires='>=3.7',
+      entry_points={
+          'console_scripts': ['mt-data-api=mt_data_api.cli:main'],
+      },
+      extras_require={
+          'arrow': ['pyarrow'],
+          'http2': ['httpx[http2]'],
+      },
       keywords='movabletype data-api sdk',
       classifiers=[
           'Development Status :: 2 - Pre-Alpha',
@@ -19,9 +27,10 @@ setup(name='mt-data-api',
           'License :: OSI Approved :: MIT License',
           'Programming Language :: Python',
           'Programming Language :: Python :: 3',
-          'Programming Language :: Python :: 3.3',
-          'Programming Language :: Python :: 3.4',
-          'Programming Language :: Python :: 3.5',
-          'Programming Language :: Python :: 3.6',
+          'Programming Language :: Python :: 3.7',
+          'Programming Language :: Python :: 3.8',
+          'Programming Language :: Python :: 3.9',
+          'Programming Language :: Python :: 3.10',
+          'Programming Language :: Python :: 3.11',
       ],
       )
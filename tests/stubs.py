@@ -0,0 +1,23 @@
+import json
+from mt_data_api.data_api import DataAPI
+from mt_data_api.transport import Response, Transport
+
+
+class StubTransport(Transport):
+    def __init__(self, respond=None):
+        self.requests = []
+        self.respond = respond or (lambda method, url, params: {})
+
+    def request(self, method, url, params=None, files=None, auth=None, headers=None, stream=False, timeout=None):
+        self.requests.append((method, url, params, files, headers))
+        body = self.respond(method, url, params)
+        if isinstance(body, Response):
+            return body
+        return Response(200, {}, json.dumps(body).encode('utf-8'))
+
+
+def stub_client(respond=None):
+    client = DataAPI()
+    client.api_base_url = 'http://mt.example/mt-data-api.cgi'
+    client.transport = StubTransport(respond)
+    return client
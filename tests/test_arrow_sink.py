@@ -0,0 +1,93 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from mt_data_api import arrow_sink
+from tests.stubs import stub_client
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+ENTRY = {
+    'id': '12',
+    'blog': {'id': 3},
+    'class': 'entry',
+    'status': 'Publish',
+    'title': 'Hello',
+    'author': {'id': 4, 'displayName': 'Author'},
+    'tags': ['a', 'b'],
+    'categories': [{'id': 5}, {'id': '6'}],
+    'assets': [],
+    'commentCount': 2,
+}
+
+
+def respond(method, url, params):
+    offset, limit = int(params['offset']), int(params['limit'])
+    items = [dict(ENTRY, id=i) for i in range(offset, min(offset + limit, 5))]
+    return {'items': items, 'totalResults': 5}
+
+
+@unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+class ArrowSinkTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def test_parquet_columns_follow_the_schema(self):
+        with arrow_sink.ArrowSink(self.path('entries.parquet'), 'entries') as sink:
+            sink.write_items([ENTRY, {'id': 'x', 'tags': 'not a list'}])
+        table = pyarrow.parquet.read_table(self.path('entries.parquet'))
+        self.assertEqual(table.schema, arrow_sink.schema_for('entries'))
+        rows = table.to_pylist()
+        self.assertEqual(rows[0]['id'], 12)
+        self.assertEqual(rows[0]['blog_id'], 3)
+        self.assertEqual(rows[0]['author_name'], 'Author')
+        self.assertEqual(rows[0]['tags'], ['a', 'b'])
+        self.assertEqual(rows[0]['category_ids'], [5, 6])
+        self.assertEqual(rows[0]['asset_ids'], [])
+        self.assertEqual(rows[0]['comment_count'], 2)
+        self.assertIsNone(rows[1]['id'])
+        self.assertIsNone(rows[1]['blog_id'])
+        self.assertIsNone(rows[1]['tags'])
+
+    def test_arrow_file_is_written_in_batches(self):
+        with arrow_sink.ArrowSink(self.path('entries.arrow'), 'entries', format='arrow', batch_size=2) as sink:
+            sink.write_pages([[ENTRY] * 3, (3, [ENTRY] * 2, 5)])
+        self.assertEqual(sink.rows, 5)
+        reader = pyarrow.ipc.open_file(self.path('entries.arrow'))
+        self.assertEqual(reader.num_record_batches, 3)
+        self.assertEqual(reader.read_all().num_rows, 5)
+
+    def test_unknown_resource_keeps_the_raw_item(self):
+        item = {'id': 7, 'name': 'widget', 'nested': {'x': 1}}
+        with arrow_sink.ArrowSink(self.path('widgets.parquet'), 'widgets') as sink:
+            sink.write_items([item])
+        row = pyarrow.parquet.read_table(self.path('widgets.parquet')).to_pylist()[0]
+        self.assertEqual(row['id'], 7)
+        self.assertEqual(json.loads(row['json']), item)
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            arrow_sink.ArrowSink(self.path('entries.csv'), 'entries', format='csv')
+
+    def test_export_list_pages_through_the_client(self):
+        client = stub_client(respond)
+        rows = arrow_sink.export_list(client.list_entries, 1, path=self.path('entries.parquet'),
+                                      resource='entries', limit=2)
+        self.assertEqual(rows, 5)
+        table = pyarrow.parquet.read_table(self.path('entries.parquet'))
+        self.assertEqual(table.column('id').to_pylist(), list(range(5)))
+
+
+if __name__ == '__main__':
+    unittest.main()
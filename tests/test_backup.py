@@ -0,0 +1,66 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import requests
+
+from mt_data_api.backup import BackupManager
+from mt_data_api.transport import Response
+
+
+def _chunks(parts):
+    def chunks(chunk_size):
+        for part in parts:
+            if isinstance(part, Exception):
+                raise part
+            yield part
+    return chunks
+
+
+class FakeClient(object):
+    api_base_url = 'http://mt.example/mt-data-api.cgi'
+
+    def __init__(self, responses):
+        self.responses = responses
+
+    def backup_site_stream(self, site_id, options=None, success=None, failure=None):
+        success(self.responses[site_id]())
+
+
+class BackupManagerTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_encoded_response_is_not_checked_against_wire_headers(self):
+        body = json.dumps({'status': 'Complete', 'backupFiles': []}).encode('utf-8')
+        headers = {'Content-Encoding': 'gzip', 'Content-Length': '12', 'Content-MD5': 'AAAAAAAAAAAAAAAAAAAAAA=='}
+        client = FakeClient({1: lambda: Response(200, headers, chunks=_chunks([body]))})
+        result = BackupManager(client, self.directory).backup(1)
+        self.assertIsNone(result.error)
+        self.assertEqual(result.files[0].size, len(body))
+
+    def test_size_mismatch_is_reported(self):
+        body = b'{"backupFiles": []}'
+        client = FakeClient({1: lambda: Response(200, {'Content-Length': '99'}, chunks=_chunks([body]))})
+        result = BackupManager(client, self.directory).backup(1)
+        self.assertIn('expected 99 bytes', str(result.error))
+
+    def test_read_error_fails_only_its_site(self):
+        broken = [b'{"backup', requests.exceptions.ChunkedEncodingError('connection broken')]
+        client = FakeClient({
+            1: lambda: Response(200, {}, chunks=_chunks(broken)),
+            2: lambda: Response(200, {}, chunks=_chunks([b'{"backupFiles": []}'])),
+        })
+        results = BackupManager(client, self.directory, workers=2).run([1, 2])
+        self.assertIsInstance(results[0].error, requests.exceptions.ChunkedEncodingError)
+        self.assertIsNone(results[1].error)
+        self.assertFalse(os.path.exists(os.path.join(self.directory, 'site-1', 'backup.json.part')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+import threading
+import unittest
+from unittest import mock
+
+from mt_data_api import deadline
+from mt_data_api.deadline import CancelToken, Deadline, run_cancellable
+from mt_data_api.errors import Cancelled, DeadlineExceeded, RequestTimeout
+from mt_data_api.transport import Response
+from tests.stubs import stub_client
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+
+class ClockTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.object(deadline, 'time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class DeadlineTest(ClockTestCase):
+    def test_cap(self):
+        d = Deadline(5)
+        self.assertEqual(d.cap(None), 5)
+        self.assertEqual(d.cap(3), 3)
+        self.assertEqual(d.cap(30), 5)
+        self.assertEqual(d.cap((3, 30)), (3, 5))
+        self.assertEqual(d.cap((None, 2)), (5, 2))
+        self.clock.now = 4.0
+        self.assertEqual(d.cap((3, 30)), (1, 1))
+
+    def test_expired_deadline_caps_to_a_minimal_timeout(self):
+        d = Deadline(1)
+        self.clock.now = 2.0
+        self.assertEqual(d.cap(10), 0.001)
+        self.assertEqual(d.cap((None, None)), (0.001, 0.001))
+
+    def test_check(self):
+        d = Deadline(1)
+        d.check()
+        self.clock.now = 1.0
+        with self.assertRaises(DeadlineExceeded):
+            d.check()
+
+
+class CancelTokenTest(unittest.TestCase):
+    def test_callbacks_run_once_on_cancel(self):
+        token = CancelToken()
+        calls = []
+        token.add_callback(lambda: calls.append('a'))
+
+        def removed():
+            calls.append('removed')
+        token.add_callback(removed)
+        token.remove_callback(removed)
+        token.check()
+        token.cancel()
+        token.cancel()
+        self.assertTrue(token.cancelled)
+        self.assertEqual(calls, ['a'])
+        token.add_callback(lambda: calls.append('late'))
+        self.assertEqual(calls, ['a', 'late'])
+        with self.assertRaises(Cancelled):
+            token.check()
+
+
+class RunCancellableTest(unittest.TestCase):
+    def test_returns_the_response_or_raises_the_error(self):
+        response = Response(200, {}, b'{}')
+        self.assertIs(run_cancellable(lambda: response, CancelToken()), response)
+
+        def fail():
+            raise RequestTimeout()
+        with self.assertRaises(RequestTimeout):
+            run_cancellable(fail, CancelToken())
+
+    def test_cancelled_token_does_not_send(self):
+        token = CancelToken()
+        token.cancel()
+        sent = []
+        with self.assertRaises(Cancelled):
+            run_cancellable(lambda: sent.append(1), token)
+        self.assertEqual(sent, [])
+
+    def test_cancel_releases_the_caller_and_closes_the_late_response(self):
+        token = CancelToken()
+        started, finish, released = threading.Event(), threading.Event(), threading.Event()
+
+        def send():
+            started.set()
+            finish.wait(5)
+            return Response(200, {}, chunks=iter([b'{}']), release=released.set)
+
+        threading.Thread(target=lambda: started.wait(5) and token.cancel()).start()
+        with self.assertRaises(Cancelled):
+            run_cancellable(send, token)
+        self.assertFalse(released.is_set())
+        finish.set()
+        self.assertTrue(released.wait(5))
+
+
+class ClientTest(ClockTestCase):
+    def setUp(self):
+        super(ClientTest, self).setUp()
+        self.client = stub_client(lambda method, url, params: {'items': [], 'totalResults': 0})
+        self.client.timeout = 30
+
+    def test_deadline_caps_the_request_timeout(self):
+        timeouts = []
+        request = self.client.transport.request
+
+        def record(*args, **kwargs):
+            timeouts.append(kwargs['timeout'])
+            return request(*args, **kwargs)
+        self.client.transport.request = record
+        with self.client.call_options(deadline=5):
+            self.client.list_sites()
+            self.clock.now = 3.0
+            with self.client.call_options(deadline=60, timeout=10):
+                self.client.list_sites()
+        with self.client.call_options(timeout=10):
+            self.client.list_sites()
+        self.assertEqual(timeouts, [5, 2, 10])
+
+    def test_expired_deadline_raises_before_sending(self):
+        with self.client.call_options(deadline=1):
+            self.clock.now = 1.0
+            with self.assertRaises(DeadlineExceeded):
+                self.client.list_sites()
+        self.assertEqual(self.client.transport.requests, [])
+
+    def test_cancelled_token_raises_before_sending(self):
+        token = CancelToken()
+        token.cancel()
+        with self.client.call_options(cancel=token):
+            with self.assertRaises(Cancelled):
+                self.client.list_sites()
+        self.assertEqual(self.client.transport.requests, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import gzip
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import unittest
+
+from mt_data_api.cli import Exporter, main
+from mt_data_api.errors import DataAPIError
+from mt_data_api import pager
+from tests.stubs import stub_client
+
+SITES = {'1': {'entries': 7, 'pages': 2}, '2': {'entries': 3, 'pages': 0}}
+
+
+def respond(method, url, params):
+    if url.endswith('/sites'):
+        return {'items': [{'id': int(site_id)} for site_id in sorted(SITES)], 'totalResults': len(SITES)}
+    match = re.search(r'/sites/(\d+)/(\w+)$', url)
+    site_id, resource = match.groups()
+    if site_id == '2' and resource == 'entries' and int(params['offset']) > 0:
+        return {'error': {'code': 500, 'message': 'Internal Server Error'}}
+    total = SITES[site_id][resource]
+    offset, limit = int(params['offset']), int(params['limit'])
+    items = [{'id': i, 'site': int(site_id), 'resource': resource} for i in range(offset, min(offset + limit, total))]
+    return {'items': items, 'totalResults': total}
+
+
+class PagerTest(unittest.TestCase):
+    def setUp(self):
+        self.client = stub_client(respond)
+
+    def test_iter_items_walks_every_page(self):
+        items = list(pager.iter_items(self.client.list_entries, 1, limit=3))
+        self.assertEqual([item['id'] for item in items], list(range(7)))
+        offsets = [int(request[2]['offset']) for request in self.client.transport.requests]
+        self.assertEqual(offsets, [0, 3, 6])
+
+    def test_iter_pages_reports_offsets_and_totals(self):
+        pages = [(offset, len(items), total) for offset, items, total in
+                 pager.iter_pages(self.client.list_entries, 1, limit=5)]
+        self.assertEqual(pages, [(0, 5, 7), (5, 2, 7)])
+
+    def test_call_raises_data_api_errors(self):
+        with self.assertRaises(DataAPIError):
+            pager.fetch_page(self.client.list_entries, 2, options={'offset': 5, 'limit': 5})
+
+    def test_unknown_resource(self):
+        self.assertEqual(pager.list_method_for(self.client, 'pages'), self.client.list_pages)
+        with self.assertRaises(ValueError):
+            pager.list_method_for(self.client, 'widgets-and-more')
+
+
+class ExporterTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.log = io.StringIO()
+
+    def read(self, name, opener=open):
+        with opener(os.path.join(self.directory, name), 'rt', encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def test_every_site_and_resource_gets_a_file(self):
+        exporter = Exporter(stub_client(respond), self.directory, ['entries', 'pages'], site_ids=['1'], workers=3,
+                            limit=2, log=self.log)
+        self.assertTrue(exporter.run())
+        self.assertEqual(sorted(item['id'] for item in self.read('site-1-entries.ndjson')), list(range(7)))
+        self.assertEqual(len(self.read('site-1-pages.ndjson')), 2)
+        self.assertEqual(exporter.pages, 5)
+        self.assertIn('9 items, 5 pages', self.log.getvalue())
+
+    def test_sites_are_listed_and_files_gzipped(self):
+        exporter = Exporter(stub_client(respond), self.directory, ['pages'], limit=2, use_gzip=True, log=self.log)
+        self.assertTrue(exporter.run())
+        self.assertEqual(len(self.read('site-1-pages.ndjson.gz', gzip.open)), 2)
+        self.assertEqual(self.read('site-2-pages.ndjson.gz', gzip.open), [])
+
+    def test_failed_pages_are_counted_and_the_rest_exported(self):
+        exporter = Exporter(stub_client(respond), self.directory, ['entries'], site_ids=['2'], limit=2, log=self.log)
+        self.assertFalse(exporter.run())
+        self.assertEqual(exporter.errors, 1)
+        self.assertEqual([item['id'] for item in self.read('site-2-entries.ndjson')], [0, 1])
+        self.assertIn('site 2 entries offset 2', self.log.getvalue())
+
+    def test_command_rejects_unknown_resources(self):
+        with self.assertRaises(SystemExit):
+            main(['export', '--url', 'http://mt.example/mt-data-api.cgi', '--resources', 'nope'])
+
+
+if __name__ == '__main__':
+    unittest.main()
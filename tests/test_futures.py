@@ -0,0 +1,50 @@
+from concurrent.futures import ThreadPoolExecutor
+import unittest
+
+from mt_data_api.errors import DataAPIError
+from mt_data_api.futures import gather
+from tests.stubs import stub_client
+
+
+class FutureDataAPITest(unittest.TestCase):
+    def setUp(self):
+        def respond(method, url, params):
+            if url.endswith('/entries/404'):
+                return {'error': {'code': 404, 'message': 'Not found'}}
+            return {'id': int(url.rsplit('/', 1)[1])}
+        self.client = stub_client(respond)
+
+    def test_api_calls_return_futures(self):
+        futures = self.client.futures()
+        results = gather([futures.get_entry(1, 2), futures.get_entry(1, 404)], timeout=5, return_exceptions=True)
+        self.assertEqual(results[0], {'id': 2})
+        self.assertIsInstance(results[1], DataAPIError)
+        futures.shutdown()
+
+    def test_helpers_are_not_wrapped(self):
+        futures = self.client.futures()
+        self.assertIsNone(futures.reset_auth())
+        with futures.call_options(timeout=3):
+            self.assertEqual(self.client.current_call_options(), {'timeout': 3})
+        self.assertIsInstance(futures.session_state(), dict)
+
+        def listener(*args):
+            pass
+        futures.add_write_listener(listener)
+        self.assertIn(listener, self.client.write_listeners)
+        futures.shutdown()
+
+    def test_replaced_executor_is_used(self):
+        first = self.client.futures()
+        self.assertIs(self.client.futures(), first)
+        self.client.executor = ThreadPoolExecutor(2)
+        second = self.client.futures()
+        self.assertIsNot(second, first)
+        self.assertIs(second.executor, self.client.executor)
+        self.assertEqual(second.get_entry(1, 3).result(5), {'id': 3})
+        first.shutdown()
+        second.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from mt_data_api.errors import DataAPIError
+from mt_data_api.http_method import HTTPMethod
+from mt_data_api.importer import ChunkedImporter, iter_chunks
+from mt_data_api.transport import Response
+from tests.stubs import StubTransport, stub_client
+
+
+def entry(number, body_lines=1):
+    lines = ['TITLE: Entry %d\n' % number, '-----\n', 'BODY:\n']
+    lines += ['line %d of entry %d\n' % (i, number) for i in range(body_lines)]
+    lines += ['-----\n', '--------\n']
+    return ''.join(lines).encode('utf-8')
+
+
+class ImportTransport(StubTransport):
+    """Fails any upload that contains one of the given entries."""
+
+    def __init__(self, failing):
+        super(ImportTransport, self).__init__()
+        self.failing = failing
+
+    def request(self, method, url, params=None, files=None, **kwargs):
+        self.requests.append((method, url, params, files, kwargs.get('headers')))
+        body = {'status': 'ok'}
+        if any(entry in files['file'][1] for entry in self.failing):
+            body = {'error': {'code': 500, 'message': 'Internal Server Error'}}
+        return Response(200, {}, json.dumps(body).encode('utf-8'))
+
+
+class IterChunksTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'import.txt')
+
+    def write(self, data):
+        with open(self.path, 'wb') as f:
+            f.write(data)
+
+    def test_entries_are_never_split(self):
+        entries = [entry(i, body_lines=i % 4) for i in range(20)]
+        self.write(b''.join(entries))
+        chunks = list(iter_chunks(self.path, 200))
+        self.assertEqual([index for index, _ in chunks], list(range(len(chunks))))
+        self.assertEqual(b''.join(data for _, data in chunks), b''.join(entries))
+        for _, data in chunks:
+            self.assertTrue(data.endswith(b'--------\n'))
+            self.assertTrue(data.startswith(b'TITLE: '))
+            if data.count(b'TITLE: ') > 1:
+                self.assertLessEqual(len(data), 200)
+
+    def test_chunk_fills_up_to_the_limit(self):
+        entries = [entry(i) for i in range(4)]
+        self.write(b''.join(entries))
+        size = len(entries[0])
+        chunks = [data for _, data in iter_chunks(self.path, size * 2)]
+        self.assertEqual(chunks, [entries[0] + entries[1], entries[2] + entries[3]])
+
+    def test_oversized_entry_gets_its_own_chunk(self):
+        small, large = entry(1), entry(2, body_lines=50)
+        self.write(small + large + small)
+        chunks = [data for _, data in iter_chunks(self.path, len(small) * 2)]
+        self.assertEqual(chunks, [small, large, small])
+
+    def test_crlf_separators_and_trailing_entry(self):
+        first = entry(1).replace(b'\n', b'\r\n')
+        trailing = b'TITLE: No separator\r\nBODY:\r\ntext\r\n'
+        self.write(first + trailing)
+        self.assertEqual([data for _, data in iter_chunks(self.path, len(first))], [first, trailing])
+        self.assertEqual([data for _, data in iter_chunks(self.path, 1 << 20)], [first + trailing])
+
+    def test_trailing_whitespace_is_dropped(self):
+        self.write(entry(1) + b'\n\n')
+        self.assertEqual([data for _, data in iter_chunks(self.path, 1 << 20)], [entry(1)])
+
+    def test_empty_file(self):
+        self.write(b'')
+        self.assertEqual(list(iter_chunks(self.path, 100)), [])
+
+
+class ChunkedImporterTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'import.txt')
+        self.entries = [entry(i) for i in range(6)]
+        with open(self.path, 'wb') as f:
+            f.write(b''.join(self.entries))
+        self.chunk_size = len(self.entries[0]) * 2
+        self.failing = set()
+
+    def client(self):
+        client = stub_client()
+        client.transport = ImportTransport([self.entries[i] for i in self.failing])
+        return client
+
+    def uploads(self, client):
+        return sorted(request[3]['file'][1] for request in client.transport.requests)
+
+    def test_uploads_every_chunk_and_marks_complete(self):
+        client = self.client()
+        importer = ChunkedImporter(client, 1, self.path, chunk_size=self.chunk_size, options={'importAs': 'me'})
+        self.assertEqual(importer.run(), 3)
+        self.assertEqual(len(client.transport.requests), 3)
+        method, url, params, files, _ = client.transport.requests[0]
+        self.assertEqual(method, HTTPMethod.POST)
+        self.assertTrue(url.endswith('/sites/1/entries/import'))
+        self.assertEqual(params, {'importAs': 'me'})
+        self.assertEqual(files['file'][0], 'import.dat')
+        with open(self.path + '.checkpoint') as f:
+            state = json.load(f)
+        self.assertEqual(sorted(state['done']), [0, 1, 2])
+        self.assertTrue(state['complete'])
+
+    def test_resumes_only_the_failed_chunks(self):
+        self.failing.add(3)
+        first = self.client()
+        importer = ChunkedImporter(first, 1, self.path, chunk_size=self.chunk_size)
+        with self.assertRaises(DataAPIError) as raised:
+            importer.run()
+        self.assertIn(1, raised.exception.error['chunks'])
+        self.assertEqual(importer.uploaded, 2)
+
+        self.failing.clear()
+        second = self.client()
+        importer = ChunkedImporter(second, 1, self.path, chunk_size=self.chunk_size)
+        self.assertEqual(importer.run(), 1)
+        self.assertEqual(importer.skipped, 2)
+        self.assertEqual(self.uploads(second), [self.entries[2] + self.entries[3]])
+
+    def test_changed_source_is_rejected(self):
+        self.failing.add(0)
+        with self.assertRaises(DataAPIError):
+            ChunkedImporter(self.client(), 1, self.path, chunk_size=self.chunk_size).run()
+        with self.assertRaises(ValueError):
+            ChunkedImporter(self.client(), 1, self.path, chunk_size=self.chunk_size * 2).run()
+        with open(self.path, 'ab') as f:
+            f.write(entry(6))
+        with self.assertRaises(ValueError):
+            ChunkedImporter(self.client(), 1, self.path, chunk_size=self.chunk_size).run()
+
+
+if __name__ == '__main__':
+    unittest.main()
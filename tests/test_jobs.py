@@ -0,0 +1,86 @@
+import json
+import os
+import re
+import shutil
+import tempfile
+import unittest
+
+from mt_data_api.jobs import CrawlJob
+from tests.stubs import stub_client
+
+
+class Crash(Exception):
+    pass
+
+
+class CrawlJobTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.checkpoint_path = os.path.join(directory, 'crawl.json')
+        # Newest first, like the default entry listing.
+        self.entries = {1: [{'id': i} for i in range(10, 0, -1)], 2: [{'id': 100}]}
+        self.handled = []
+        self.crash_on = None
+
+    def respond(self, method, url, params):
+        if url.endswith('/sites'):
+            return {'items': [{'id': site_id} for site_id in sorted(self.entries)],
+                    'totalResults': len(self.entries)}
+        site_id = int(re.search(r'/sites/(\d+)/entries$', url).group(1))
+        offset, limit = int(params['offset']), int(params['limit'])
+        items = self.entries[site_id]
+        return {'items': items[offset:offset + limit], 'totalResults': len(items)}
+
+    def handler(self, site_id, resource, items):
+        if self.crash_on in [item['id'] for item in items]:
+            raise Crash()
+        self.handled.extend(item['id'] for item in items)
+
+    def job(self, **kwargs):
+        self.client = stub_client(self.respond)
+        return CrawlJob(self.client, self.checkpoint_path, limit=2, **kwargs)
+
+    def state(self):
+        with open(self.checkpoint_path) as f:
+            return json.load(f)
+
+    def test_crawls_every_site(self):
+        self.assertEqual(self.job().run(self.handler), 11)
+        self.assertEqual(self.handled, list(range(10, 0, -1)) + [100])
+        state = self.state()
+        self.assertEqual(state['sites'], [1, 2])
+        self.assertEqual(state['completed'], ['1/entries', '2/entries'])
+        self.assertIsNone(state['current'])
+
+    def test_resume_skips_rows_shifted_by_new_entries(self):
+        self.crash_on = 6
+        with self.assertRaises(Crash):
+            self.job(site_ids=[1]).run(self.handler)
+        self.assertEqual(self.state()['current'],
+                         {'site_id': 1, 'resource': 'entries', 'offset': 4, 'last_id': 7})
+
+        # A new entry pushes every row one offset further down the listing.
+        self.entries[1].insert(0, {'id': 11})
+        self.crash_on = None
+        self.job(site_ids=[1]).run(self.handler)
+        self.assertEqual(self.handled, list(range(10, 0, -1)))
+        self.assertEqual(int(self.client.transport.requests[0][2]['offset']), 4)
+
+    def test_resume_keeps_the_site_list_and_skips_completed_units(self):
+        self.crash_on = 100
+        with self.assertRaises(Crash):
+            self.job().run(self.handler)
+        self.assertEqual(self.state()['completed'], ['1/entries'])
+
+        self.entries[3] = [{'id': 300}]
+        self.crash_on = None
+        self.job().run(self.handler)
+        self.assertEqual(self.handled, list(range(10, 0, -1)) + [100])
+        urls = [request[1] for request in self.client.transport.requests]
+        self.assertEqual(len(urls), 1)
+        self.assertTrue(urls[0].endswith('/sites/2/entries'))
+
+
+if __name__ == '__main__':
+    unittest.main()
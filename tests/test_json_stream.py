@@ -0,0 +1,86 @@
+import json
+import random
+import unittest
+
+from mt_data_api.json_stream import ItemStream
+
+
+def chunked(data, sizes):
+    chunks, pos = [], 0
+    for size in sizes:
+        chunks.append(data[pos:pos + size])
+        pos += size
+    chunks.append(data[pos:])
+    return chunks
+
+
+def parse(chunks):
+    stream = ItemStream(chunks)
+    return list(stream), stream.document
+
+
+class ItemStreamTest(unittest.TestCase):
+    def assertStreams(self, document, chunks):
+        items, rest = parse(chunks)
+        expected = dict(document)
+        self.assertEqual(items, expected.pop('items'))
+        expected['items'] = None
+        self.assertEqual(rest, expected)
+
+    def test_every_split_point(self):
+        document = {'totalResults': 3, 'items': [
+            {'id': 1, 'title': 'a "quoted" [title], {x}', 'tags': ['日本', 'b\\\\']},
+            'plain, string ] with brackets', 12.5, None, True, [1, [2, 3]], {}, []],
+            'extra': {'items': 'not this one'}}
+        data = json.dumps(document, ensure_ascii=False).encode('utf-8')
+        for split in range(len(data) + 1):
+            self.assertStreams(document, [data[:split], data[split:]])
+        self.assertStreams(document, [data[i:i + 1] for i in range(len(data))])
+
+    def test_string_value_equal_to_key_is_not_the_array(self):
+        document = {'type': 'items', 'items': [{'id': 1}], 'totalResults': 1}
+        data = json.dumps(document).encode('utf-8')
+        self.assertStreams(document, [data[i:i + 3] for i in range(0, len(data), 3)])
+
+    def test_document_without_array(self):
+        error = {'error': {'code': 404, 'message': 'items not found'}}
+        stream = ItemStream([json.dumps(error).encode('utf-8')])
+        self.assertFalse(stream.start())
+        self.assertEqual(list(stream), [])
+        self.assertEqual(stream.document, error)
+
+    def test_truncated_document_raises(self):
+        data = json.dumps({'items': [{'id': 1}, {'id': 2}]}).encode('utf-8')
+        with self.assertRaises(ValueError):
+            parse([data[:-8]])
+
+    def test_random_documents_and_chunkings(self):
+        rng = random.Random(2015)
+        alphabet = 'ab ,]}[{":\\éあ\n'
+
+        def value(depth):
+            kind = rng.randrange(7 if depth < 3 else 4)
+            if kind == 0:
+                return ''.join(rng.choice(alphabet) for _ in range(rng.randrange(12)))
+            if kind == 1:
+                return rng.choice([0, -1, 3.25, 1e20, 123456789])
+            if kind == 2:
+                return rng.choice([True, False, None])
+            if kind == 3:
+                return 'items'
+            if kind == 4:
+                return [value(depth + 1) for _ in range(rng.randrange(4))]
+            return dict((''.join(rng.choice(alphabet) for _ in range(3)), value(depth + 1))
+                        for _ in range(rng.randrange(4)))
+        for _ in range(300):
+            document = {'totalResults': rng.randrange(100), 'items': [value(0) for _ in range(rng.randrange(6))]}
+            if rng.random() < 0.5:
+                document = dict([('kind', 'items')] + list(document.items()) + [('after', value(1))])
+            data = json.dumps(document, ensure_ascii=rng.random() < 0.5,
+                              indent=rng.choice([None, 1])).encode('utf-8')
+            sizes = [rng.randrange(1, 8) for _ in range(len(data))]
+            self.assertStreams(document, chunked(data, sizes))
+
+
+if __name__ == '__main__':
+    unittest.main()
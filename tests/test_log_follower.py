@@ -0,0 +1,47 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from mt_data_api.log_follower import LogFollower
+
+
+class FakeClient(object):
+    def __init__(self, logs):
+        self.logs = logs
+
+    def list_logs(self, site_id, options=None, success=None, failure=None):
+        logs = sorted(self.logs, key=lambda log: log['id'], reverse=options.get('sortOrder') == 'descend')
+        offset = options.get('offset', 0)
+        success(logs[offset:offset + options.get('limit', 50)], len(logs))
+
+
+class LogFollowerTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.checkpoint = os.path.join(self.directory, 'logs.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def follower(self, client):
+        return LogFollower(client, [1], checkpoint_path=self.checkpoint, from_start=True, min_interval=0.01)
+
+    def test_logs_taken_by_a_crashed_consumer_are_delivered_again(self):
+        client = FakeClient([{'id': i} for i in range(1, 6)])
+        with self.assertRaises(RuntimeError):
+            for site_id, log in self.follower(client).follow():
+                if log['id'] == 3:
+                    raise RuntimeError('shipping failed')
+        stop = threading.Event()
+        delivered = []
+        for site_id, log in self.follower(client).follow(stop):
+            delivered.append(log['id'])
+            if log['id'] == 5:
+                stop.set()
+        self.assertEqual(delivered, [3, 4, 5])
+
+
+if __name__ == '__main__':
+    unittest.main()
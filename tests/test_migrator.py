@@ -0,0 +1,127 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from mt_data_api.http_method import HTTPMethod
+from mt_data_api.migrator import Migrator
+from tests.stubs import stub_client
+
+
+class FakeSource(object):
+    def __init__(self, categories):
+        self.categories = categories
+
+    def list_categories(self, site_id, options=None, success=None, failure=None):
+        offset = options.get('offset', 0)
+        limit = options.get('limit', 50)
+        success(self.categories[offset:offset + limit], len(self.categories))
+
+
+class FakeTarget(object):
+    def __init__(self):
+        self.created = []
+
+    def create_category(self, site_id, category, options=None, success=None, failure=None):
+        self.created.append(category)
+        success({'id': 100 + len(self.created)})
+
+
+class MigratorTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.checkpoint = os.path.join(self.directory, 'migration.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_child_categories_keep_their_parent(self):
+        source = FakeSource([
+            {'id': 3, 'label': 'c', 'parent': 2},
+            {'id': 1, 'label': 'a', 'parent': 0},
+            {'id': 2, 'label': 'b', 'parent': 1},
+        ])
+        target = FakeTarget()
+        migrator = Migrator(source, target, 1, 2, self.checkpoint, resources=('categories',), queue_size=10)
+        migrator.run()
+        self.assertEqual(target.created, [{'label': 'a'}, {'label': 'b', 'parent': 101},
+                                          {'label': 'c', 'parent': 102}])
+        self.assertEqual(migrator.id_map('categories'), {'1': 101, '2': 102, '3': 103})
+
+    def test_rerun_skips_migrated_categories(self):
+        source = FakeSource([{'id': 1, 'label': 'a'}, {'id': 2, 'label': 'b', 'parent': 1}])
+        target = FakeTarget()
+        Migrator(source, target, 1, 2, self.checkpoint, resources=('categories',), checkpoint_interval=60).run()
+        again = Migrator(source, FakeTarget(), 1, 2, self.checkpoint, resources=('categories',))
+        again.checkpoint.state['done'] = []
+        stats = again.run()
+        self.assertEqual((stats[0].written, stats[0].skipped), (0, 2))
+
+    def run_with_timeout(self, migrator):
+        thread = threading.Thread(target=migrator.run, daemon=True)
+        thread.start()
+        thread.join(10)
+        self.assertFalse(thread.is_alive(), 'the migration hung')
+
+    def test_writer_keeps_draining_after_bad_responses(self):
+        source = FakeSource([{'id': i, 'label': str(i)} for i in range(1, 31)])
+        target = FakeTarget()
+        create = target.create_category
+
+        def create_category(site_id, category, options=None, success=None, failure=None):
+            if category['label'] == '2':
+                success(None)
+            else:
+                create(site_id, category, options, success, failure)
+        target.create_category = create_category
+        migrator = Migrator(source, target, 1, 2, self.checkpoint, resources=('categories',), queue_size=2)
+        self.run_with_timeout(migrator)
+        stats = migrator.stats['categories']
+        self.assertEqual((stats.written, list(stats.errors)), (29, ['2']))
+
+    def test_writer_keeps_draining_after_failed_saves(self):
+        source = FakeSource([{'id': i, 'label': str(i)} for i in range(1, 31)])
+        migrator = Migrator(source, FakeTarget(), 1, 2, self.checkpoint, resources=('categories',), queue_size=2)
+        save = migrator.checkpoint.save
+        calls = []
+
+        def flaky_save():
+            calls.append(1)
+            if len(calls) == 3:
+                raise OSError('disk full')
+            save()
+        migrator.checkpoint.save = flaky_save
+        self.run_with_timeout(migrator)
+        self.assertEqual(len(migrator.stats['categories'].errors), 1)
+        self.assertEqual(len(migrator.id_map('categories')), 30)
+
+    def test_each_write_is_checkpointed_by_default(self):
+        source = FakeSource([{'id': 1, 'label': 'a'}, {'id': 2, 'label': 'b'}, {'id': 3, 'label': 'c'}])
+        target = FakeTarget()
+        create = target.create_category
+        saved = []
+
+        def create_category(site_id, category, options=None, success=None, failure=None):
+            if os.path.exists(self.checkpoint):
+                with open(self.checkpoint) as f:
+                    saved.append(json.load(f)['maps']['categories'])
+            create(site_id, category, options, success, failure)
+        target.create_category = create_category
+        Migrator(source, target, 1, 2, self.checkpoint, resources=('categories',)).run()
+        self.assertEqual(saved, [{'1': 101}, {'1': 101, '2': 102}])
+
+
+class UploadAssetTest(unittest.TestCase):
+    def test_upload_asset_for_site_url_contains_site_id(self):
+        client = stub_client(lambda method, url, params: {'id': 1})
+        client.upload_asset_for_site(5, b'data', 'a.png')
+        method, url, _, files, _ = client.transport.requests[-1]
+        self.assertEqual(method, HTTPMethod.POST)
+        self.assertTrue(url.endswith('/sites/5/assets/upload'))
+        self.assertEqual(files['file'], ('a.png', b'data'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import threading
+import unittest
+
+from mt_data_api.errors import ConnectionFailed, DataAPIError
+from mt_data_api.http_method import HTTPMethod
+from mt_data_api.node_pool import NodePool
+from mt_data_api import pager
+from tests.stubs import stub_client
+
+NODES = ['http://mt1.example/mt-data-api.cgi', 'http://mt2.example/mt-data-api.cgi']
+
+
+class NodeRoutingTest(unittest.TestCase):
+    def setUp(self):
+        self.down = set()
+        self.checked = threading.Event()
+
+        def respond(method, url, params):
+            if url.endswith('/version'):
+                self.checked.set()
+            if any(url.startswith(node) for node in self.down):
+                raise ConnectionFailed()
+            return {'id': 1, 'node': url.split('/')[2]}
+        self.client = stub_client(respond)
+        self.client.api_base_url = list(NODES)
+        self.client.node_pool.interval = 3600
+
+    def tearDown(self):
+        self.client.node_pool.close()
+
+    def api_requests(self):
+        return [r for r in self.client.transport.requests if not r[1].endswith('/version')]
+
+    def test_get_moves_to_the_next_node(self):
+        self.down.add(NODES[0])
+        entry = pager.call(self.client.get_entry, 1, 2)
+        self.assertEqual(entry['node'], 'mt2.example')
+        self.assertFalse(self.client.node_stats()[NODES[0]]['healthy'])
+
+    def test_post_is_not_retried(self):
+        self.down.add(NODES[0])
+        with self.assertRaises((ConnectionFailed, DataAPIError)):
+            pager.call(self.client.create_entry, 1, {'title': 'once'})
+        posts = [r for r in self.api_requests() if r[0] == HTTPMethod.POST]
+        self.assertEqual(len(posts), 1)
+        self.assertTrue(posts[0][1].startswith(NODES[0]))
+
+    def test_health_check_uses_v3_version(self):
+        self.client.endpoint_version = 'v2'
+        self.client.node_pool.check_all()
+        checks = [r[1] for r in self.client.transport.requests if r[1].endswith('/version')]
+        self.assertIn(NODES[0] + '/v3/version', checks)
+        self.assertTrue(all(stats['healthy'] for stats in self.client.node_stats().values()))
+
+
+class NodePoolTest(unittest.TestCase):
+    def test_unhealthy_node_is_ranked_last(self):
+        def check(url, timeout):
+            if url == 'http://a':
+                raise ConnectionFailed()
+        pool = NodePool(['http://a', 'http://b', 'http://c'], check=check, interval=3600)
+        pool.check_all()
+        self.assertEqual(pool.route()[-1], 'http://a')
+        self.assertEqual(pool.stats()['http://a']['healthy'], False)
+        pool.close()
+
+    def test_failed_request_marks_node_unhealthy_until_checked(self):
+        pool = NodePool(['http://a', 'http://b'])
+        pool.record_failure('http://a', ConnectionFailed())
+        self.assertEqual(pool.route(), ['http://b', 'http://a'])
+        pool.check = lambda url, timeout: None
+        pool.check_node('http://a')
+        self.assertIn(pool.route()[0], ('http://a', 'http://b'))
+        self.assertTrue(pool.stats()['http://a']['healthy'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from mt_data_api.errors import RequestTimeout
+from mt_data_api import page_sizer, pager
+from mt_data_api.page_sizer import AdaptivePageSizer, endpoint_key
+from tests.stubs import stub_client
+
+
+class FakeTime(object):
+    def __init__(self):
+        self.now = 1000000.0
+
+    def time(self):
+        return self.now
+
+
+class AdaptivePageSizerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeTime()
+        patcher = mock.patch.object(page_sizer, 'time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_fast_pages_grow_at_most_twofold(self):
+        sizer = AdaptivePageSizer(target_latency=1.0, initial=50, maximum=500)
+        sizer.observe('list_entries', 50, 0.05, 50 * 100)
+        self.assertEqual(sizer.size_for('list_entries'), 100)
+        for _ in range(10):
+            sizer.observe('list_entries', 100, 0.1, 100 * 100)
+        self.assertEqual(sizer.size_for('list_entries'), 500)
+
+    def test_large_payloads_limit_the_size(self):
+        sizer = AdaptivePageSizer(target_latency=1.0, max_bytes=100 * 1000, initial=50)
+        for _ in range(10):
+            sizer.observe('list_entries', 50, 0.01, 50 * 10000)
+        self.assertEqual(sizer.size_for('list_entries'), 10)
+
+    def test_slow_pages_halve(self):
+        sizer = AdaptivePageSizer(target_latency=1.0, initial=100)
+        sizer.observe('list_entries', 100, 5.0, 1000)
+        self.assertEqual(sizer.size_for('list_entries'), 20)
+
+    def test_shrink_stops_at_minimum(self):
+        sizer = AdaptivePageSizer(initial=20, minimum=5)
+        self.assertTrue(sizer.shrink('list_entries'))
+        self.assertTrue(sizer.shrink('list_entries'))
+        self.assertEqual(sizer.size_for('list_entries'), 5)
+        self.assertFalse(sizer.shrink('list_entries'))
+
+    def test_ceiling_caps_growth_until_it_expires(self):
+        sizer = AdaptivePageSizer(target_latency=1.0, initial=100, ceiling_ttl=600)
+        sizer.shrink('list_entries')
+        for _ in range(10):
+            sizer.observe('list_entries', 50, 0.01, 500)
+        self.assertEqual(sizer.size_for('list_entries'), 80)
+        self.clock.now += 601
+        for _ in range(10):
+            sizer.observe('list_entries', 80, 0.01, 800)
+        self.assertEqual(sizer.size_for('list_entries'), 500)
+
+    def test_sizes_and_ceilings_are_saved(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'sizes.json')
+        sizer = AdaptivePageSizer(initial=100, path=path)
+        sizer.shrink('list_entries')
+        sizer.save()
+        again = AdaptivePageSizer(initial=100, path=path)
+        self.assertEqual(again.size_for('list_entries'), 50)
+        for _ in range(10):
+            again.observe('list_entries', 50, 0.01, 500)
+        self.assertEqual(again.size_for('list_entries'), 80)
+
+
+class SizedPagesTest(unittest.TestCase):
+    def test_hosts_learn_separately(self):
+        first, second = stub_client(), stub_client()
+        second.api_base_url = 'http://other.example/mt-data-api.cgi'
+        self.assertNotEqual(endpoint_key(first.list_entries), endpoint_key(second.list_entries))
+        self.assertIn('http://mt.example', endpoint_key(first.list_entries))
+
+    def test_timeouts_retry_with_smaller_pages(self):
+        limits = []
+
+        def respond(method, url, params):
+            limits.append(int(params['limit']))
+            if int(params['limit']) > 30:
+                raise RequestTimeout()
+            offset = int(params['offset'])
+            items = [{'id': i} for i in range(offset, min(offset + int(params['limit']), 40))]
+            return {'items': items, 'totalResults': 40}
+        client = stub_client(respond)
+        sizer = AdaptivePageSizer(initial=100, minimum=5)
+        items = list(pager.iter_items(client.list_entries, 1, page_sizer=sizer))
+        self.assertEqual([item['id'] for item in items], list(range(40)))
+        self.assertEqual(limits[:3], [100, 50, 25])
+
+
+if __name__ == '__main__':
+    unittest.main()
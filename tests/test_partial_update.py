@@ -0,0 +1,30 @@
+import unittest
+
+from mt_data_api.partial_update import ObjectCache, PartialUpdater
+from tests.stubs import stub_client
+
+
+class PartialUpdaterTest(unittest.TestCase):
+    def setUp(self):
+        self.client = stub_client(lambda method, url, params: {'id': 7, 'title': 'a', 'body': 'x'})
+        self.updater = PartialUpdater(self.client)
+        self.updater.remember('entry', 1, 7, {'id': 7, 'title': 'a', 'body': 'x'})
+
+    def test_unchanged_update_returns_a_copy(self):
+        got = []
+        self.updater.update_entry(1, 7, {'id': 7, 'title': 'a', 'body': 'x'}, success=got.append)
+        self.assertEqual(self.client.transport.requests, [])
+        got[0]['title'] = 'b'
+        self.updater.update_entry(1, 7, {'id': 7, 'title': 'b', 'body': 'x'})
+        self.assertEqual(len(self.client.transport.requests), 1)
+        self.assertEqual(self.client.transport.requests[0][2], {'entry': '{"title": "b"}'})
+
+    def test_cache_get_returns_copies(self):
+        cache = ObjectCache()
+        cache.put('k', {'tags': ['a']})
+        cache.get('k')['tags'].append('b')
+        self.assertEqual(cache.get('k'), {'tags': ['a']})
+
+
+if __name__ == '__main__':
+    unittest.main()
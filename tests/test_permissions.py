@@ -0,0 +1,81 @@
+import unittest
+
+from mt_data_api.permissions import PermissionIndex
+from tests.stubs import stub_client
+
+
+class RevokePermissionTest(unittest.TestCase):
+    def test_failure_is_called_with_the_error(self):
+        client = stub_client(lambda method, url, params: {'error': {'code': 403, 'message': 'Forbidden'}})
+        errors = []
+        client.revoke_permission_from_site(1, 2, 3, success=lambda response: self.fail('succeeded'),
+                                           failure=errors.append)
+        self.assertEqual(errors, [{'code': 403, 'message': 'Forbidden'}])
+
+    def test_write_listeners_see_the_revoke(self):
+        client = stub_client(lambda method, url, params: {'status': 'success'})
+        writes = []
+        client.add_write_listener(lambda method, url, params, response: writes.append(url))
+        client.revoke_permission_from_site(1, 2, 3)
+        self.assertEqual(len(writes), 1)
+        self.assertTrue(writes[0].endswith('/sites/1/permissions/revoke'), writes)
+
+
+class FakeServer(object):
+    def __init__(self):
+        self.permissions = {'5': ['create_post']}
+        self.roles = [{'id': 3, 'permissions': ['create_post']}]
+        self.during_fetch = None
+
+    def respond(self, method, url, params):
+        if url.endswith('/roles'):
+            return {'items': self.roles, 'totalResults': len(self.roles)}
+        if url.endswith('/roles/3'):
+            return self.roles[0]
+        if url.endswith('/permissions'):
+            # The data is read first, then a write slips in before the response arrives.
+            items = [{'user': {'id': user_id}, 'blog': {'id': 1}, 'permissions': list(permissions),
+                      'roles': [{'id': 3}]} for user_id, permissions in sorted(self.permissions.items())]
+            if self.during_fetch:
+                during_fetch, self.during_fetch = self.during_fetch, None
+                during_fetch()
+            return {'items': items, 'totalResults': len(items)}
+        return {'status': 'success'}
+
+
+class PermissionIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeServer()
+        self.client = stub_client(self.server.respond)
+        self.index = PermissionIndex(self.client)
+        self.index.load()
+
+    def revoke(self):
+        self.server.permissions['5'] = []
+        self.client.revoke_permission_from_user(5, 1, 3)
+
+    def test_revoke_reloads_the_user(self):
+        self.assertTrue(self.index.has_permission(5, 'create_post', 1))
+        self.revoke()
+        self.assertFalse(self.index.has_permission(5, 'create_post', 1))
+
+    def test_revoke_during_full_load_is_not_lost(self):
+        self.index.invalidate()
+        self.server.during_fetch = self.revoke
+        self.index.load()
+        self.assertFalse(self.index.has_permission(5, 'create_post', 1))
+
+    def test_revoke_during_user_reload_is_not_lost(self):
+        self.index.invalidate_user(5)
+        self.server.during_fetch = self.revoke
+        self.index.refresh()
+        self.assertFalse(self.index.has_permission(5, 'create_post', 1))
+
+    def test_deleted_role_is_removed(self):
+        self.assertIn('3', self.index.roles)
+        self.client.delete_role(3)
+        self.assertNotIn('3', self.index.roles)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import os
+import unittest
+from unittest import mock
+
+from mt_data_api import profiler
+from mt_data_api.http_method import HTTPMethod
+from mt_data_api.profiler import Profiler, endpoint_name
+
+
+class DefaultProfilerTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(profiler, '_default', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        register = mock.patch.object(profiler.atexit, 'register')
+        self.register = register.start()
+        self.addCleanup(register.stop)
+
+    def default_with(self, value):
+        with mock.patch.dict(os.environ, {'MT_DATA_API_PROFILE': value}):
+            return profiler.default_profiler()
+
+    def test_zero_and_empty_values_leave_profiling_off(self):
+        for value in ('', '0', 'off', 'false', ' '):
+            self.assertIsNone(self.default_with(value), value)
+        self.register.assert_not_called()
+
+    def test_one_enables_a_summary_on_stderr(self):
+        self.assertIsInstance(self.default_with('1'), Profiler)
+        self.register.assert_called_once()
+
+
+class ProfilerTest(unittest.TestCase):
+    def test_endpoint_names_hide_ids(self):
+        name = endpoint_name(HTTPMethod.GET, 'http://mt.example/cgi/v4/sites/1/entries/23', 'http://mt.example/cgi')
+        self.assertEqual(name, 'GET /sites/:id/entries/:id')
+
+    def test_nested_phases_are_exclusive(self):
+        clock = iter([0.0, 1.0, 3.0, 4.0])
+        p = Profiler()
+        with mock.patch.object(profiler, 'time', mock.Mock(perf_counter=lambda: next(clock))):
+            with p.phase('GET /sites', 'callback'):
+                with p.phase('GET /sites', 'decode'):
+                    pass
+        stats = p.stats()
+        self.assertEqual(stats[('GET /sites', ('callback',))][1], 2.0)
+        self.assertEqual(stats[('GET /sites', ('callback', 'decode'))][1], 2.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import datetime
+import unittest
+import warnings
+
+from mt_data_api.query import ClientSideFilterWarning, Query
+from tests.stubs import stub_client
+
+
+def entries_client(entries):
+    def respond(method, url, params):
+        offset = int(params.get('offset', 0))
+        limit = int(params.get('limit', 50))
+        return {'items': entries[offset:offset + limit], 'totalResults': len(entries)}
+    return stub_client(respond)
+
+
+class QueryOptionsTest(unittest.TestCase):
+    def setUp(self):
+        self.client = stub_client()
+
+    def test_date_range_is_sent_as_whole_days(self):
+        query = Query(self.client.list_entries, 1).date_range(
+            'date', start=datetime.date(2024, 1, 1), end=datetime.date(2024, 1, 31))
+        self.assertEqual(query.options(), {'dateField': 'authored_on', 'dateFrom': '2024-01-01',
+                                           'dateTo': '2024-01-31'})
+        self.assertEqual(query.plan()[3], [])
+
+    def test_time_of_day_is_checked_client_side(self):
+        query = Query(self.client.list_pages, 1).date_range(
+            'modifiedDate', start=datetime.datetime(2024, 1, 1, 12, 0))
+        self.assertEqual(query.options(), {'dateField': 'modified_on', 'dateFrom': '2024-01-01'})
+        self.assertEqual(len(query.plan()[3]), 1)
+
+    def test_endpoints_without_date_filters_check_client_side(self):
+        query = Query(self.client.list_assets, 1).date_range('createdDate', start=datetime.date(2024, 1, 1))
+        self.assertEqual(query.options(), {})
+        self.assertEqual(len(query.plan()[3]), 1)
+
+    def test_order_by_item_field_sends_sort_column(self):
+        options = Query(self.client.list_entries, 1).order_by('date', descending=True).options()
+        self.assertEqual(options, {'sortBy': 'authored_on', 'sortOrder': 'descend'})
+        options = Query(self.client.list_entries, 1).order_by('modified_on').options()
+        self.assertEqual(options, {'sortBy': 'modified_on', 'sortOrder': 'ascend'})
+
+    def test_single_status_and_category_are_pushed_down(self):
+        list_method, args, params, predicates, _ = Query(self.client.list_entries, 1) \
+            .status('Publish').category(7).plan()
+        self.assertEqual(list_method.__name__, 'list_entries_for_category')
+        self.assertEqual(args, (1, '7'))
+        self.assertEqual(params, {'status': 'Publish'})
+        self.assertEqual(predicates, [])
+
+    def test_fields_needed_by_client_side_filters_are_requested(self):
+        options = Query(self.client.list_entries, 1).fields('title').tags('news').options()
+        self.assertEqual(options['fields'], 'id,tags,title')
+
+
+class QueryIterationTest(unittest.TestCase):
+    def test_client_side_filters_warn_and_apply(self):
+        client = entries_client([{'id': 1, 'tags': ['news']}, {'id': 2, 'tags': []}, {'id': 3, 'tags': ['news']}])
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            ids = [item['id'] for item in Query(client.list_entries, 1).tags('news')]
+        self.assertEqual(ids, [1, 3])
+        self.assertTrue(any(issubclass(w.category, ClientSideFilterWarning) for w in caught))
+
+    def test_sorted_range_stops_at_first_item_outside(self):
+        client = entries_client([{'id': i, 'date': '2024-01-%02dT08:00:00+09:00' % (20 - i)} for i in range(10)])
+        query = (Query(client.list_entries, 1).order_by('date', descending=True)
+                 .date_range('date', start=datetime.datetime(2024, 1, 15, 12, 0)).page_size(3))
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', ClientSideFilterWarning)
+            ids = [item['id'] for item in query]
+        self.assertEqual(ids, [0, 1, 2, 3, 4])
+        self.assertEqual(len(client.transport.requests), 2)
+
+    def test_limit_stops_early(self):
+        client = entries_client([{'id': i} for i in range(100)])
+        ids = [item['id'] for item in Query(client.list_entries, 1).limit(5)]
+        self.assertEqual(ids, [0, 1, 2, 3, 4])
+        self.assertEqual(client.transport.requests[0][2]['limit'], 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+from unittest import mock
+
+from mt_data_api import rate_limiter
+from mt_data_api.rate_limiter import AIMDLimiter, RateLimiter, TokenBucket
+from mt_data_api.transport import Response
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class ClockTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.object(rate_limiter, 'time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TokenBucketTest(ClockTestCase):
+    def test_burst_is_free_then_requests_wait_for_tokens(self):
+        bucket = TokenBucket(rate=10, burst=3)
+        for _ in range(3):
+            bucket.acquire()
+        self.assertEqual(self.clock.sleeps, [])
+        bucket.acquire()
+        self.assertEqual(len(self.clock.sleeps), 1)
+        self.assertAlmostEqual(self.clock.sleeps[0], 0.1)
+
+    def test_tokens_refill_up_to_burst(self):
+        bucket = TokenBucket(rate=10, burst=2)
+        bucket.acquire()
+        bucket.acquire()
+        self.clock.now += 60
+        for _ in range(2):
+            bucket.acquire()
+        self.assertEqual(self.clock.sleeps, [])
+        bucket.acquire()
+        self.assertEqual(len(self.clock.sleeps), 1)
+
+
+class AIMDLimiterTest(ClockTestCase):
+    def replay(self, limiter, latency, count, key=None, ok=True):
+        for _ in range(count):
+            limiter.acquire()
+            self.clock.now += latency
+            limiter.release(latency, ok, key)
+
+    def test_limit_grows_while_latency_is_stable(self):
+        limiter = AIMDLimiter(initial=4, maximum=32)
+        self.replay(limiter, 0.1, 1000)
+        self.assertEqual(limiter.limit, 32)
+
+    def test_lasting_latency_shift_becomes_the_new_baseline(self):
+        limiter = AIMDLimiter(initial=4, maximum=64)
+        self.replay(limiter, 0.1, 150)
+        self.assertGreater(limiter.limit, 10)
+        self.replay(limiter, 0.35, 2000)
+        self.assertAlmostEqual(limiter.baseline(), 0.35, places=3)
+        self.assertGreater(limiter.limit, 10)
+
+    def test_endpoints_keep_separate_baselines(self):
+        limiter = AIMDLimiter(initial=4, maximum=64)
+        self.replay(limiter, 0.05, 100, key='GET /sites/:id')
+        before = limiter.limit
+        self.replay(limiter, 2.0, 50, key='GET /sites/:id/entries')
+        self.assertGreater(limiter.limit, before)
+        self.assertAlmostEqual(limiter.baseline('GET /sites/:id'), 0.05)
+
+    def test_spike_halves_limit_once_per_round_trip(self):
+        limiter = AIMDLimiter(initial=16, maximum=64)
+        self.replay(limiter, 0.1, 1)
+        for _ in range(5):
+            limiter.acquire()
+        for _ in range(5):
+            limiter.release(1.0)
+        self.assertEqual(limiter.limit, 8)
+
+    def test_failures_never_go_below_minimum(self):
+        limiter = AIMDLimiter(initial=8, minimum=2)
+        self.replay(limiter, 0.5, 20, ok=False)
+        self.assertEqual(limiter.limit, 2)
+
+
+class RateLimiterTest(ClockTestCase):
+    def test_server_errors_count_as_failures(self):
+        limiter = RateLimiter(concurrency={'initial': 8})
+        limiter.call(lambda: Response(200, {}, b'{}'))
+        limiter.call(lambda: Response(503, {}, b''))
+        self.assertEqual(limiter.concurrency.limit, 4)
+        self.assertEqual(limiter.concurrency.in_flight, 0)
+
+    def test_exceptions_release_the_slot(self):
+        limiter = RateLimiter(concurrency={'initial': 1})
+
+        def fail():
+            raise IOError('reset')
+        with self.assertRaises(IOError):
+            limiter.call(fail)
+        self.assertEqual(limiter.concurrency.in_flight, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
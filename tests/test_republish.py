@@ -0,0 +1,60 @@
+import json
+import unittest
+
+from mt_data_api import pager
+from mt_data_api.errors import DataAPIError
+from mt_data_api.republish import RepublishOrchestrator
+from mt_data_api.transport import Response
+from tests.stubs import stub_client
+
+
+def respond_json(body, headers=None):
+    return Response(200, headers or {}, json.dumps(body).encode('utf-8'))
+
+
+class PublishEntriesTest(unittest.TestCase):
+    def test_entry_ids_are_joined(self):
+        client = stub_client(lambda method, url, params: {'status': 'Complete'})
+        pager.call(client.publish_entries, [1, 2])
+        self.assertEqual(client.transport.requests[0][2]['ids'], '1,2')
+
+    def test_next_phase_is_followed_while_ids_remain(self):
+        phases = []
+
+        def respond(method, url, params):
+            if url.endswith('/publish/entries'):
+                return respond_json({'restIds': '2', 'status': 'Rebuilding'},
+                                    {'X-MT-Next-Phase-URL': 'publish/entries?ids=2&startTime=1'})
+            return respond_json({'restIds': '', 'status': 'Complete'})
+        client = stub_client(respond)
+        with client.call_options(progress=lambda phase, response: phases.append(phase)):
+            pager.call(client.publish_entries, [1, 2])
+        self.assertEqual(len(client.transport.requests), 2)
+        self.assertIn('publish/entries?ids=2', client.transport.requests[1][1])
+        self.assertEqual(phases, [1, 2])
+
+    def test_missing_next_phase_url_fails_with_an_error(self):
+        client = stub_client(lambda method, url, params: {'restIds': '2', 'status': 'Rebuilding'})
+        errors = []
+        client.publish_entries([1, 2], success=lambda response: self.fail('succeeded'), failure=errors.append)
+        self.assertEqual(len(errors), 1)
+        self.assertIn('message', errors[0])
+        with self.assertRaises(DataAPIError):
+            pager.call(client.publish_entries, [1, 2])
+
+
+class RepublishOrchestratorTest(unittest.TestCase):
+    def test_ids_may_differ_per_site(self):
+        client = stub_client(lambda method, url, params: {'status': 'Complete'})
+        results = RepublishOrchestrator(client, workers=2).run(
+            [1, 2], template_ids={1: [12], 2: [31, 32]}, widget_ids=[40], refresh_templates=False)
+        names = dict((result.site_id, sorted(step.name for step in result.steps)) for result in results)
+        self.assertEqual(names[1], ['publish_template 12', 'refresh_widget 40'])
+        self.assertEqual(names[2], ['publish_template 31', 'publish_template 32', 'refresh_widget 40'])
+        urls = [request[1] for request in client.transport.requests]
+        self.assertTrue(any(url.endswith('/sites/2/templates/31/publish') for url in urls), urls)
+        self.assertFalse(any('/sites/1/templates/31' in url for url in urls), urls)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,20 @@
+import time
+import unittest
+
+from mt_data_api.sharded_crawler import ShardedCrawler
+from tests.stubs import stub_client
+
+
+class ShardedCrawlerTest(unittest.TestCase):
+    def test_sites_whose_task_cannot_start_are_reported(self):
+        client = stub_client(lambda method, url, params: {'items': [], 'totalResults': 1})
+        crawler = ShardedCrawler(client, processes=2, handler=lambda site_id, resource, items: items,
+                                 poll_interval=0.05)
+        started = time.monotonic()
+        self.assertEqual(list(crawler.crawl([1, 2])), [])
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(sorted(crawler.errors), [1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from mt_data_api.errors import ConnectionFailed
+from mt_data_api.http_method import HTTPMethod
+from mt_data_api.shared_cache import CachingTransport, SharedCache
+from tests.stubs import StubTransport, stub_client
+
+BASE = 'http://mt.example/mt-data-api.cgi'
+
+
+class CacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = SharedCache(os.path.join(self.directory, 'cache.db'))
+        self.inner = StubTransport(lambda method, url, params: {'items': [], 'totalResults': 0})
+        self.transport = CachingTransport(self.inner, self.cache, scope='test')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def get(self, path, headers=None):
+        return self.transport.request(HTTPMethod.GET, BASE + '/v3' + path, headers=headers)
+
+
+class CachingTransportTest(CacheTestCase):
+    def test_get_is_cached(self):
+        self.get('/sites/1/templates')
+        self.get('/sites/1/templates')
+        self.assertEqual(len(self.inner.requests), 1)
+
+    def test_no_cache_header_bypasses_cache(self):
+        self.get('/version')
+        self.get('/version', {'Cache-Control': 'no-cache'})
+        self.assertEqual(len(self.inner.requests), 2)
+
+    def test_health_check_reaches_node(self):
+        client = stub_client(lambda method, url, params: {'endpointVersion': 'v3'})
+        client.transport = CachingTransport(client.transport, self.cache, scope='test')
+        client.api_base_url = [BASE]
+        self.assertTrue(client.node_pool.check_node(BASE))
+
+        def down(method, url, params):
+            raise ConnectionFailed()
+        client.transport.transport.respond = down
+        self.assertFalse(client.node_pool.check_node(BASE))
+        client.node_pool.close()
+
+
+class InvalidationTest(CacheTestCase):
+    def write(self, path, params=None):
+        self.transport.request(HTTPMethod.POST, BASE + '/v3' + path, params)
+
+    def assertRefetched(self, path, expected=True):
+        before = len(self.inner.requests)
+        self.get(path)
+        self.assertEqual(len(self.inner.requests) - before, 1 if expected else 0, path)
+
+    def test_refresh_templates_drops_template_lists(self):
+        self.get('/sites/1/templates')
+        self.get('/sites/2/templates')
+        self.write('/sites/1/refresh_templates')
+        self.assertRefetched('/sites/1/templates')
+        self.assertRefetched('/sites/2/templates', expected=False)
+
+    def test_comment_create_drops_site_comment_list(self):
+        self.get('/sites/1/comments')
+        self.get('/sites/1/entries/5/comments')
+        self.write('/sites/1/entries/5/comments')
+        self.assertRefetched('/sites/1/comments')
+        self.assertRefetched('/sites/1/entries/5/comments')
+
+    def test_grant_drops_user_permissions(self):
+        self.get('/users/7/permissions')
+        self.get('/users/8/permissions')
+        self.write('/sites/1/permissions/grant', {'user_id': 7, 'role_id': 2})
+        self.assertRefetched('/users/7/permissions')
+        self.assertRefetched('/users/8/permissions', expected=False)
+
+    def test_role_update_drops_all_permission_lists(self):
+        self.get('/sites/1/permissions')
+        self.get('/users/8/permissions')
+        self.get('/sites/1/entries')
+        self.transport.request(HTTPMethod.PUT, BASE + '/v3/roles/3', {})
+        self.assertRefetched('/sites/1/permissions')
+        self.assertRefetched('/users/8/permissions')
+        self.assertRefetched('/sites/1/entries', expected=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
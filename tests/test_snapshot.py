@@ -0,0 +1,35 @@
+import unittest
+
+from mt_data_api import snapshot
+from tests.stubs import stub_client
+
+
+def instance(entries):
+    def respond(method, url, params):
+        if url.endswith('/entries'):
+            return {'items': entries, 'totalResults': len(entries)}
+        return {'items': [], 'totalResults': 0}
+    return stub_client(respond)
+
+
+class SnapshotTest(unittest.TestCase):
+    def test_copies_with_other_modified_dates_match(self):
+        source = instance([{'id': 1, 'title': 'Hello', 'body': 'Hi', 'modifiedDate': '2015-01-01T00:00:00Z'}])
+        target = instance([{'id': 1, 'title': 'Hello', 'body': 'Hi', 'modifiedDate': '2020-06-01T00:00:00Z'}])
+        diffs = snapshot.compare(snapshot.take_snapshot(source, [1], resources=('entries',)),
+                                 snapshot.take_snapshot(target, [1], resources=('entries',)))
+        self.assertEqual(diffs, [])
+        fields = source.transport.requests[0][2]['fields'].split(',')
+        self.assertIn('body', fields)
+        self.assertNotIn('modifiedDate', fields)
+
+    def test_content_changes_are_found(self):
+        source = instance([{'id': 1, 'title': 'Hello', 'body': 'Hi'}, {'id': 2, 'title': 'Same'}])
+        target = instance([{'id': 1, 'title': 'Hello', 'body': 'Bye'}, {'id': 2, 'title': 'Same'}])
+        diffs = snapshot.compare(snapshot.take_snapshot(source, [1], resources=('entries',)),
+                                 snapshot.take_snapshot(target, [1], resources=('entries',)))
+        self.assertEqual([(d.resource, d.changed) for d in diffs], [('entries', ['1'])])
+
+
+if __name__ == '__main__':
+    unittest.main()
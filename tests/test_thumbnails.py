@@ -0,0 +1,64 @@
+import shutil
+import tempfile
+import unittest
+
+from mt_data_api.thumbnails import ThumbnailService
+from tests.stubs import stub_client
+
+
+class FakeAssets(object):
+    def __init__(self):
+        self.dates = dict((str(i), '2024-01-01T00:00:00Z') for i in range(1, 81))
+
+    def respond(self, method, url, params):
+        if url.endswith('/assets'):
+            ids = params['includeIds'].split(',')
+            items = [{'id': int(i), 'modifiedDate': self.dates[i]} for i in ids if i in self.dates]
+            return {'items': items, 'totalResults': len(items)}
+        asset_id = url.split('/assets/')[1].split('/')[0]
+        return {'url': 'http://mt.example/thumb/%s-%s.jpg' % (asset_id, params.get('width'))}
+
+
+class ThumbnailServiceTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.assets = FakeAssets()
+        self.client = stub_client(self.assets.respond)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def requests_to(self, suffix):
+        return [r for r in self.client.transport.requests if r[1].split('?')[0].endswith(suffix)]
+
+    def test_dates_for_bare_ids_are_fetched_in_batches(self):
+        with ThumbnailService(self.client, self.directory) as service:
+            thumbnails = service.thumbnails(1, [(i, {'width': 160}) for i in range(1, 81)])
+        self.assertEqual(thumbnails[0], {'url': 'http://mt.example/thumb/1-160.jpg'})
+        self.assertEqual(len(self.requests_to('/assets')), 2)
+        self.assertEqual(len(self.requests_to('/thumbnail')), 80)
+
+    def test_cached_render_needs_no_round_trip(self):
+        with ThumbnailService(self.client, self.directory) as service:
+            service.thumbnails(1, [(i, {'width': 160}) for i in range(1, 11)])
+            del self.client.transport.requests[:]
+            service.thumbnails(1, [(i, {'width': 160}) for i in range(1, 11)])
+            self.assertEqual(self.client.transport.requests, [])
+            self.assertEqual(service.hits, 10)
+
+    def test_expired_dates_pick_up_edits(self):
+        with ThumbnailService(self.client, self.directory, modified_ttl=0) as service:
+            service.thumbnails(1, [(1, {'width': 160})])
+            self.assets.dates['1'] = '2024-02-01T00:00:00Z'
+            service.thumbnails(1, [(1, {'width': 160})])
+            self.assertEqual(service.misses, 2)
+
+    def test_missing_asset_fails_alone(self):
+        with ThumbnailService(self.client, self.directory) as service:
+            results = service.thumbnails(1, [(1, None), (999, None)], return_exceptions=True)
+        self.assertEqual(results[0], {'url': 'http://mt.example/thumb/1-None.jpg'})
+        self.assertIsInstance(results[1], Exception)
+
+
+if __name__ == '__main__':
+    unittest.main()
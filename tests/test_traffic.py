@@ -0,0 +1,31 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from mt_data_api.traffic import read_records, RecordingTransport
+from tests.stubs import stub_client
+
+
+class RecordingTransportTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'traffic.ndjson')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_file_object_uploads_are_recorded(self):
+        client = stub_client(lambda method, url, params: {'id': 1})
+        client.transport = RecordingTransport(client.transport, self.path)
+        got = []
+        client.upload_asset_for_site(1, b'abc', 'a.png', success=got.append)
+        client.upload_asset_for_site(1, io.BytesIO(b'abcdef'), 'b.png', success=got.append)
+        client.transport.close()
+        self.assertEqual(got, [{'id': 1}, {'id': 1}])
+        self.assertEqual([record['f'] for record in read_records(self.path)], [{'file': 3}, {'file': 6}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import base64
+import json
+import socket
+import threading
+import time
+import unittest
+import urllib.parse
+
+from mt_data_api.errors import ConnectionFailed, RequestTimeout
+from mt_data_api.http_method import HTTPMethod
+from mt_data_api.transport import HTTP2Transport, RequestsTransport, Response, Urllib3Transport
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def __reply(self):
+        url = urllib.parse.urlsplit(self.path)
+        if url.path == '/slow':
+            time.sleep(1.0)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length).decode('utf-8') if length else ''
+        data = json.dumps({
+            'method': self.command,
+            'path': url.path,
+            'query': dict(urllib.parse.parse_qsl(url.query)),
+            'form': dict(urllib.parse.parse_qsl(body)) if 'urlencoded' in self.headers.get('Content-Type', '') else {},
+            'multipart': 'multipart/form-data' in self.headers.get('Content-Type', ''),
+            'authorization': self.headers.get('Authorization'),
+            'token': self.headers.get('X-MT-Authorization'),
+            'padding': 'x' * 5000,
+        }).encode('utf-8')
+        self.send_response(404 if url.path == '/missing' else 200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client timed out on /slow and hung up
+
+    do_GET = do_POST = do_PUT = do_DELETE = __reply
+
+
+def closed_port():
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+class TransportTests(object):
+    # Runs against a local server; subclasses provide make_transport().
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), EchoHandler)
+        cls.server.daemon_threads = True
+        cls.base = 'http://127.0.0.1:%d' % cls.server.server_address[1]
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.transport = self.make_transport()
+        self.addCleanup(self.transport.close)
+
+    def test_get_sends_params_in_the_query(self):
+        response = self.transport.request(HTTPMethod.GET, self.base + '/entries', {'limit': '5'},
+                                          headers={'X-MT-Authorization': 'MTAuth accessToken=t'})
+        self.assertEqual(response.status_code, 200)
+        echo = response.json()
+        self.assertEqual((echo['method'], echo['query'], echo['token']),
+                         ('GET', {'limit': '5'}, 'MTAuth accessToken=t'))
+
+    def test_post_and_put_send_a_form_body(self):
+        for method in (HTTPMethod.POST, HTTPMethod.PUT):
+            echo = self.transport.request(method, self.base + '/entries', {'entry': '{"title": "a"}'}).json()
+            self.assertEqual((echo['method'], echo['form']), (method.name, {'entry': '{"title": "a"}'}))
+
+    def test_files_are_sent_as_multipart(self):
+        echo = self.transport.request(HTTPMethod.POST, self.base + '/assets/upload', {'path': '/'},
+                                      files={'file': ('a.txt', b'data')}).json()
+        self.assertTrue(echo['multipart'])
+
+    def test_basic_auth(self):
+        echo = self.transport.request(HTTPMethod.DELETE, self.base + '/entries/1', auth=('user', 'pass')).json()
+        self.assertEqual(echo['authorization'], 'Basic ' + base64.b64encode(b'user:pass').decode('ascii'))
+
+    def test_error_status_is_returned(self):
+        self.assertEqual(self.transport.request(HTTPMethod.GET, self.base + '/missing').status_code, 404)
+
+    def test_streamed_body_arrives_in_chunks(self):
+        response = self.transport.request(HTTPMethod.GET, self.base + '/entries', stream=True)
+        chunks = list(response.iter_content(1024))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(json.loads(b''.join(chunks).decode('utf-8'))['path'], '/entries')
+
+    def test_timeout_raises_request_timeout(self):
+        with self.assertRaises(RequestTimeout):
+            self.transport.request(HTTPMethod.GET, self.base + '/slow', timeout=0.2)
+
+    def test_refused_connection_raises_connection_failed(self):
+        with self.assertRaises(ConnectionFailed) as caught:
+            self.transport.request(HTTPMethod.GET, 'http://127.0.0.1:%d/' % closed_port(), timeout=2)
+        self.assertNotIsInstance(caught.exception, RequestTimeout)
+
+
+class RequestsTransportTest(TransportTests, unittest.TestCase):
+    def make_transport(self):
+        return RequestsTransport()
+
+
+class Urllib3TransportTest(TransportTests, unittest.TestCase):
+    def make_transport(self):
+        return Urllib3Transport(retries=False)
+
+    def test_errors_wrapped_by_retries_keep_their_kind(self):
+        transport = Urllib3Transport(retries=1)
+        self.addCleanup(transport.close)
+        with self.assertRaises(RequestTimeout):
+            transport.request(HTTPMethod.GET, self.base + '/slow', timeout=0.2)
+        with self.assertRaises(ConnectionFailed) as caught:
+            transport.request(HTTPMethod.GET, 'http://127.0.0.1:%d/' % closed_port(), timeout=2)
+        self.assertNotIsInstance(caught.exception, RequestTimeout)
+
+
+@unittest.skipIf(httpx is None, 'httpx is not installed')
+class HTTP2TransportTest(TransportTests, unittest.TestCase):
+    def make_transport(self):
+        return HTTP2Transport(http2=False)
+
+
+class ResponseTest(unittest.TestCase):
+    def test_content_is_split_into_chunks(self):
+        response = Response(200, {}, b'abcdefg')
+        self.assertEqual(list(response.iter_content(3)), [b'abc', b'def', b'g'])
+
+    def test_streamed_content_is_released_once_read(self):
+        released = []
+        response = Response(200, {}, chunks=lambda size: iter([b'{"a":', b' 1}']),
+                            release=lambda: released.append(True))
+        self.assertEqual(response.json(), {'a': 1})
+        self.assertEqual(released, [True])
+
+
+if __name__ == '__main__':
+    unittest.main()
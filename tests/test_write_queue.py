@@ -0,0 +1,85 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from mt_data_api.write_queue import WriteBehindQueue
+from tests.stubs import stub_client
+
+
+class WriteBehindQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.journal = os.path.join(self.directory, 'journal.ndjson')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_failing_on_dead_callback_does_not_stop_flushing(self):
+        client = stub_client(lambda method, url, params: {'error': {'code': 500, 'message': 'boom'}})
+
+        def on_dead(record, error):
+            raise RuntimeError('callback failed')
+        queue = WriteBehindQueue(client, self.journal, max_attempts=1, flush_interval=0.01, fsync=False,
+                                 on_dead=on_dead).start()
+        queue.create_log(1, {'message': 'a'})
+        self.assertTrue(queue.flush(timeout=3))
+        queue.create_log(1, {'message': 'b'})
+        self.assertTrue(queue.flush(timeout=3))
+        queue.close(timeout=3)
+        self.assertEqual(queue.dead, 2)
+        self.assertEqual(len(queue.errors), 2)
+
+    def test_journal_is_compacted_while_running(self):
+        client = stub_client(lambda method, url, params: {'id': 1})
+        queue = WriteBehindQueue(client, self.journal, batch_size=5, flush_interval=0.01, fsync=False,
+                                 compact_after=10).start()
+        for i in range(60):
+            queue.create_log(1, {'message': str(i)})
+        self.assertTrue(queue.flush(timeout=3))
+        with open(self.journal) as f:
+            lines = f.readlines()
+        self.assertLess(len(lines), 30)
+        queue.close(timeout=3)
+        self.assertEqual(queue.flushed, 60)
+
+    def test_compaction_keeps_unsent_writes(self):
+        failing = [True]
+
+        def respond(method, url, params):
+            if failing[0] and 'kept' in params['log']:
+                return {'error': {'code': 500, 'message': 'down'}}
+            return {'id': 1}
+        client = stub_client(respond)
+        queue = WriteBehindQueue(client, self.journal, batch_size=50, flush_interval=0.05, retry_delay=60,
+                                 fsync=False, compact_after=1).start()
+        for message in ('a', 'b', 'kept', 'c', 'd'):
+            queue.create_log(1, {'message': message})
+        self.assertFalse(queue.flush(timeout=0.3))
+        queue.close(timeout=0.1)
+        with open(self.journal) as f:
+            self.assertEqual(len(f.readlines()), 1)
+        failing[0] = False
+        queue = WriteBehindQueue(client, self.journal, flush_interval=0.01, fsync=False).start()
+        self.assertTrue(queue.flush(timeout=3))
+        queue.close(timeout=3)
+        self.assertEqual(queue.flushed, 1)
+
+    def test_enqueue_before_start_is_rejected(self):
+        queue = WriteBehindQueue(stub_client(), self.journal)
+        with self.assertRaises(RuntimeError):
+            queue.create_log(1, {'message': 'early'})
+
+
+class ReplyCommentTest(unittest.TestCase):
+    def test_reply_urls_name_the_parent_object(self):
+        client = stub_client(lambda method, url, params: {'id': 1})
+        client.create_reply_comment_for_entry(1, 2, 3, {'body': 'x'})
+        client.create_reply_comment_for_page(1, 4, 5, {'body': 'y'})
+        urls = [request[1] for request in client.transport.requests]
+        self.assertTrue(urls[0].endswith('/sites/1/entries/2/comments/3/replies'))
+        self.assertTrue(urls[1].endswith('/sites/1/pages/4/comments/5/replies'))
+
+
+if __name__ == '__main__':
+    unittest.main()